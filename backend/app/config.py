@@ -3,22 +3,31 @@
 import os
 from pathlib import Path
 from functools import lru_cache
+from typing import Optional
 
 import yaml
 from pydantic import BaseModel
 from pydantic_settings import BaseSettings
 
+from .utils.walker import DEFAULT_EXCLUDE
+
 
 class ServerConfig(BaseModel):
     """Server configuration."""
     host: str = "127.0.0.1"
     port: int = 8000
+    # Enables diagnostics such as EXPLAIN QUERY PLAN output from /api/search
+    debug: bool = False
 
 
 class StorageConfig(BaseModel):
     """Storage configuration."""
     data_dir: str = "./data"
-    max_file_size: int = 100 * 1024 * 1024  # 100MB
+    max_file_size: int = 100 * 1024 * 1024  # 100MB, for single-request uploads
+    # Resumable uploads (POST /api/import/uploads)
+    max_upload_size: int = 20 * 1024 * 1024 * 1024  # 20GB
+    upload_chunk_size: int = 8 * 1024 * 1024  # Default chunk size offered to clients
+    upload_expire_hours: int = 24  # Unfinished sessions idle this long are deleted
 
 
 class ClassificationRule(BaseModel):
@@ -50,6 +59,84 @@ class ImportConfig(BaseModel):
     extract_text: bool = True
     generate_thumbnails: bool = True
     deduplicate: bool = True
+    # Estimated text overlap (Jaccard) at which items count as near-duplicates
+    near_duplicate_threshold: float = 0.8
+    # Worker processes hashing and extracting files in path imports (0 = one per CPU core)
+    workers: int = 0
+    # How imported files get into the store: "copy" (reflink or in-kernel
+    # copy where the file system allows) or "hardlink" (no copy at all on
+    # the same file system; in-place edits of a source change the vault too)
+    ingest_mode: str = "copy"
+    # URL imports: requests in flight at once, and per host at most
+    # url_per_host, started url_host_interval seconds apart
+    url_concurrency: int = 16
+    url_per_host: int = 2
+    url_host_interval: float = 0.5
+    # Retries of a page after a network error, timeout, 429 or 5xx (with backoff)
+    url_retries: int = 3
+    url_timeout: float = 30.0
+    # Paths skipped by directory imports, in .gitignore syntax (on top of
+    # the .gitignore/.kvaultignore files found, and virtualenvs)
+    exclude: list[str] = list(DEFAULT_EXCLUDE)
+
+
+class ExtractionConfig(BaseModel):
+    """Sandboxed text extraction configuration."""
+    # Worker processes extracting text and thumbnails (0 = one per CPU core)
+    workers: int = 0
+    # Seconds one file may take before its worker is killed
+    timeout: float = 120.0
+    # Memory a worker may allocate on top of its size after start-up (0 = no limit)
+    max_memory_mb: int = 1024
+    # Files a worker handles before it is replaced by a fresh process
+    max_tasks_per_worker: int = 200
+    # Timed-out and crashed extractions are retried retry_attempts times, the
+    # first retry_delay seconds later and each further one after twice as long
+    retry_attempts: int = 3
+    retry_delay: float = 300.0
+
+
+class WatchedFolder(BaseModel):
+    """Folder mirrored into the vault as its files change."""
+    path: str
+    category: Optional[str] = None  # Category name for new items
+    auto_classify: bool = True
+    sync: bool = False  # Also move or delete items whose files were moved or deleted
+
+
+class WatchConfig(BaseModel):
+    """Watched folder configuration."""
+    folders: list[WatchedFolder] = []
+    # Changes are imported once no event arrived for debounce_seconds,
+    # or max_delay_seconds after the first one at the latest
+    debounce_seconds: float = 2.0
+    max_delay_seconds: float = 30.0
+    # Stat scan interval when watchdog is not installed or cannot watch a folder
+    poll_interval: float = 10.0
+    # Finished import jobs kept per folder; older ones are deleted
+    keep_jobs: int = 20
+
+
+class SearchConfig(BaseModel):
+    """Full-text search configuration."""
+    # FTS5 tokenizer mode: "bigram" (CJK-aware), "trigram" or "unicode61"
+    fts_tokenizer: str = "bigram"
+    # bm25() column weights for the FTS5 index
+    title_weight: float = 10.0
+    description_weight: float = 5.0
+    text_weight: float = 1.0
+
+
+class SemanticConfig(BaseModel):
+    """Semantic (vector) search configuration."""
+    # Size of the hashed TF-IDF item vectors (at most 8192); changing it rebuilds the index
+    dimensions: int = 512
+    # Similarities below this are hashing noise rather than shared content
+    min_similarity: float = 0.05
+    # Share of vector similarity in hybrid ranking, the rest is normalized BM25
+    hybrid_weight: float = 0.5
+    # Precomputed most-similar items kept per item (/api/items/{id}/similar)
+    neighbors: int = 20
 
 
 class Settings(BaseSettings):
@@ -64,6 +151,10 @@ class Settings(BaseSettings):
     storage: StorageConfig = StorageConfig()
     classification: ClassificationConfig = ClassificationConfig()
     import_config: ImportConfig = ImportConfig()
+    extraction: ExtractionConfig = ExtractionConfig()
+    watch: WatchConfig = WatchConfig()
+    search: SearchConfig = SearchConfig()
+    semantic: SemanticConfig = SemanticConfig()
 
     # Database
     database_url: str = "sqlite+aiosqlite:///./data/vault.db"
@@ -90,6 +181,14 @@ class Settings(BaseSettings):
                 self.classification = ClassificationConfig(**config_data["classification"])
             if "import" in config_data:
                 self.import_config = ImportConfig(**config_data["import"])
+            if "extraction" in config_data:
+                self.extraction = ExtractionConfig(**config_data["extraction"])
+            if "watch" in config_data:
+                self.watch = WatchConfig(**config_data["watch"])
+            if "search" in config_data:
+                self.search = SearchConfig(**config_data["search"])
+            if "semantic" in config_data:
+                self.semantic = SemanticConfig(**config_data["semantic"])
 
         # Override with environment variables
         # Support multiple env var names for API key
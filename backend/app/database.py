@@ -1,10 +1,14 @@
 """Database configuration and session management."""
 
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
-from sqlalchemy.orm import DeclarativeBase
-from sqlalchemy import event, text
+from sqlalchemy.orm import DeclarativeBase, Session
+from sqlalchemy import event, inspect, text
+from sqlalchemy.exc import IntegrityError
 
 from .config import get_settings
+from .utils.fts import FTS_COLUMNS, ensure_fts_index, index_items
+from .utils.minhash import ensure_signature_index, index_signatures
+from .utils.search_query import file_extension
 
 
 class Base(DeclarativeBase):
@@ -21,6 +25,32 @@ engine = create_async_engine(
     future=True,
 )
 
+
+
+@event.listens_for(Session, "after_flush")
+def _index_flushed_items(session, flush_context):
+    """
+    Write the FTS rows (see index_items()) and MinHash signatures of items
+    added or edited by a flush; Core inserts write their own.
+    """
+    text_ids, signature_ids = [], []
+    for obj in session.new:
+        if getattr(obj, "__tablename__", None) == "items":
+            text_ids.append(obj.id)
+            signature_ids.append(obj.id)
+    for obj in session.dirty:
+        if getattr(obj, "__tablename__", None) == "items":
+            state = inspect(obj)
+            if any(state.attrs[c].history.has_changes() for c in FTS_COLUMNS):
+                text_ids.append(obj.id)
+            if state.attrs.extracted_text.history.has_changes():
+                signature_ids.append(obj.id)
+    if text_ids:
+        index_items(session.connection(), text_ids, settings.search.fts_tokenizer)
+    if signature_ids:
+        index_signatures(session.connection(), signature_ids)
+
+
 # Create async session factory
 async_session_maker = async_sessionmaker(
     engine,
@@ -29,6 +59,51 @@ async_session_maker = async_sessionmaker(
 )
 
 
+def _add_file_extension_column(conn):
+    """Add and fill items.file_extension in vaults created before it."""
+    columns = {row[1] for row in conn.execute(text("PRAGMA table_info(items)"))}
+    if "file_extension" in columns:
+        return
+    # The index of that name was over a Python SQL function of file_path
+    conn.execute(text("DROP INDEX IF EXISTS ix_items_file_extension"))
+    conn.execute(text("ALTER TABLE items ADD COLUMN file_extension VARCHAR(50)"))
+    rows = [
+        {"id": item_id, "extension": file_extension(path)}
+        for item_id, path in conn.execute(text("SELECT id, file_path FROM items WHERE file_path IS NOT NULL"))
+    ]
+    rows = [row for row in rows if row["extension"]]
+    if rows:
+        conn.execute(text("UPDATE items SET file_extension = :extension WHERE id = :id"), rows)
+
+
+def _add_job_unchanged_column(conn):
+    """Add jobs.unchanged in vaults created before it."""
+    columns = {row[1] for row in conn.execute(text("PRAGMA table_info(jobs)"))}
+    if "unchanged" not in columns:
+        conn.execute(text("ALTER TABLE jobs ADD COLUMN unchanged INTEGER"))
+
+
+def _create_missing_indexes(conn):
+    """Create model indexes added after a vault's tables were created."""
+    # Looked up by name, since reflection does not report expression indexes
+    existing = set(conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'index'")).scalars())
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            if index.name not in existing:
+                try:
+                    index.create(conn)
+                except IntegrityError as e:
+                    # A unique index over rows that already repeat a value
+                    print(f"Could not create index {index.name}: {e.orig}")
+
+    # The plain file_hash index of older vaults is superseded by the unique
+    # one, unless repeated hashes kept that from being created
+    if conn.execute(text(
+        "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'ix_items_file_hash_unique'"
+    )).first():
+        conn.execute(text("DROP INDEX IF EXISTS ix_items_file_hash"))
+
+
 async def init_db():
     """Initialize the database, creating all tables."""
     from . import models  # Import models to register them
@@ -36,14 +111,18 @@ async def init_db():
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
 
-        # Create FTS5 virtual table for full-text search
-        await conn.execute(text("""
-            CREATE VIRTUAL TABLE IF NOT EXISTS items_fts USING fts5(
-                title, description, extracted_text,
-                content='items',
-                content_rowid='id'
-            )
-        """))
+        # create_all does not add columns to tables that already exist
+        await conn.run_sync(_add_file_extension_column)
+        await conn.run_sync(_add_job_unchanged_column)
+
+        # create_all skips indexes on tables that already exist
+        await conn.run_sync(_create_missing_indexes)
+
+        # Create (or backfill) the FTS5 index used by /api/search
+        await conn.run_sync(ensure_fts_index, settings.search.fts_tokenizer)
+
+        # Create (or backfill) the near-duplicate signature index
+        await conn.run_sync(ensure_signature_index)
 
 
 async def get_db() -> AsyncSession:
@@ -8,9 +8,16 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 
 from .config import get_settings
-from .database import init_db
-from .routers import items_router, categories_router, import_router, search_router
+from .database import init_db, async_session_maker
+from .routers import items_router, categories_router, import_router, search_router, blobs_router, jobs_router
 from .services.init_data import init_default_categories
+from .services.suggest import suggestion_index
+from .services.neighbors import neighbor_index
+from .services.import_pipeline import import_pipeline
+from .services.jobs import job_manager
+from .services.watcher import folder_watcher
+from .services.web_scraper import url_fetcher
+from .services.extraction import extraction_pool, extraction_retries
 
 
 @asynccontextmanager
@@ -21,8 +28,26 @@ async def lifespan(app: FastAPI):
     settings.ensure_directories()
     await init_db()
     await init_default_categories()
+    # Build the typeahead index before the first keystroke needs it
+    async with async_session_maker() as session:
+        await suggestion_index.ensure_loaded(session)
+    # Keep vectors and similar-item lists current in the background
+    neighbor_index.start()
+    # Retry the text extractions that failed
+    extraction_retries.start()
+    # Pick up imports interrupted by the last shutdown
+    await job_manager.resume_unfinished()
+    # Mirror the watched folders of config.yaml
+    await folder_watcher.start()
     yield
-    # Shutdown (if needed)
+    # Shutdown
+    await folder_watcher.stop()
+    await job_manager.stop()
+    await neighbor_index.stop()
+    await extraction_retries.stop()
+    import_pipeline.shutdown()
+    await extraction_pool.shutdown()
+    await url_fetcher.close()
 
 
 app = FastAPI(
@@ -46,6 +71,8 @@ app.include_router(items_router, prefix="/api/items", tags=["items"])
 app.include_router(categories_router, prefix="/api/categories", tags=["categories"])
 app.include_router(import_router, prefix="/api/import", tags=["import"])
 app.include_router(search_router, prefix="/api/search", tags=["search"])
+app.include_router(blobs_router, prefix="/api/blobs", tags=["blobs"])
+app.include_router(jobs_router, prefix="/api/jobs", tags=["jobs"])
 
 
 # Mount static files for serving stored content
@@ -1,8 +1,11 @@
 """Database models for KnowledgeVault."""
 
 from .category import Category
-from .item import Item, ItemAssociation
+from .item import Item, ItemAssociation, ItemSignature, ItemSignatureBand
 from .tag import Tag, ItemTag
 from .rule import ClassificationRule
+from .job import Job, JobFile
+from .scan import ScanEntry
+from .extraction import ExtractionRetry
 
-__all__ = ["Category", "Item", "ItemAssociation", "Tag", "ItemTag", "ClassificationRule"]
+__all__ = ["Category", "Item", "ItemAssociation", "ItemSignature", "ItemSignatureBand", "Tag", "ItemTag", "ClassificationRule", "Job", "JobFile", "ScanEntry", "ExtractionRetry"]
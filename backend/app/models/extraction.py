@@ -0,0 +1,21 @@
+"""Retry queue model for failed text extractions."""
+
+from datetime import datetime
+
+from sqlalchemy import Integer, DateTime, ForeignKey
+from sqlalchemy.orm import Mapped, mapped_column
+
+from ..database import Base
+
+
+class ExtractionRetry(Base):
+    """An item whose text extraction failed, to be tried again (see services/extraction.py)."""
+
+    __tablename__ = "extraction_retries"
+
+    item_id: Mapped[int] = mapped_column(ForeignKey("items.id", ondelete="CASCADE"), primary_key=True)
+    attempts: Mapped[int] = mapped_column(Integer, default=0, nullable=False)  # Retries made so far
+    retry_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, index=True)
+
+    def __repr__(self) -> str:
+        return f"<ExtractionRetry(item_id={self.item_id}, attempts={self.attempts})>"
@@ -4,10 +4,13 @@ from datetime import datetime
 from typing import Optional, TYPE_CHECKING
 import json
 
-from sqlalchemy import String, Text, Integer, Float, DateTime, ForeignKey, JSON, Boolean, Table, Column
-from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy import (
+    String, Text, Integer, Float, DateTime, ForeignKey, JSON, Boolean, LargeBinary, Table, Column, Index,
+)
+from sqlalchemy.orm import Mapped, mapped_column, relationship, query_expression, validates
 
 from ..database import Base
+from ..utils.search_query import file_extension
 
 if TYPE_CHECKING:
     from .category import Category
@@ -22,11 +25,46 @@ ItemAssociation = Table(
     Column("associated_item_id", Integer, ForeignKey("items.id", ondelete="CASCADE"), primary_key=True),
 )
 
+# MinHash signature of each item's extracted_text (see utils/minhash.py),
+# written by the app and dropped by SQLite triggers when the text changes
+ItemSignature = Table(
+    "item_signatures",
+    Base.metadata,
+    Column("item_id", Integer, ForeignKey("items.id", ondelete="CASCADE"), primary_key=True),
+    Column("signature", LargeBinary, nullable=False),
+)
+
+# LSH index: one row per signature band, keyed by the band's hash bucket
+ItemSignatureBand = Table(
+    "item_signature_bands",
+    Base.metadata,
+    Column("band", Integer, primary_key=True),
+    Column("bucket", Integer, primary_key=True),
+    Column("item_id", Integer, ForeignKey("items.id", ondelete="CASCADE"), primary_key=True),
+    Index("ix_item_signature_bands_item_id", "item_id"),
+)
+
+
+
+def _file_extension_default(context) -> Optional[str]:
+    return file_extension(context.get_current_parameters().get("file_path"))
+
 
 class Item(Base):
     """Content item stored in the vault."""
 
     __tablename__ = "items"
+    __table_args__ = (
+        # Composite indexes backing keyset pagination (ORDER BY <col> DESC, id DESC)
+        Index("ix_items_created_at_id", "created_at", "id"),
+        Index("ix_items_favorite_at_id", "favorite_at", "id"),
+        Index("ix_items_category_created_at_id", "category_id", "created_at", "id"),
+        Index("ix_items_content_type_created_at_id", "content_type", "created_at", "id"),
+        # One item per stored content; NULL for URLs and notes is not unique-checked
+        Index("ix_items_file_hash_unique", "file_hash", unique=True),
+        # Backs ext: filters in the search query language
+        Index("ix_items_file_extension", "file_extension"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     title: Mapped[str] = mapped_column(String(500), nullable=False)
@@ -42,9 +80,13 @@ class Item(Base):
     extracted_text: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
 
     # File metadata
-    file_hash: Mapped[Optional[str]] = mapped_column(String(64), nullable=True, index=True)
+    file_hash: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
     file_size: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
     mime_type: Mapped[Optional[str]] = mapped_column(String(100), nullable=True)
+    # Lower-case extension of file_path; the default covers Core inserts
+    file_extension: Mapped[Optional[str]] = mapped_column(
+        String(50), nullable=True, default=_file_extension_default
+    )
     thumbnail_path: Mapped[Optional[str]] = mapped_column(String(500), nullable=True)
 
     # Classification
@@ -60,6 +102,9 @@ class Item(Base):
     # Flexible metadata as JSON
     item_metadata: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True)
 
+    # Excerpt of extracted_text, populated only by queries using with_expression()
+    text_preview: Mapped[Optional[str]] = query_expression()
+
     # Timestamps
     created_at: Mapped[datetime] = mapped_column(
         DateTime, default=datetime.utcnow
@@ -85,6 +130,11 @@ class Item(Base):
         backref="associated_by",
     )
 
+    @validates("file_path")
+    def _set_file_extension(self, key: str, value: Optional[str]) -> Optional[str]:
+        self.file_extension = file_extension(value)
+        return value
+
     def __repr__(self) -> str:
         return f"<Item(id={self.id}, title='{self.title[:50]}...', type='{self.content_type}')>"
 
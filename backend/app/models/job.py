@@ -0,0 +1,55 @@
+"""Background job models."""
+
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import String, Text, Integer, DateTime, ForeignKey, JSON, Index
+from sqlalchemy.orm import Mapped, mapped_column
+
+from ..database import Base
+
+
+class Job(Base):
+    """Background import job (see services/jobs.py)."""
+
+    __tablename__ = "jobs"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    job_type: Mapped[str] = mapped_column(String(50), nullable=False)  # path, url
+    status: Mapped[str] = mapped_column(String(20), nullable=False, default="queued")  # queued, running, completed, failed, cancelled
+    params: Mapped[dict] = mapped_column(JSON, nullable=False)  # path/url, category_id, auto_classify, sync
+
+    # Number of files to process, once the walk has finished
+    total: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    # Files left alone because they had not changed since the last scan, once the job ended
+    unchanged: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    # Why the job as a whole failed
+    error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+
+    # Timestamps
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    started_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    finished_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+
+    def __repr__(self) -> str:
+        return f"<Job(id={self.id}, type='{self.job_type}', status='{self.status}')>"
+
+
+class JobFile(Base):
+    """Outcome of one file (or URL) of a job; a resumed job skips these."""
+
+    __tablename__ = "job_files"
+    __table_args__ = (
+        Index("ix_job_files_job_id_status", "job_id", "status"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    job_id: Mapped[int] = mapped_column(ForeignKey("jobs.id", ondelete="CASCADE"), nullable=False)
+    path: Mapped[str] = mapped_column(String(2000), nullable=False)
+    status: Mapped[str] = mapped_column(String(20), nullable=False)  # imported, skipped, failed, moved, deleted
+    item_id: Mapped[Optional[int]] = mapped_column(ForeignKey("items.id", ondelete="SET NULL"), nullable=True)
+    error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+    def __repr__(self) -> str:
+        return f"<JobFile(job_id={self.job_id}, path='{self.path}', status='{self.status}')>"
@@ -0,0 +1,28 @@
+"""Scan manifest model for incremental folder imports."""
+
+from datetime import datetime
+
+from sqlalchemy import String, Integer, DateTime
+from sqlalchemy.orm import Mapped, mapped_column
+
+from ..database import Base
+
+
+class ScanEntry(Base):
+    """Stat and content hash of a local file as of the last scan (see services/scan_manifest.py)."""
+
+    __tablename__ = "scan_entries"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    path: Mapped[str] = mapped_column(String(1000), nullable=False, unique=True)  # Item.original_path
+
+    # A file whose stat still matches is not read again
+    size: Mapped[int] = mapped_column(Integer, nullable=False)
+    mtime_ns: Mapped[int] = mapped_column(Integer, nullable=False)
+    inode: Mapped[int] = mapped_column(Integer, nullable=False)
+    file_hash: Mapped[str] = mapped_column(String(64), nullable=False)
+
+    scanned_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+    def __repr__(self) -> str:
+        return f"<ScanEntry(path='{self.path}', hash='{self.file_hash[:8]}')>"
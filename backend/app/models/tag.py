@@ -2,7 +2,7 @@
 
 from typing import TYPE_CHECKING
 
-from sqlalchemy import String, Table, Column, Integer, ForeignKey
+from sqlalchemy import String, Table, Column, Integer, ForeignKey, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from ..database import Base
@@ -17,6 +17,8 @@ ItemTag = Table(
     Base.metadata,
     Column("item_id", Integer, ForeignKey("items.id"), primary_key=True),
     Column("tag_id", Integer, ForeignKey("tags.id"), primary_key=True),
+    # Items by tag (the primary key only covers tags by item)
+    Index("ix_item_tags_tag_id", "tag_id"),
 )
 
 
@@ -4,5 +4,7 @@ from .items import router as items_router
 from .categories import router as categories_router
 from .import_router import router as import_router
 from .search import router as search_router
+from .blobs import router as blobs_router
+from .jobs import router as jobs_router
 
-__all__ = ["items_router", "categories_router", "import_router", "search_router"]
+__all__ = ["items_router", "categories_router", "import_router", "search_router", "blobs_router", "jobs_router"]
@@ -0,0 +1,67 @@
+"""Blobs API router: content lookups by SHA-256."""
+
+import re
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..database import get_db
+from ..models import Item
+from ..schemas.item import BlobResponse, BlobExistsRequest, BlobExistsResponse
+
+_HASH_RE = re.compile(r"^[0-9a-f]{64}$")
+_HASH_CHUNK = 500  # hashes per IN (...) query
+
+router = APIRouter()
+
+
+def _normalize(sha256: str) -> str:
+    value = sha256.strip().lower()
+    if not _HASH_RE.match(value):
+        raise HTTPException(status_code=400, detail=f"Invalid SHA-256: {sha256!r}")
+    return value
+
+
+@router.api_route("/{sha256}", methods=["GET", "HEAD"], response_model=BlobResponse)
+async def get_blob(sha256: str, db: AsyncSession = Depends(get_db)):
+    """
+    Check whether the vault already holds content with this SHA-256.
+
+    Returns 404 if not; HEAD answers with the status code alone.
+    """
+    file_hash = _normalize(sha256)
+    result = await db.execute(
+        select(Item.id, Item.file_size)
+        .where(Item.file_hash == file_hash)
+        .order_by(Item.id)
+        .limit(1)
+    )
+    row = result.first()
+    if row is None:
+        raise HTTPException(status_code=404, detail="Blob not found")
+    return BlobResponse(sha256=file_hash, size=row.file_size, item_id=row.id)
+
+
+@router.post("/exists", response_model=BlobExistsResponse)
+async def blobs_exist(request: BlobExistsRequest, db: AsyncSession = Depends(get_db)):
+    """
+    Split a list of SHA-256 hashes into those already stored and those missing.
+
+    Clients hash files locally and upload only the missing ones.
+    """
+    hashes = list(dict.fromkeys(_normalize(value) for value in request.hashes))
+
+    existing = {}
+    for start in range(0, len(hashes), _HASH_CHUNK):
+        result = await db.execute(
+            select(Item.file_hash, func.min(Item.id))
+            .where(Item.file_hash.in_(hashes[start:start + _HASH_CHUNK]))
+            .group_by(Item.file_hash)
+        )
+        existing.update(result.tuples().all())
+
+    return BlobExistsResponse(
+        existing=existing,
+        missing=[value for value in hashes if value not in existing],
+    )
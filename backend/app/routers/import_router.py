@@ -3,18 +3,28 @@
 import os
 import urllib.parse
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Union
 
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
 
 from ..database import get_db
 from ..models import Item
-from ..schemas.item import ItemResponse, ItemImportRequest, ItemImportResponse, AssociatedItemBrief
-from ..services import StorageService, FileProcessor, WebScraper, Classifier
+from ..schemas.item import (
+    ItemResponse, ItemImportRequest, ItemImportResponse, UploadCreate, UploadStatusResponse,
+)
+from ..services import (
+    StorageService, FileProcessor, Classifier, FileTooLargeError, find_near_duplicates,
+    UploadConflictError, UploadError, UploadNotFoundError, UploadSession, upload_manager,
+    import_pipeline, import_url_item,
+    ScanManifest, extraction_pool, extraction_retries, extraction_retryable, queue_retries,
+)
 from ..config import get_settings
+from ..utils.archive import is_archive
+from ..utils.multipart import MultipartError, iter_form
+from .serializers import item_to_response, item_load_options
 
 
 def decode_filename(filename: str) -> str:
@@ -48,89 +58,83 @@ def decode_filename(filename: str) -> str:
     # Return as-is if no decoding needed
     return filename
 
-router = APIRouter()
-
-
-def _item_to_response(item: Item) -> ItemResponse:
-    """Convert Item model to response schema."""
-    # Get associated items (both directions)
-    associated = []
-    if hasattr(item, 'associated_items') and item.associated_items:
-        for assoc in item.associated_items:
-            associated.append(AssociatedItemBrief(
-                id=assoc.id,
-                title=assoc.title,
-                content_type=assoc.content_type,
-                thumbnail_path=assoc.thumbnail_path,
-            ))
-    # Note: associated_by requires separate loading which we skip for simplicity
-
-    return ItemResponse(
-        id=item.id,
-        title=item.title,
-        description=item.description,
-        category_id=item.category_id,
-        content_type=item.content_type,
-        file_path=item.file_path,
-        original_path=item.original_path,
-        url=item.url,
-        extracted_text=item.extracted_text,
-        file_hash=item.file_hash,
-        file_size=item.file_size,
-        mime_type=item.mime_type,
-        thumbnail_path=item.thumbnail_path,
-        confidence=item.confidence,
-        item_metadata=item.item_metadata,
-        is_favorite=item.is_favorite,
-        favorite_at=item.favorite_at,
-        created_at=item.created_at,
-        updated_at=item.updated_at,
-        category_name=item.category.name if item.category else None,
-        tags=[tag.name for tag in item.tags] if item.tags else [],
-        associated_items=associated,
-    )
 
+async def _possible_duplicate_of(db: AsyncSession, item_id: int) -> Optional[int]:
+    """ID of the earlier item whose text most nearly matches a new item's."""
+    if not get_settings().import_config.deduplicate:
+        return None
+    matches = await find_near_duplicates(db, item_id)
+    earlier = [match_id for match_id, _ in matches if match_id < item_id]
+    return earlier[0] if earlier else None
+
+
+# Items loaded per query when an import returns them in full
+_RELOAD_BATCH = 500
+
+# Room for the multipart boundaries and form fields around an upload
+_FORM_OVERHEAD = 64 * 1024
+
+_UPLOAD_FORM = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": ["file"],
+                    "properties": {
+                        "file": {"type": "string", "format": "binary"},
+                        "category_id": {"type": "integer"},
+                        "auto_classify": {"type": "boolean", "default": True},
+                        "original_path": {"type": "string"},
+                    },
+                },
+            },
+        },
+    },
+}
+
+
+def _form_bool(value: Optional[str], default: bool) -> bool:
+    if value is None or not value.strip():
+        return default
+    return value.strip().lower() in ("true", "1", "yes", "on")
+
+
+def _form_int(value: Optional[str]) -> Optional[int]:
+    if value is None or not value.strip():
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid integer: {value!r}")
+
+
+async def _create_file_item(
+    db: AsyncSession,
+    relative_path: str,
+    file_hash: str,
+    file_size: int,
+    original_filename: str,
+    original_path: Optional[str],
+    category_id: Optional[int],
+    auto_classify: bool,
+) -> ItemResponse:
+    """
+    Create the item for an uploaded file already in the content store.
 
-@router.post("/file", response_model=ItemResponse)
-async def import_file(
-    file: UploadFile = File(...),
-    category_id: Optional[int] = Form(None),
-    auto_classify: bool = Form(True),
-    db: AsyncSession = Depends(get_db),
-):
-    """Import a single file via upload."""
+    original_path is where the file was on the client, matched by the
+    rules' path patterns and kept as the item's original_path; the file
+    name stands in for it when the client did not send one.
+    """
+    original_path = original_path or original_filename
     settings = get_settings()
     storage = StorageService()
-    processor = FileProcessor()
     classifier = Classifier()
 
-    # Decode filename to handle URL-encoded or other encoded filenames
-    original_filename = decode_filename(file.filename)
-
-    # Read file content
-    content = await file.read()
-
-    # Check file size
-    if len(content) > settings.storage.max_file_size:
-        raise HTTPException(
-            status_code=400,
-            detail=f"File too large. Maximum size is {settings.storage.max_file_size} bytes"
-        )
-
-    # Check for duplicates
-    file_hash = storage.calculate_hash(content)
-    existing = await db.execute(
-        select(Item).where(Item.file_hash == file_hash)
-    )
-    if existing.scalar_one_or_none():
-        raise HTTPException(status_code=400, detail="File already exists in vault")
-
-    # Save file
-    relative_path, _ = await storage.save_file(content, original_filename, file_hash)
-
-    # Process file for metadata and text extraction
-    temp_path = settings.files_path / relative_path
-    file_data = await processor.process_file(temp_path)
+    # Process file for metadata and text extraction, away from the server process
+    stored_path = settings.files_path / relative_path
+    file_data = await extraction_pool.process_file(stored_path)
 
     # Auto-classify if enabled and no category provided
     confidence = None
@@ -138,7 +142,7 @@ async def import_file(
         text_for_classification = file_data.get('extracted_text', '') or original_filename
         category_id, confidence = await classifier.classify(
             text_for_classification,
-            file_path=Path(original_filename),
+            file_path=Path(original_path),
             session=db,
         )
 
@@ -153,10 +157,10 @@ async def import_file(
         title=original_filename,
         content_type="file",
         file_path=relative_path,
-        original_path=original_filename,
+        original_path=original_path,
         extracted_text=file_data.get('extracted_text'),
         file_hash=file_hash,
-        file_size=len(content),
+        file_size=file_size,
         mime_type=file_data.get('mime_type'),
         category_id=category_id,
         confidence=confidence,
@@ -164,7 +168,17 @@ async def import_file(
     )
 
     db.add(item)
-    await db.commit()
+    try:
+        await db.flush()
+        if extraction_retryable(file_data):
+            await queue_retries(db, [item.id])
+        await db.commit()
+    except IntegrityError:
+        # Another request stored the same content since the duplicate check
+        await db.rollback()
+        raise HTTPException(status_code=400, detail="File already exists in vault")
+    if extraction_retryable(file_data):
+        extraction_retries.wake()
     await db.refresh(item)
 
     # Save thumbnail with item ID
@@ -180,16 +194,229 @@ async def import_file(
     query = (
         select(Item)
         .where(Item.id == item.id)
-        .options(
-            selectinload(Item.category),
-            selectinload(Item.tags),
-            selectinload(Item.associated_items),
-        )
+        .options(*item_load_options())
     )
     result = await db.execute(query)
     item = result.scalar_one()
 
-    return _item_to_response(item)
+    response = item_to_response(item)
+    response.possible_duplicate_of = await _possible_duplicate_of(db, item.id)
+    return response
+
+
+async def _import_archive(
+    db: AsyncSession,
+    path: Path,
+    archive_path: str,
+    category_id: Optional[int],
+    auto_classify: bool,
+) -> ItemImportResponse:
+    """
+    Import the members of an uploaded archive, read from its temporary file;
+    archive_path (the client's path, or else the file name) prefixes the
+    members' original_path.
+    """
+    outcome = await import_pipeline.run(
+        db,
+        [path],
+        category_id=category_id,
+        auto_classify=auto_classify,
+        archive_name=archive_path,
+    )
+    return ItemImportResponse(
+        success=len(outcome.errors) == 0,
+        items_imported=len(outcome.item_ids),
+        items_skipped=outcome.skipped,
+        errors=outcome.errors,
+        item_ids=outcome.item_ids,
+    )
+
+
+router = APIRouter()
+
+
+@router.post("/file", response_model=Union[ItemResponse, ItemImportResponse], openapi_extra=_UPLOAD_FORM)
+async def import_file(
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Import a single file via upload.
+
+    The multipart body is parsed as it arrives and the file streamed to
+    disk while it is hashed, so uploads are never held in memory. An
+    archive (.zip, .tar.gz, ...) is imported like a directory, one item
+    per supported member, and answered with an import summary. The
+    optional original_path field tells where the file was on the client.
+    A request with more than one file part is rejected.
+    """
+    settings = get_settings()
+    storage = StorageService()
+    max_size = settings.storage.max_file_size
+
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > max_size + _FORM_OVERHEAD:
+        raise HTTPException(status_code=400, detail=f"File too large. Maximum size is {max_size} bytes")
+
+    async with storage.open_writer(max_size) as writer:
+        fields = {}
+        original_filename = None
+        try:
+            async for kind, name, value in iter_form(request):
+                if kind == "field":
+                    fields[name] = value
+                elif kind == "file" and name == "file":
+                    if original_filename is not None:
+                        # Its data would be appended to the first file's
+                        raise HTTPException(status_code=400, detail="Only one file can be uploaded per request")
+                    # Decode filename to handle URL-encoded or other encoded filenames
+                    original_filename = decode_filename(value) or "upload"
+                elif kind == "data" and name == "file":
+                    await writer.write(value)
+        except (FileTooLargeError, MultipartError) as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        if original_filename is None:
+            raise HTTPException(status_code=400, detail="No file uploaded")
+        category_id = _form_int(fields.get("category_id"))
+        auto_classify = _form_bool(fields.get("auto_classify"), True)
+        original_path = fields.get("original_path") or None
+
+        if is_archive(original_filename):
+            path = await writer.close()
+            return await _import_archive(db, path, original_path or original_filename, category_id, auto_classify)
+
+        # Check for duplicates
+        file_hash = writer.file_hash
+        existing = await db.execute(
+            select(Item).where(Item.file_hash == file_hash)
+        )
+        if existing.scalar_one_or_none():
+            raise HTTPException(status_code=400, detail="File already exists in vault")
+
+        # Move the file into place under its hash
+        relative_path = await writer.commit(Path(original_filename).suffix)
+        file_size = writer.size
+
+    return await _create_file_item(
+        db, relative_path, file_hash, file_size, original_filename, original_path, category_id, auto_classify,
+    )
+
+
+def _upload_status(session: UploadSession) -> UploadStatusResponse:
+    return UploadStatusResponse(
+        upload_id=session.id,
+        filename=session.filename,
+        size=session.size,
+        chunk_size=session.chunk_size,
+        total_chunks=session.total_chunks,
+        received_bytes=session.received_bytes,
+        received=session.received_ranges,
+        missing=session.missing,
+    )
+
+
+def _upload_error(e: UploadError) -> HTTPException:
+    if isinstance(e, UploadNotFoundError):
+        return HTTPException(status_code=404, detail=str(e))
+    if isinstance(e, UploadConflictError):
+        return HTTPException(status_code=409, detail=str(e))
+    return HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/uploads", response_model=UploadStatusResponse)
+async def create_upload(request: UploadCreate):
+    """
+    Start a resumable upload.
+
+    Upload each chunk listed in `missing` with PUT /uploads/{id}/chunks/{index}
+    (in any order, concurrently if you like), then POST /uploads/{id}/complete.
+    After a dropped connection, GET /uploads/{id} tells which chunks to resend.
+    """
+    try:
+        session = await upload_manager.create(
+            filename=decode_filename(request.filename) or "upload",
+            size=request.size,
+            chunk_size=request.chunk_size,
+            category_id=request.category_id,
+            auto_classify=request.auto_classify,
+            original_path=request.original_path,
+        )
+    except UploadError as e:
+        raise _upload_error(e)
+    return _upload_status(session)
+
+
+@router.get("/uploads/{upload_id}", response_model=UploadStatusResponse)
+async def get_upload(upload_id: str):
+    """Get the received ranges and missing chunks of an upload."""
+    try:
+        return _upload_status(await upload_manager.get(upload_id))
+    except UploadError as e:
+        raise _upload_error(e)
+
+
+@router.put("/uploads/{upload_id}/chunks/{index}", response_model=UploadStatusResponse)
+async def upload_chunk(upload_id: str, index: int, request: Request):
+    """Upload one chunk as the raw request body; resending a chunk replaces it."""
+    try:
+        session = await upload_manager.write_chunk(upload_id, index, request.stream())
+    except UploadError as e:
+        raise _upload_error(e)
+    return _upload_status(session)
+
+
+@router.post("/uploads/{upload_id}/complete", response_model=Union[ItemResponse, ItemImportResponse])
+async def complete_upload(upload_id: str, db: AsyncSession = Depends(get_db)):
+    """
+    Finish an upload once all chunks are received and import the file (or
+    archive, as POST /file does).
+
+    A second call while one is finishing the upload gets 409, and a call
+    after it has finished gets 404.
+    """
+    try:
+        session = await upload_manager.get(upload_id)
+        file_hash, file_size = await upload_manager.finish(upload_id)
+    except UploadError as e:
+        raise _upload_error(e)
+
+    try:
+        if is_archive(session.filename):
+            try:
+                return await _import_archive(
+                    db, upload_manager.data_path(upload_id), session.original_path or session.filename,
+                    session.category_id, session.auto_classify,
+                )
+            finally:
+                await upload_manager.abort(upload_id)
+
+        # Check for duplicates
+        existing = await db.execute(
+            select(Item).where(Item.file_hash == file_hash)
+        )
+        if existing.scalar_one_or_none():
+            await upload_manager.abort(upload_id)
+            raise HTTPException(status_code=400, detail="File already exists in vault")
+
+        relative_path = await upload_manager.store(upload_id, file_hash)
+    finally:
+        # After an error before store() or abort(), the upload can be completed again
+        upload_manager.release(upload_id)
+    return await _create_file_item(
+        db, relative_path, file_hash, file_size, session.filename, session.original_path,
+        session.category_id, session.auto_classify,
+    )
+
+
+@router.delete("/uploads/{upload_id}")
+async def cancel_upload(upload_id: str):
+    """Cancel an upload and delete the received data."""
+    try:
+        await upload_manager.abort(upload_id)
+    except UploadError as e:
+        raise _upload_error(e)
+    return {"message": "Upload cancelled"}
 
 
 @router.post("/url", response_model=ItemResponse)
@@ -208,66 +435,23 @@ async def import_url(
         except ValueError:
             raise HTTPException(status_code=400, detail="category_id must be a valid integer")
 
-    scraper = WebScraper()
-    classifier = Classifier()
-
     try:
-        # Scrape URL
-        page_data = await scraper.scrape_url(url)
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Failed to fetch URL: {str(e)}")
-    finally:
-        await scraper.close()
-
-    # Check for duplicates
-    existing = await db.execute(
-        select(Item).where(Item.url == page_data['url'])
-    )
-    if existing.scalar_one_or_none():
-        raise HTTPException(status_code=400, detail="URL already exists in vault")
-
-    # Auto-classify if enabled
-    confidence = None
-    if auto_classify and not category_id_int:
-        text_for_classification = (
-            f"{page_data['title']} {page_data.get('description', '')} "
-            f"{page_data.get('extracted_text', '')[:2000]}"
-        )
-        category_id_int, confidence = await classifier.classify(
-            text_for_classification,
-            session=db,
-        )
-
-    # Create item
-    item = Item(
-        title=page_data['title'],
-        content_type="url",
-        url=page_data['url'],
-        description=page_data.get('description'),
-        extracted_text=page_data.get('extracted_text'),
-        category_id=category_id_int,
-        confidence=confidence,
-        item_metadata=page_data.get('metadata'),
-    )
-
-    db.add(item)
-    await db.commit()
-    await db.refresh(item)
+        item = await import_url_item(db, url, category_id_int, auto_classify)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
     # Reload with relationships
     query = (
         select(Item)
         .where(Item.id == item.id)
-        .options(
-            selectinload(Item.category),
-            selectinload(Item.tags),
-            selectinload(Item.associated_items),
-        )
+        .options(*item_load_options())
     )
     result = await db.execute(query)
     item = result.scalar_one()
 
-    return _item_to_response(item)
+    response = item_to_response(item)
+    response.possible_duplicate_of = await _possible_duplicate_of(db, item.id)
+    return response
 
 
 @router.post("/path", response_model=ItemImportResponse)
@@ -275,7 +459,13 @@ async def import_from_path(
     request: ItemImportRequest,
     db: AsyncSession = Depends(get_db),
 ):
-    """Import files from a local path (file or directory)."""
+    """
+    Import files from a local path (file or directory).
+
+    Files unchanged since the last scan of the path are skipped after a
+    stat(); with sync, items whose files were moved or deleted under the
+    path follow the move or are deleted.
+    """
     if not request.path:
         raise HTTPException(status_code=400, detail="Path is required")
 
@@ -284,115 +474,65 @@ async def import_from_path(
     if not source_path.exists():
         raise HTTPException(status_code=400, detail=f"Path not found: {source_path}")
 
-    storage = StorageService()
-    processor = FileProcessor()
-    classifier = Classifier()
-    settings = get_settings()
+    # Files to import, listed lazily by the pipeline
+    files_to_import = FileProcessor.find_files(source_path)
+
+    # Only files that changed since the last scan are read
+    manifest = await ScanManifest.load(db, source_path)
+    unchanged = 0
+
+    def changed_files():
+        nonlocal unchanged
+        for path in files_to_import:
+            if manifest.check(path):
+                yield path
+            else:
+                unchanged += 1
+        manifest.complete = True
+
+    outcome = await import_pipeline.run(
+        db,
+        changed_files(),
+        category_id=request.category_id,
+        auto_classify=request.auto_classify,
+        manifest=manifest,
+    )
+    imported_ids = outcome.item_ids
+    skipped = outcome.skipped
+    errors = outcome.errors
 
-    imported_items = []
-    skipped = 0
-    errors = []
-
-    # Get list of files to import
-    if source_path.is_file():
-        files_to_import = [source_path]
-    else:
-        # Recursively get all files
-        files_to_import = [
-            f for f in source_path.rglob("*")
-            if f.is_file() and processor.is_supported_file(f)
-        ]
-
-    for file_path in files_to_import:
+    moved = deleted = 0
+    if request.sync:
         try:
-            # Check file size
-            if file_path.stat().st_size > settings.storage.max_file_size:
-                errors.append(f"File too large: {file_path.name}")
-                skipped += 1
-                continue
-
-            # Save file and get hash
-            relative_path, file_hash, file_size = await storage.save_file_from_path(file_path)
-
-            # Check for duplicates
-            existing = await db.execute(
-                select(Item).where(Item.file_hash == file_hash)
-            )
-            if existing.scalar_one_or_none():
-                skipped += 1
-                continue
-
-            # Process file
-            stored_path = settings.files_path / relative_path
-            file_data = await processor.process_file(stored_path)
-
-            # Classify
-            category_id = request.category_id
-            confidence = None
-
-            if request.auto_classify and not category_id:
-                text_for_classification = file_data.get('extracted_text', '') or file_path.name
-                category_id, confidence = await classifier.classify(
-                    text_for_classification,
-                    file_path=file_path,
-                    session=db,
-                )
-
-            # Create item
-            item = Item(
-                title=file_data['title'],
-                content_type="file",
-                file_path=relative_path,
-                original_path=str(file_path),
-                extracted_text=file_data.get('extracted_text'),
-                file_hash=file_hash,
-                file_size=file_size,
-                mime_type=file_data.get('mime_type'),
-                category_id=category_id,
-                confidence=confidence,
-                item_metadata=file_data.get('metadata'),
-            )
-
-            db.add(item)
-            await db.flush()  # Get item ID
-
-            # Save thumbnail
-            if file_data.get('thumbnail_data'):
-                thumbnail_path = await storage.save_thumbnail(
-                    file_data['thumbnail_data'],
-                    item.id,
-                )
-                item.thumbnail_path = thumbnail_path
+            moved, deleted = await manifest.sync(db)
+        except ValueError as e:
+            errors.append(str(e))
 
-            imported_items.append(item)
-
-        except Exception as e:
-            errors.append(f"Error importing {file_path.name}: {str(e)}")
-            skipped += 1
-
-    await db.commit()
-
-    # Reload items with relationships
+    # Full items only on request; a large import answers with the IDs
     item_responses = []
-    for item in imported_items:
-        query = (
-            select(Item)
-            .where(Item.id == item.id)
-            .options(
-                selectinload(Item.category),
-                selectinload(Item.tags),
-                selectinload(Item.associated_items),
+    if request.include_items:
+        for start in range(0, len(imported_ids), _RELOAD_BATCH):
+            query = (
+                select(Item)
+                .where(Item.id.in_(imported_ids[start:start + _RELOAD_BATCH]))
+                .order_by(Item.id)
+                .options(*item_load_options())
             )
-        )
-        result = await db.execute(query)
-        loaded_item = result.scalar_one()
-        item_responses.append(_item_to_response(loaded_item))
+            result = await db.execute(query)
+            for loaded_item in result.scalars().all():
+                response = item_to_response(loaded_item)
+                response.possible_duplicate_of = await _possible_duplicate_of(db, loaded_item.id)
+                item_responses.append(response)
 
     return ItemImportResponse(
         success=len(errors) == 0,
-        items_imported=len(imported_items),
+        items_imported=len(imported_ids),
         items_skipped=skipped,
+        items_unchanged=unchanged,
+        items_moved=moved,
+        items_deleted=deleted,
         errors=errors,
+        item_ids=imported_ids,
         items=item_responses,
     )
 
@@ -403,11 +543,7 @@ async def reclassify_item(item_id: int, db: AsyncSession = Depends(get_db)):
     query = (
         select(Item)
         .where(Item.id == item_id)
-        .options(
-            selectinload(Item.category),
-            selectinload(Item.tags),
-            selectinload(Item.associated_items),
-        )
+        .options(*item_load_options())
     )
     result = await db.execute(query)
     item = result.scalar_one_or_none()
@@ -451,13 +587,9 @@ async def reclassify_item(item_id: int, db: AsyncSession = Depends(get_db)):
     query = (
         select(Item)
         .where(Item.id == item.id)
-        .options(
-            selectinload(Item.category),
-            selectinload(Item.tags),
-            selectinload(Item.associated_items),
-        )
+        .options(*item_load_options())
     )
     result = await db.execute(query)
     item = result.scalar_one()
 
-    return _item_to_response(item)
+    return item_to_response(item)
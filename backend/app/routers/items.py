@@ -12,55 +12,20 @@ from sqlalchemy.orm import selectinload
 from ..database import get_db
 from ..models import Item, Category, Tag
 from ..schemas.item import (
-    ItemCreate, ItemUpdate, ItemResponse, ItemListResponse,
-    AssociatedItemBrief, ItemAssociationRequest
+    ItemCreate, ItemUpdate, ItemResponse, ItemListResponse, ItemView,
+    AssociatedItemBrief, ItemAssociationRequest, ScoredItemResponse,
+    DuplicateGroup, DuplicateReportResponse,
 )
 from ..config import get_settings
+from ..services.neighbors import neighbor_index
+from ..services.duplicates import find_duplicate_groups
+from ..services.extraction import extract_item
+from ..utils.pagination import encode_cursor, decode_cursor, keyset_condition
+from .serializers import item_to_response, item_load_options
 
 router = APIRouter()
 
 
-def _item_to_response(item: Item) -> ItemResponse:
-    """Convert Item model to response schema."""
-    # Get associated items (both directions)
-    associated = []
-    if hasattr(item, 'associated_items') and item.associated_items:
-        for assoc in item.associated_items:
-            associated.append(AssociatedItemBrief(
-                id=assoc.id,
-                title=assoc.title,
-                content_type=assoc.content_type,
-                thumbnail_path=assoc.thumbnail_path,
-            ))
-    # Note: associated_by requires separate loading which we skip for simplicity
-    # The bidirectional associations are handled through associated_items
-
-    return ItemResponse(
-        id=item.id,
-        title=item.title,
-        description=item.description,
-        category_id=item.category_id,
-        content_type=item.content_type,
-        file_path=item.file_path,
-        original_path=item.original_path,
-        url=item.url,
-        extracted_text=item.extracted_text,
-        file_hash=item.file_hash,
-        file_size=item.file_size,
-        mime_type=item.mime_type,
-        thumbnail_path=item.thumbnail_path,
-        confidence=item.confidence,
-        item_metadata=item.item_metadata,
-        is_favorite=item.is_favorite,
-        favorite_at=item.favorite_at,
-        created_at=item.created_at,
-        updated_at=item.updated_at,
-        category_name=item.category.name if item.category else None,
-        tags=[tag.name for tag in item.tags] if item.tags else [],
-        associated_items=associated,
-    )
-
-
 @router.get("/", response_model=ItemListResponse)
 async def list_items(
     page: int = Query(1, ge=1),
@@ -68,50 +33,105 @@ async def list_items(
     category_id: Optional[int] = None,
     content_type: Optional[str] = None,
     favorites_only: bool = False,
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    include_total: bool = Query(True, description="Count matching items (skipped for cursor pages)"),
+    view: ItemView = Query("card", description="Response projection: card, summary or full"),
     db: AsyncSession = Depends(get_db),
 ):
-    """List all items with pagination and filtering."""
-    query = select(Item).options(
-        selectinload(Item.category),
-        selectinload(Item.tags),
-        selectinload(Item.associated_items),
-    )
+    """
+    List all items with pagination and filtering.
 
-    # Apply filters
-    if category_id:
-        query = query.where(Item.category_id == category_id)
-    if content_type:
-        query = query.where(Item.content_type == content_type)
-    if favorites_only:
-        query = query.where(Item.is_favorite == True)
+    Pages are addressed either by number or by the opaque next_cursor of the
+    previous response. Cursor pages seek on the (created_at, id) or
+    (favorite_at, id) index, so they cost the same at any depth, and skip
+    the COUNT query. The default "card" view leaves out extracted_text and
+    item_metadata; full text comes from GET /api/items/{id}.
+    """
+    query = select(Item).options(*item_load_options(view))
 
-    # Count total
-    count_query = select(func.count(Item.id))
+    # Apply filters
+    filters = []
     if category_id:
-        count_query = count_query.where(Item.category_id == category_id)
+        filters.append(Item.category_id == category_id)
     if content_type:
-        count_query = count_query.where(Item.content_type == content_type)
+        filters.append(Item.content_type == content_type)
     if favorites_only:
-        count_query = count_query.where(Item.is_favorite == True)
-
-    total = await db.scalar(count_query)
-
-    # Apply pagination - favorites sorted by favorite_at, others by created_at
-    offset = (page - 1) * page_size
-    if favorites_only:
-        query = query.order_by(Item.favorite_at.desc()).offset(offset).limit(page_size)
+        filters.append(Item.is_favorite == True)
+    query = query.where(*filters)
+
+    # Count total (first page only when paging by cursor)
+    total = None
+    if include_total and not cursor:
+        total = await db.scalar(select(func.count(Item.id)).where(*filters)) or 0
+
+    # Favorites sorted by favorite_at, others by created_at; id breaks ties
+    sort_column = Item.favorite_at if favorites_only else Item.created_at
+
+    if cursor:
+        try:
+            last_value, last_id = decode_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        query = query.where(keyset_condition(sort_column, Item.id, last_value, last_id))
     else:
-        query = query.order_by(Item.created_at.desc()).offset(offset).limit(page_size)
+        query = query.offset((page - 1) * page_size)
+
+    query = query.order_by(sort_column.desc(), Item.id.desc()).limit(page_size)
 
     result = await db.execute(query)
     items = result.scalars().all()
 
+    next_cursor = None
+    if len(items) == page_size:
+        last = items[-1]
+        next_cursor = encode_cursor(getattr(last, sort_column.key), last.id)
+
     return ItemListResponse(
-        items=[_item_to_response(item) for item in items],
-        total=total or 0,
+        items=[item_to_response(item, view) for item in items],
+        total=total,
         page=page,
         page_size=page_size,
-        total_pages=(total + page_size - 1) // page_size if total else 0,
+        total_pages=(total + page_size - 1) // page_size if total is not None else None,
+        next_cursor=next_cursor,
+    )
+
+
+@router.get("/duplicates", response_model=DuplicateReportResponse)
+async def list_duplicates(
+    threshold: Optional[float] = Query(
+        None, ge=0.0, le=1.0, description="Minimum text overlap (default: import.near_duplicate_threshold)",
+    ),
+    limit: int = Query(50, ge=1, le=500, description="Maximum number of groups"),
+    view: ItemView = Query("card", description="Response projection: card, summary or full"),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Report groups of items whose extracted texts are near-duplicates.
+
+    Uses the MinHash LSH index, so only items sharing a signature bucket
+    are compared instead of every pair in the vault.
+    """
+    if threshold is None:
+        threshold = get_settings().import_config.near_duplicate_threshold
+
+    groups = (await find_duplicate_groups(db, threshold))[:limit]
+    item_ids = [item_id for _, members in groups for item_id in members]
+    items = {}
+    if item_ids:
+        result = await db.execute(
+            select(Item).where(Item.id.in_(item_ids)).options(*item_load_options(view))
+        )
+        items = {item.id: item for item in result.scalars().all()}
+
+    return DuplicateReportResponse(
+        groups=[
+            DuplicateGroup(
+                similarity=similarity,
+                items=[item_to_response(items[item_id], view) for item_id in members if item_id in items],
+            )
+            for similarity, members in groups
+        ],
+        threshold=threshold,
     )
 
 
@@ -121,11 +141,7 @@ async def get_item(item_id: int, db: AsyncSession = Depends(get_db)):
     query = (
         select(Item)
         .where(Item.id == item_id)
-        .options(
-            selectinload(Item.category),
-            selectinload(Item.tags),
-            selectinload(Item.associated_items),
-        )
+        .options(*item_load_options())
     )
     result = await db.execute(query)
     item = result.scalar_one_or_none()
@@ -133,7 +149,7 @@ async def get_item(item_id: int, db: AsyncSession = Depends(get_db)):
     if not item:
         raise HTTPException(status_code=404, detail="Item not found")
 
-    return _item_to_response(item)
+    return item_to_response(item)
 
 
 @router.post("/", response_model=ItemResponse)
@@ -157,12 +173,12 @@ async def create_item(item_data: ItemCreate, db: AsyncSession = Depends(get_db))
     query = (
         select(Item)
         .where(Item.id == item.id)
-        .options(selectinload(Item.category), selectinload(Item.tags))
+        .options(*item_load_options())
     )
     result = await db.execute(query)
     item = result.scalar_one()
 
-    return _item_to_response(item)
+    return item_to_response(item)
 
 
 @router.put("/{item_id}", response_model=ItemResponse)
@@ -175,11 +191,7 @@ async def update_item(
     query = (
         select(Item)
         .where(Item.id == item_id)
-        .options(
-            selectinload(Item.category),
-            selectinload(Item.tags),
-            selectinload(Item.associated_items),
-        )
+        .options(*item_load_options())
     )
     result = await db.execute(query)
     item = result.scalar_one_or_none()
@@ -203,7 +215,7 @@ async def update_item(
     await db.commit()
     await db.refresh(item)
 
-    return _item_to_response(item)
+    return item_to_response(item)
 
 
 @router.delete("/{item_id}")
@@ -474,11 +486,7 @@ async def toggle_favorite(
     query = (
         select(Item)
         .where(Item.id == item_id)
-        .options(
-            selectinload(Item.category),
-            selectinload(Item.tags),
-            selectinload(Item.associated_items),
-        )
+        .options(*item_load_options())
     )
     result = await db.execute(query)
     item = result.scalar_one_or_none()
@@ -496,7 +504,32 @@ async def toggle_favorite(
     await db.commit()
     await db.refresh(item)
 
-    return _item_to_response(item)
+    return item_to_response(item)
+
+
+@router.post("/{item_id}/extract", response_model=ItemResponse)
+async def extract_item_text(
+    item_id: int,
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Extract a file item's text and thumbnail again, now.
+
+    item_metadata.extraction tells whether it failed, timed out or
+    crashed; a timeout or crash is queued for automatic retries again.
+    """
+    item = await db.get(Item, item_id)
+    if not item:
+        raise HTTPException(status_code=404, detail="Item not found")
+    if not item.file_path:
+        raise HTTPException(status_code=400, detail="Item has no stored file")
+
+    await extract_item(db, item)
+
+    result = await db.execute(
+        select(Item).where(Item.id == item_id).options(*item_load_options()).execution_options(populate_existing=True)
+    )
+    return item_to_response(result.scalar_one())
 
 
 # ============ Association Endpoints ============
@@ -515,11 +548,7 @@ async def add_association(
     query = (
         select(Item)
         .where(Item.id == item_id)
-        .options(
-            selectinload(Item.category),
-            selectinload(Item.tags),
-            selectinload(Item.associated_items),
-        )
+        .options(*item_load_options())
     )
     result = await db.execute(query)
     item = result.scalar_one_or_none()
@@ -544,7 +573,7 @@ async def add_association(
     await db.commit()
     await db.refresh(item)
 
-    return _item_to_response(item)
+    return item_to_response(item)
 
 
 @router.delete("/{item_id}/associations/{associated_item_id}", response_model=ItemResponse)
@@ -558,11 +587,7 @@ async def remove_association(
     query = (
         select(Item)
         .where(Item.id == item_id)
-        .options(
-            selectinload(Item.category),
-            selectinload(Item.tags),
-            selectinload(Item.associated_items),
-        )
+        .options(*item_load_options())
     )
     result = await db.execute(query)
     item = result.scalar_one_or_none()
@@ -576,7 +601,7 @@ async def remove_association(
             item.associated_items.remove(assoc)
             await db.commit()
             await db.refresh(item)
-            return _item_to_response(item)
+            return item_to_response(item)
 
     # Also check reverse direction
     reverse_query = (
@@ -593,7 +618,7 @@ async def remove_association(
                 reverse_item.associated_items.remove(assoc)
                 await db.commit()
                 await db.refresh(item)
-                return _item_to_response(item)
+                return item_to_response(item)
 
     raise HTTPException(status_code=404, detail="Association not found")
 
@@ -644,3 +669,38 @@ async def get_associations(
             ))
 
     return associated
+
+
+@router.get("/{item_id}/similar", response_model=list[ScoredItemResponse])
+async def get_similar_items(
+    item_id: int,
+    limit: int = Query(10, ge=1, le=100),
+    view: ItemView = Query("card", description="Response projection: card, summary or full"),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Get the items most similar in content to an item ("more like this").
+
+    Read from the precomputed neighbour index, so the cost depends only on
+    limit. Lists of newly imported or edited items are filled in by the
+    background worker shortly after the change.
+    """
+    if not await db.scalar(select(Item.id).where(Item.id == item_id)):
+        raise HTTPException(status_code=404, detail="Item not found")
+
+    neighbors = neighbor_index.neighbors(item_id, limit)
+    if not neighbors:
+        return []
+
+    result = await db.execute(
+        select(Item)
+        .where(Item.id.in_([neighbor_id for neighbor_id, _ in neighbors]))
+        .options(*item_load_options(view))
+    )
+    items = {item.id: item for item in result.scalars().all()}
+
+    return [
+        ScoredItemResponse(**item_to_response(items[neighbor_id], view).model_dump(), score=score)
+        for neighbor_id, score in neighbors
+        if neighbor_id in items
+    ]
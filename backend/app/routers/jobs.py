@@ -0,0 +1,159 @@
+"""Jobs API router for background imports."""
+
+import asyncio
+from pathlib import Path
+from typing import Optional
+from urllib.parse import urlparse
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..database import get_db, async_session_maker
+from ..models import Job, JobFile
+from ..schemas.job import JobCreate, JobResponse, JobFileResponse
+from ..services.jobs import TERMINAL_STATUSES, job_manager
+from ..utils.bookmarks import parse_urls
+
+KEEPALIVE_SECONDS = 15
+
+router = APIRouter()
+
+
+async def _get_job(db: AsyncSession, job_id: int) -> Job:
+    job = await db.get(Job, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@router.post("/", response_model=JobResponse)
+async def create_job(request: JobCreate, db: AsyncSession = Depends(get_db)):
+    """
+    Start a path, URL or bulk URL import in the background.
+
+    A bulk import takes urls, or url_list: a file of URLs (one per line)
+    or a browser bookmarks export (HTML or JSON), parsed here.
+
+    Follow it with GET /api/jobs/{id} or the GET /api/jobs/{id}/events stream.
+    """
+    params = {"category_id": request.category_id, "auto_classify": request.auto_classify}
+    if request.job_type == "path":
+        if not request.path:
+            raise HTTPException(status_code=400, detail="Path is required")
+        source_path = Path(request.path).expanduser().resolve()
+        if not source_path.exists():
+            raise HTTPException(status_code=400, detail=f"Path not found: {source_path}")
+        params["path"] = str(source_path)
+        params["sync"] = request.sync
+    elif request.job_type == "urls":
+        urls = list(dict.fromkeys(url.strip() for url in request.urls if url.strip()))
+        for url in urls:
+            if urlparse(url).scheme not in ("http", "https"):
+                raise HTTPException(status_code=400, detail=f"Not a web URL: {url}")
+        if request.url_list:
+            # Other links in a bookmarks export (javascript:, place:, ...) are left out
+            urls = list(dict.fromkeys(urls + parse_urls(request.url_list)))
+            if not urls:
+                raise HTTPException(status_code=400, detail="No web URLs found")
+        if not urls:
+            raise HTTPException(status_code=400, detail="URLs are required")
+        params["urls"] = urls
+    else:
+        if not request.url:
+            raise HTTPException(status_code=400, detail="URL is required")
+        params["url"] = request.url
+
+    job = await job_manager.create(db, request.job_type, params)
+    return await job_manager.describe(db, job)
+
+
+@router.get("/", response_model=list[JobResponse])
+async def list_jobs(
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_db),
+):
+    """List the most recent jobs."""
+    result = await db.execute(select(Job).order_by(Job.id.desc()).limit(limit))
+    return [await job_manager.describe(db, job, with_errors=False) for job in result.scalars().all()]
+
+
+@router.get("/{job_id}", response_model=JobResponse)
+async def get_job(job_id: int, db: AsyncSession = Depends(get_db)):
+    """Get a job's status, progress and most recent errors."""
+    return await job_manager.describe(db, await _get_job(db, job_id))
+
+
+@router.get("/{job_id}/files", response_model=list[JobFileResponse])
+async def list_job_files(
+    job_id: int,
+    status: Optional[str] = Query(None, description="imported, skipped or failed"),
+    offset: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    db: AsyncSession = Depends(get_db),
+):
+    """List the per-file outcomes of a job, in the order they finished."""
+    await _get_job(db, job_id)
+    query = select(JobFile).where(JobFile.job_id == job_id)
+    if status:
+        query = query.where(JobFile.status == status)
+    result = await db.execute(query.order_by(JobFile.id).offset(offset).limit(limit))
+    return result.scalars().all()
+
+
+@router.get("/{job_id}/events")
+async def job_events(job_id: int, request: Request):
+    """
+    Server-sent events with the job's status until it finishes.
+
+    Each `progress` event carries the same JSON as GET /api/jobs/{id}.
+    """
+    # Subscribe first so that no change after the initial snapshot is missed
+    queue = job_manager.subscribe(job_id)
+    try:
+        async with async_session_maker() as db:
+            current = await job_manager.describe(db, await _get_job(db, job_id))
+    except HTTPException:
+        job_manager.unsubscribe(job_id, queue)
+        raise
+
+    async def stream():
+        try:
+            snapshot = current
+            yield f"event: progress\ndata: {snapshot.model_dump_json()}\n\n"
+            while snapshot.status not in TERMINAL_STATUSES:
+                try:
+                    snapshot = await asyncio.wait_for(queue.get(), KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"event: progress\ndata: {snapshot.model_dump_json()}\n\n"
+        finally:
+            job_manager.unsubscribe(job_id, queue)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/{job_id}/cancel", response_model=JobResponse)
+async def cancel_job(job_id: int, db: AsyncSession = Depends(get_db)):
+    """Cancel a job; items imported so far are kept."""
+    job = await job_manager.cancel(db, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return await job_manager.describe(db, job)
+
+
+@router.post("/{job_id}/resume", response_model=JobResponse)
+async def resume_job(job_id: int, db: AsyncSession = Depends(get_db)):
+    """Resume a failed or cancelled job, skipping files it already finished."""
+    job = await job_manager.resume(db, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return await job_manager.describe(db, job)
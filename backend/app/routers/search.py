@@ -1,132 +1,502 @@
 """Search API router."""
 
-from typing import Optional
+from typing import Optional, get_args
 
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy import select, func, text, or_
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import select, func, literal, literal_column, null, and_, not_, or_, text, union_all, String
+from sqlalchemy.sql import Select
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
 
-from ..database import get_db
-from ..models import Item, Category
-from ..schemas.item import ItemResponse, ItemListResponse, AssociatedItemBrief
+from ..config import get_settings
+from ..database import get_db, engine
+from ..models import Item, Category, Tag, ItemTag
+from ..schemas.item import (
+    ItemListResponse, ItemView, SearchFacet, FacetCount,
+    ScoredItemResponse, SemanticSearchResponse, SearchHighlights, TextFragment,
+)
+from ..services.result_cache import item_cache
+from ..services.suggest import suggestion_index
+from ..services.vector_index import vector_index
+from ..utils.fts import (
+    MATCH_END, MATCH_START, items_fts, build_match_query, parse_fragment, rebuild_fts_index,
+)
+from ..utils.search_query import (
+    FieldFilter, QuerySyntaxError, SearchQuery, Term, build_match_expression, like_patterns,
+    parse_date, parse_query,
+)
+from ..utils.pagination import (
+    encode_cursor, decode_cursor, encode_offset_cursor, decode_offset_cursor, keyset_condition,
+)
+from .serializers import item_to_response, item_load_options
 
 router = APIRouter()
 
+# Columns of matching items that facets are computed from
+_FACET_SOURCE_COLUMNS = (Item.id, Item.category_id, Item.content_type, Item.created_at)
 
-def _item_to_response(item: Item) -> ItemResponse:
-    """Convert Item model to response schema."""
-    # Get associated items (both directions)
-    associated = []
-    if hasattr(item, 'associated_items') and item.associated_items:
-        for assoc in item.associated_items:
-            associated.append(AssociatedItemBrief(
-                id=assoc.id,
-                title=assoc.title,
-                content_type=assoc.content_type,
-                thumbnail_path=assoc.thumbnail_path,
-            ))
-    # Note: associated_by requires separate loading which we skip for simplicity
-
-    return ItemResponse(
-        id=item.id,
-        title=item.title,
-        description=item.description,
-        category_id=item.category_id,
-        content_type=item.content_type,
-        file_path=item.file_path,
-        original_path=item.original_path,
-        url=item.url,
-        extracted_text=item.extracted_text,
-        file_hash=item.file_hash,
-        file_size=item.file_size,
-        mime_type=item.mime_type,
-        thumbnail_path=item.thumbnail_path,
-        confidence=item.confidence,
-        item_metadata=item.item_metadata,
-        is_favorite=item.is_favorite,
-        favorite_at=item.favorite_at,
-        created_at=item.created_at,
-        updated_at=item.updated_at,
-        category_name=item.category.name if item.category else None,
-        tags=[tag.name for tag in item.tags] if item.tags else [],
-        associated_items=associated,
+# Candidates taken from each ranking before hybrid fusion
+HYBRID_CANDIDATES = 200
+
+# Tokens per search result snippet (FTS5 allows at most 64)
+SNIPPET_TOKENS = 32
+
+
+def _bm25_rank():
+    """bm25() of the current items_fts match with the configured column weights."""
+    search_settings = get_settings().search
+    return func.bm25(
+        literal_column("items_fts"),
+        search_settings.title_weight,
+        search_settings.description_weight,
+        search_settings.text_weight,
     )
 
 
 @router.get("/", response_model=ItemListResponse)
 async def search_items(
-    q: str = Query(..., min_length=1, description="Search query"),
+    q: str = Query(..., min_length=1, description="Search query (supports tag:, type:, cat:, after:, before:, ext:)"),
     category_id: Optional[int] = Query(None, description="Filter by category"),
     content_type: Optional[str] = Query(None, description="Filter by content type"),
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    include_total: bool = Query(True, description="Count matching items (skipped for cursor pages)"),
+    view: ItemView = Query("card", description="Response projection: card, summary or full"),
+    facets: Optional[str] = Query(
+        None, description="Comma-separated facets to count: category, content_type, tag, year",
+    ),
+    explain: bool = Query(False, description="Return EXPLAIN QUERY PLAN output (server.debug only)"),
     db: AsyncSession = Depends(get_db),
 ):
     """
     Search items using full-text search.
 
-    Searches across title, description, and extracted_text fields.
+    q is parsed by the search query language (see utils/search_query.py):
+    field filters such as tag:, type:, cat:, after:, before: and ext:
+    become conditions on indexed columns, and the remaining terms (with
+    "phrases", prefix*, OR and -exclusions) are matched against title,
+    description and extracted_text through the items_fts FTS5 index,
+    ranked by bm25() with title > description > body weights. Queries with
+    only filters list matches newest first. Terms the index cannot find
+    (no word characters, or under three characters with the trigram
+    tokenizer) are matched term by term with LIKE instead, keeping their
+    OR groups and exclusions. Pages can be addressed by number
+    or by the opaque next_cursor of the previous response: a keyset on
+    created_at for unranked queries, and an offset for ranked ones, whose
+    bm25() scores shift whenever the index changes. The default
+    "card" view leaves out extracted_text and item_metadata. Requested
+    facets are counted over all matching items, in one statement that also
+    yields the total.
     """
-    # Build base query with search
-    # Using LIKE for simple search (FTS5 would be better for large datasets)
-    search_pattern = f"%{q}%"
+    requested_facets = _parse_facets(facets)
+    if explain and not get_settings().server.debug:
+        raise HTTPException(status_code=403, detail="explain requires server.debug")
 
-    query = (
-        select(Item)
-        .where(
-            or_(
-                Item.title.ilike(search_pattern),
-                Item.description.ilike(search_pattern),
-                Item.extracted_text.ilike(search_pattern),
-            )
-        )
-        .options(
-            selectinload(Item.category),
-            selectinload(Item.tags),
-            selectinload(Item.associated_items),
-        )
-    )
+    try:
+        parsed = parse_query(q)
+    except QuerySyntaxError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    match, excluded, unindexed = build_match_expression(parsed, get_settings().search.fts_tokenizer)
 
-    # Apply filters
+    filters = [_filter_condition(f) for f in parsed.filters]
     if category_id:
-        query = query.where(Item.category_id == category_id)
+        filters.append(Item.category_id == category_id)
     if content_type:
-        query = query.where(Item.content_type == content_type)
-
-    # Count total matching items
-    count_query = (
-        select(func.count(Item.id))
-        .where(
-            or_(
-                Item.title.ilike(search_pattern),
-                Item.description.ilike(search_pattern),
-                Item.extracted_text.ilike(search_pattern),
-            )
+        filters.append(Item.content_type == content_type)
+    if excluded is not None:
+        filters.append(Item.id.not_in(
+            select(items_fts.c.rowid).where(literal_column("items_fts").op("MATCH")(excluded))
+        ))
+    filters.extend(_like_conditions(unindexed))
+
+    if match is not None:
+        fts_match = literal_column("items_fts").op("MATCH")(match)
+        # bm25() is lower for better matches, so rank ascending
+        sort_key = _bm25_rank()
+        descending = False
+        query = (
+            select(Item, sort_key)
+            .join(items_fts, items_fts.c.rowid == Item.id)
+            .where(fts_match)
         )
-    )
-    if category_id:
-        count_query = count_query.where(Item.category_id == category_id)
-    if content_type:
-        count_query = count_query.where(Item.content_type == content_type)
-
-    total = await db.scalar(count_query)
-
-    # Apply pagination
+        count_query = (
+            select(func.count())
+            .select_from(items_fts)
+            .join(Item, items_fts.c.rowid == Item.id)
+            .where(fts_match)
+        )
+        matched = (
+            select(*_FACET_SOURCE_COLUMNS)
+            .select_from(items_fts)
+            .join(Item, items_fts.c.rowid == Item.id)
+            .where(fts_match)
+        )
+    else:
+        sort_key = Item.created_at
+        descending = True
+        query = select(Item, sort_key)
+        count_query = select(func.count(Item.id))
+        matched = select(*_FACET_SOURCE_COLUMNS)
+
+    query = query.options(*item_load_options(view)).where(*filters)
+
+    # Count total (first page only when paging by cursor)
+    total = None
+    with_total = include_total and not cursor
+    facet_counts = None
+    statements = {}
+    if requested_facets:
+        facet_counts, total, statements["facets"] = await _count_facets(
+            db, matched.where(*filters), requested_facets, with_total,
+        )
+    elif with_total:
+        statements["count"] = count_query.where(*filters)
+        total = await db.scalar(statements["count"]) or 0
+
+    # Apply pagination, best matches first. bm25() ranks change with the
+    # index (document frequencies, average lengths), so ranked pages go by
+    # offset; a keyset on them would skip or repeat rows after any edit
+    ranked = match is not None
     offset = (page - 1) * page_size
-    query = query.order_by(Item.created_at.desc()).offset(offset).limit(page_size)
+    if cursor:
+        try:
+            if ranked:
+                offset = decode_offset_cursor(cursor)
+            else:
+                last_value, last_id = decode_cursor(cursor)
+                query = query.where(
+                    keyset_condition(sort_key, Item.id, last_value, last_id, descending=descending)
+                )
+                offset = 0
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    query = query.offset(offset)
+
+    if descending:
+        query = query.order_by(sort_key.desc(), Item.id.desc())
+    else:
+        query = query.order_by(sort_key, Item.id)
+    query = query.limit(page_size)
+    statements["items"] = query
 
     result = await db.execute(query)
-    items = result.scalars().all()
+    rows = result.all()
+
+    next_cursor = None
+    if len(rows) == page_size:
+        if ranked:
+            next_cursor = encode_offset_cursor(offset + page_size)
+        else:
+            last_item, last_sort_value = rows[-1]
+            next_cursor = encode_cursor(last_sort_value, last_item.id)
+
+    highlights = {}
+    if match is not None and rows:
+        highlights = await _highlights(db, match, [item.id for item, _ in rows])
+
+    query_plan = None
+    if explain:
+        query_plan = {name: await _explain(db, statement) for name, statement in statements.items()}
+
+    responses = []
+    for item, _ in rows:
+        response = item_to_response(item, view)
+        response.highlights = highlights.get(item.id)
+        responses.append(response)
 
     return ItemListResponse(
-        items=[_item_to_response(item) for item in items],
-        total=total or 0,
+        items=responses,
+        total=total,
         page=page,
         page_size=page_size,
-        total_pages=(total + page_size - 1) // page_size if total else 0,
+        total_pages=(total + page_size - 1) // page_size if total is not None else None,
+        next_cursor=next_cursor,
+        facets=facet_counts,
+        query_plan=query_plan,
+    )
+
+
+async def _highlights(db: AsyncSession, match: str, item_ids: list[int]) -> dict[int, SearchHighlights]:
+    """
+    Highlighted title and best matching snippet of each item on a page.
+
+    Run as a separate query over the page's rows only: snippet() has to
+    re-read and tokenize each document, which would otherwise happen for
+    every match before ORDER BY ... LIMIT picks the page.
+    """
+    fts = literal_column("items_fts")
+    tokenizer = get_settings().search.fts_tokenizer
+    result = await db.execute(
+        select(
+            items_fts.c.rowid,
+            func.highlight(fts, 0, MATCH_START, MATCH_END),
+            func.snippet(fts, 1, MATCH_START, MATCH_END, "…", SNIPPET_TOKENS),
+            func.snippet(fts, 2, MATCH_START, MATCH_END, "…", SNIPPET_TOKENS),
+        )
+        .where(fts.op("MATCH")(match), items_fts.c.rowid.in_(item_ids))
     )
 
+    highlights = {}
+    for item_id, title, description, body in result.all():
+        fragments = {
+            "extracted_text": parse_fragment(body, tokenizer),
+            "description": parse_fragment(description, tokenizer),
+        }
+        # Prefer a field that matched; otherwise show the start of the body
+        snippet_field = next(
+            (name for name, fragment in fragments.items() if fragment and fragment[1]),
+            next((name for name, fragment in fragments.items() if fragment), None),
+        )
+        title_fragment = parse_fragment(title, tokenizer)
+        highlights[item_id] = SearchHighlights(
+            title=TextFragment(text=title_fragment[0], matches=title_fragment[1]) if title_fragment else None,
+            snippet=TextFragment(text=fragments[snippet_field][0], matches=fragments[snippet_field][1])
+            if snippet_field else None,
+            snippet_field=snippet_field,
+        )
+    return highlights
+
+
+def _like_condition(term: Term):
+    """Whether an item's text contains a term, without the FTS index."""
+    columns = (Item.title, func.coalesce(Item.description, ""), func.coalesce(Item.extracted_text, ""))
+    return and_(*(
+        or_(*(column.icontains(pattern, autoescape=True) for column in columns))
+        for pattern in like_patterns(term)
+    ))
+
+
+def _like_conditions(query: SearchQuery) -> list:
+    """LIKE conditions for the term groups and exclusions the FTS index cannot match."""
+    conditions = [or_(*(_like_condition(term) for term in group)) for group in query.groups]
+    conditions += [not_(_like_condition(term)) for term in query.excluded]
+    return conditions
+
+
+def _filter_condition(field_filter: FieldFilter):
+    """Compile a query-language field filter onto indexed item columns."""
+    values = field_filter.values
+
+    if field_filter.field == "type":
+        condition = Item.content_type.in_([value.lower() for value in values])
+    elif field_filter.field == "category":
+        ids = [int(value) for value in values if value.isdigit()]
+        names = [value.lower() for value in values if not value.isdigit()]
+        if names:
+            ids = select(Category.id).where(or_(
+                Category.id.in_(ids), func.lower(Category.name).in_(names),
+            ))
+        condition = Item.category_id.in_(ids)
+    elif field_filter.field == "tag":
+        tag_ids = select(Tag.id).where(func.lower(Tag.name).in_([value.lower() for value in values]))
+        condition = Item.id.in_(select(ItemTag.c.item_id).where(ItemTag.c.tag_id.in_(tag_ids)))
+    elif field_filter.field == "ext":
+        condition = Item.file_extension.in_([value.lower().lstrip(".") for value in values])
+    elif field_filter.field == "after":
+        condition = Item.created_at >= min(parse_date(value) for value in values)
+    else:  # before
+        condition = Item.created_at < max(parse_date(value) for value in values)
+
+    if not field_filter.negated:
+        return condition
+    # NOT of a NULL comparison is NULL, so items without a value count as not matching
+    if field_filter.field == "category":
+        return or_(Item.category_id.is_(None), ~condition)
+    if field_filter.field == "ext":
+        return or_(Item.file_extension.is_(None), ~condition)
+    return ~condition
+
+
+async def _explain(db: AsyncSession, statement) -> list[str]:
+    """EXPLAIN QUERY PLAN of a statement, one indented line per plan step."""
+    compiled = statement.compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True})
+    result = await db.execute(text(f"EXPLAIN QUERY PLAN {compiled}"))
+
+    depth = {0: -1}
+    lines = []
+    for node_id, parent_id, _, detail in result.all():
+        depth[node_id] = depth.get(parent_id, -1) + 1
+        lines.append("  " * depth[node_id] + detail)
+    return lines
+
+
+def _parse_facets(facets: Optional[str]) -> list[str]:
+    """Split the facets parameter, rejecting unknown names."""
+    if not facets:
+        return []
+
+    requested = [name.strip() for name in facets.split(",") if name.strip()]
+    allowed = get_args(SearchFacet)
+    unknown = [name for name in requested if name not in allowed]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown facets: {', '.join(unknown)} (expected {', '.join(allowed)})",
+        )
+    return list(dict.fromkeys(requested))
+
+
+async def _count_facets(
+    db: AsyncSession,
+    matched: Select,
+    facets: list[str],
+    with_total: bool,
+) -> tuple[dict[str, list[FacetCount]], Optional[int], Select]:
+    """
+    Count matching items per facet value in a single statement.
+
+    The matching rows are a CTE shared by one grouped SELECT per facet
+    (combined with UNION ALL), so SQLite evaluates the full-text match once
+    no matter how many facets are requested.
+
+    Returns:
+        Tuple of (counts per facet, most frequent first; total or None;
+        the executed statement)
+    """
+    m = matched.cte("matched")
+    branches = []
+
+    if "category" in facets:
+        branches.append(
+            select(
+                literal("category").label("facet"),
+                m.c.category_id.cast(String).label("value"),
+                Category.name.label("label"),
+                func.count().label("count"),
+            )
+            .select_from(m)
+            .outerjoin(Category, Category.id == m.c.category_id)
+            .group_by(m.c.category_id)
+        )
+    if "content_type" in facets:
+        branches.append(
+            select(literal("content_type"), m.c.content_type, null(), func.count())
+            .select_from(m)
+            .group_by(m.c.content_type)
+        )
+    if "tag" in facets:
+        branches.append(
+            select(literal("tag"), Tag.name, null(), func.count())
+            .select_from(m)
+            .join(ItemTag, ItemTag.c.item_id == m.c.id)
+            .join(Tag, Tag.id == ItemTag.c.tag_id)
+            .group_by(Tag.id)
+        )
+    if "year" in facets:
+        year = func.strftime("%Y", m.c.created_at)
+        branches.append(
+            select(literal("year"), year, null(), func.count())
+            .select_from(m)
+            .group_by(year)
+        )
+    if with_total:
+        branches.append(
+            select(literal("total"), null(), null(), func.count()).select_from(m)
+        )
+
+    statement = union_all(*branches)
+    result = await db.execute(statement)
+
+    counts: dict[str, list[FacetCount]] = {facet: [] for facet in facets}
+    total = None
+    for facet, value, label, count in result.all():
+        if facet == "total":
+            total = count
+            continue
+        if facet in ("category", "year") and value is not None:
+            value = int(value)
+        counts[facet].append(FacetCount(value=value, label=label, count=count))
+
+    for values in counts.values():
+        values.sort(key=lambda f: f.count, reverse=True)
+
+    return counts, total, statement
+
+
+@router.get("/semantic", response_model=SemanticSearchResponse)
+async def semantic_search(
+    q: str = Query(..., min_length=1, description="Search text"),
+    limit: int = Query(20, ge=1, le=100),
+    hybrid: bool = Query(False, description="Fuse with BM25 keyword ranking"),
+    view: ItemView = Query("card", description="Response projection: card, summary or full"),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Find items related to the query by content rather than exact keywords.
+
+    Items are ranked by cosine similarity between offline hashed TF-IDF
+    vectors of the query and of each item. With hybrid=true, the top
+    full-text matches join the candidates and the score becomes a weighted
+    sum of similarity and BM25 normalized to the best match.
+    """
+    semantic_settings = get_settings().semantic
+    await vector_index.ensure_current(db)
+    vector = vector_index.embed_query(q)
+    if vector is None:
+        return SemanticSearchResponse(items=[])
+
+    scores = dict(vector_index.search(
+        vector, HYBRID_CANDIDATES if hybrid else limit, semantic_settings.min_similarity,
+    ))
+
+    if hybrid:
+        keyword_scores = {}
+        match = build_match_query(q, get_settings().search.fts_tokenizer)
+        if match is not None:
+            rank = _bm25_rank()
+            result = await db.execute(
+                select(items_fts.c.rowid, rank)
+                .where(literal_column("items_fts").op("MATCH")(match))
+                .order_by(rank)
+                .limit(HYBRID_CANDIDATES)
+            )
+            # bm25() is negative, more so for better matches
+            keyword_scores = {item_id: -value for item_id, value in result.all()}
+
+        best_keyword = max(keyword_scores.values(), default=0.0)
+        candidate_ids = list(scores.keys() | keyword_scores.keys())
+        similarities = vector_index.similarity(candidate_ids, vector)
+        similarities[similarities <= semantic_settings.min_similarity] = 0.0
+        weight = semantic_settings.hybrid_weight
+        scores = {
+            item_id: weight * float(similarity)
+            + (1 - weight) * (keyword_scores.get(item_id, 0.0) / best_keyword if best_keyword > 0 else 0.0)
+            for item_id, similarity in zip(candidate_ids, similarities)
+        }
+
+    ranked = sorted(scores.items(), key=lambda pair: pair[1], reverse=True)[:limit]
+    if not ranked:
+        return SemanticSearchResponse(items=[])
+
+    result = await db.execute(
+        select(Item)
+        .where(Item.id.in_([item_id for item_id, _ in ranked]))
+        .options(*item_load_options(view))
+    )
+    items = {item.id: item for item in result.scalars().all()}
+
+    return SemanticSearchResponse(items=[
+        ScoredItemResponse(**item_to_response(items[item_id], view).model_dump(), score=score)
+        for item_id, score in ranked
+        if item_id in items
+    ])
+
+
+@router.post("/semantic/rebuild")
+async def rebuild_semantic_index(db: AsyncSession = Depends(get_db)):
+    """Re-embed all items and recount document frequencies."""
+    indexed = await vector_index.rebuild(db)
+    return {"message": "Semantic index rebuilt", "indexed": indexed}
+
+
+@router.post("/reindex")
+async def rebuild_search_index():
+    """Rebuild the full-text index from the items table."""
+    async with engine.begin() as conn:
+        indexed = await conn.run_sync(rebuild_fts_index, get_settings().search.fts_tokenizer)
+
+    return {"message": "Search index rebuilt", "indexed": indexed}
+
 
 @router.get("/suggest")
 async def search_suggestions(
@@ -134,19 +504,20 @@ async def search_suggestions(
     limit: int = Query(10, ge=1, le=50),
     db: AsyncSession = Depends(get_db),
 ):
-    """Get search suggestions based on item titles."""
-    search_pattern = f"%{q}%"
-
-    query = (
-        select(Item.title)
-        .where(Item.title.ilike(search_pattern))
-        .limit(limit)
-    )
+    """
+    Get search-as-you-type suggestions.
 
-    result = await db.execute(query)
-    titles = result.scalars().all()
+    Served from the in-memory prefix index over item titles, tag names and
+    category names: categories and tags first by item count, then titles
+    by recency with favorites boosted.
+    """
+    await suggestion_index.ensure_loaded(db)
+    results = suggestion_index.suggest(q, limit)
 
-    return {"suggestions": list(set(titles))}
+    return {
+        "suggestions": [result["text"] for result in results],
+        "results": results,
+    }
 
 
 @router.get("/by-category", response_model=dict)
@@ -154,57 +525,68 @@ async def get_items_grouped_by_category(
     limit_per_category: int = Query(5, ge=1, le=20),
     db: AsyncSession = Depends(get_db),
 ):
-    """Get recent items grouped by category."""
+    """
+    Get recent items grouped by category.
+
+    The newest items of every category are picked in a single
+    ROW_NUMBER() OVER (PARTITION BY category_id) query, with tags and
+    categories bulk-loaded. Results are cached in-process until items,
+    categories or tags are written.
+    """
+    cache_key = ("by-category", limit_per_category)
+    cached = item_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
     categories_result = await db.execute(select(Category))
     categories = categories_result.scalars().all()
 
-    result = {}
-
-    for category in categories:
-        query = (
-            select(Item)
-            .where(Item.category_id == category.id)
-            .options(
-                selectinload(Item.category),
-                selectinload(Item.tags),
-                selectinload(Item.associated_items),
+    ranked = (
+        select(
+            Item.id,
+            func.row_number()
+            .over(
+                partition_by=Item.category_id,
+                order_by=(Item.created_at.desc(), Item.id.desc()),
             )
-            .order_by(Item.created_at.desc())
-            .limit(limit_per_category)
+            .label("row_number"),
         )
+        .subquery()
+    )
+    query = (
+        select(Item)
+        .join(ranked, ranked.c.id == Item.id)
+        .where(ranked.c.row_number <= limit_per_category)
+        .options(*item_load_options("card"))
+        .order_by(Item.created_at.desc(), Item.id.desc())
+    )
 
-        items_result = await db.execute(query)
-        items = items_result.scalars().all()
+    items_result = await db.execute(query)
+    items_by_category: dict[Optional[int], list] = {}
+    for item in items_result.scalars().all():
+        items_by_category.setdefault(item.category_id, []).append(
+            item_to_response(item, "card")
+        )
+
+    result = {}
 
+    for category in categories:
         result[category.name] = {
             "category_id": category.id,
             "color": category.color,
             "icon": category.icon,
-            "items": [_item_to_response(item) for item in items],
+            "items": items_by_category.get(category.id, []),
         }
 
-    # Also get uncategorized items
-    uncategorized_query = (
-        select(Item)
-        .where(Item.category_id.is_(None))
-        .options(
-            selectinload(Item.category),
-            selectinload(Item.tags),
-            selectinload(Item.associated_items),
-        )
-        .order_by(Item.created_at.desc())
-        .limit(limit_per_category)
-    )
-
-    uncategorized_result = await db.execute(uncategorized_query)
-    uncategorized_items = uncategorized_result.scalars().all()
-
+    # Also include uncategorized items
+    uncategorized_items = items_by_category.get(None)
     if uncategorized_items:
         result["Uncategorized"] = {
             "category_id": None,
             "color": "#6B7280",
             "icon": "folder",
-            "items": [_item_to_response(item) for item in uncategorized_items],
+            "items": uncategorized_items,
         }
 
+    item_cache.set(cache_key, result)
     return result
@@ -0,0 +1,82 @@
+"""Shared conversion of Item models into API responses."""
+
+from sqlalchemy import func
+from sqlalchemy.orm import defer, selectinload, with_expression
+
+from ..models import Item
+from ..schemas.item import ItemResponse, ItemView, AssociatedItemBrief
+
+# Length of the extracted_text excerpt returned by the "summary" view
+TEXT_PREVIEW_CHARS = 500
+
+
+def item_load_options(view: ItemView = "full") -> list:
+    """
+    Loader options for selecting Items rendered with the given view.
+
+    Relationships are eager-loaded (associated items only with the columns
+    AssociatedItemBrief needs). Columns a view does not return are deferred
+    with raiseload, so large text never leaves SQLite for list pages.
+    """
+    options = [
+        selectinload(Item.category),
+        selectinload(Item.tags),
+        selectinload(Item.associated_items).load_only(
+            Item.id, Item.title, Item.content_type, Item.thumbnail_path,
+        ),
+    ]
+
+    if view != "full":
+        options.append(defer(Item.extracted_text, raiseload=True))
+    if view == "card":
+        options.append(defer(Item.item_metadata, raiseload=True))
+    if view == "summary":
+        options.append(
+            with_expression(
+                Item.text_preview,
+                func.substr(Item.extracted_text, 1, TEXT_PREVIEW_CHARS),
+            )
+        )
+
+    return options
+
+
+def item_to_response(item: Item, view: ItemView = "full") -> ItemResponse:
+    """Convert Item model to response schema."""
+    associated = []
+    if item.associated_items:
+        for assoc in item.associated_items:
+            associated.append(AssociatedItemBrief(
+                id=assoc.id,
+                title=assoc.title,
+                content_type=assoc.content_type,
+                thumbnail_path=assoc.thumbnail_path,
+            ))
+    # Note: associated_by requires separate loading which we skip for simplicity
+    # The bidirectional associations are handled through associated_items
+
+    return ItemResponse(
+        id=item.id,
+        title=item.title,
+        description=item.description,
+        category_id=item.category_id,
+        content_type=item.content_type,
+        file_path=item.file_path,
+        original_path=item.original_path,
+        url=item.url,
+        extracted_text=item.extracted_text if view == "full" else None,
+        text_preview=item.text_preview if view == "summary" else None,
+        file_hash=item.file_hash,
+        file_size=item.file_size,
+        mime_type=item.mime_type,
+        thumbnail_path=item.thumbnail_path,
+        confidence=item.confidence,
+        item_metadata=item.item_metadata if view != "card" else None,
+        is_favorite=item.is_favorite,
+        favorite_at=item.favorite_at,
+        created_at=item.created_at,
+        updated_at=item.updated_at,
+        category_name=item.category.name if item.category else None,
+        tags=[tag.name for tag in item.tags] if item.tags else [],
+        associated_items=associated,
+    )
@@ -3,9 +3,11 @@
 from .category import CategoryCreate, CategoryUpdate, CategoryResponse
 from .item import ItemCreate, ItemUpdate, ItemResponse, ItemListResponse
 from .tag import TagCreate, TagResponse
+from .job import JobCreate, JobResponse, JobFileResponse
 
 __all__ = [
     "CategoryCreate", "CategoryUpdate", "CategoryResponse",
     "ItemCreate", "ItemUpdate", "ItemResponse", "ItemListResponse",
     "TagCreate", "TagResponse",
+    "JobCreate", "JobResponse", "JobFileResponse",
 ]
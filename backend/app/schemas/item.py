@@ -1,9 +1,17 @@
 """Pydantic schemas for Item API."""
 
 from datetime import datetime
-from typing import Optional, Any
+from typing import Optional, Any, Literal, Union
 
-from pydantic import BaseModel, ConfigDict, HttpUrl
+from pydantic import BaseModel, ConfigDict, Field, HttpUrl
+
+
+# Response projections: "card" omits extracted_text and item_metadata,
+# "summary" adds item_metadata and a text_preview excerpt, "full" returns everything
+ItemView = Literal["card", "summary", "full"]
+
+# Facets that search can count matches by
+SearchFacet = Literal["category", "content_type", "tag", "year"]
 
 
 class ItemBase(BaseModel):
@@ -41,6 +49,19 @@ class AssociatedItemBrief(BaseModel):
     thumbnail_path: Optional[str] = None
 
 
+class TextFragment(BaseModel):
+    """Text with the character ranges that matched a search."""
+    text: str
+    matches: list[tuple[int, int]] = []  # [start, end) offsets in Unicode code points
+
+
+class SearchHighlights(BaseModel):
+    """Where a search result matched, without sending the whole document."""
+    title: Optional[TextFragment] = None
+    snippet: Optional[TextFragment] = None  # Best fragment of the body or description
+    snippet_field: Optional[str] = None  # "extracted_text" or "description"
+
+
 class ItemResponse(ItemBase):
     """Schema for item response."""
     model_config = ConfigDict(from_attributes=True)
@@ -51,6 +72,7 @@ class ItemResponse(ItemBase):
     original_path: Optional[str] = None
     url: Optional[str] = None
     extracted_text: Optional[str] = None
+    text_preview: Optional[str] = None
     file_hash: Optional[str] = None
     file_size: Optional[int] = None
     mime_type: Optional[str] = None
@@ -67,14 +89,52 @@ class ItemResponse(ItemBase):
     tags: list[str] = []
     associated_items: list[AssociatedItemBrief] = []
 
+    # Set by the import endpoints when the text nearly matches an existing item
+    possible_duplicate_of: Optional[int] = None
+
+    # Set by full-text search results
+    highlights: Optional[SearchHighlights] = None
+
+
+class FacetCount(BaseModel):
+    """Number of matching items sharing one facet value."""
+    value: Optional[Union[int, str]] = None  # Category ID, content type, tag name or year
+    label: Optional[str] = None  # Display name (category facet only)
+    count: int
+
 
 class ItemListResponse(BaseModel):
     """Schema for paginated item list."""
     items: list[ItemResponse]
-    total: int
+    total: Optional[int] = None  # None when the count was skipped
     page: int
     page_size: int
-    total_pages: int
+    total_pages: Optional[int] = None
+    next_cursor: Optional[str] = None  # Continuation token for keyset pagination
+    facets: Optional[dict[str, list[FacetCount]]] = None  # Only when requested
+    query_plan: Optional[dict[str, list[str]]] = None  # EXPLAIN QUERY PLAN per statement, debug mode only
+
+
+class ScoredItemResponse(ItemResponse):
+    """Item with its relevance score."""
+    score: float
+
+
+class SemanticSearchResponse(BaseModel):
+    """Schema for semantic search results, most relevant first."""
+    items: list[ScoredItemResponse]
+
+
+class DuplicateGroup(BaseModel):
+    """Items whose extracted texts are near-duplicates of each other."""
+    similarity: float  # Lowest estimated text overlap linking the group
+    items: list[ItemResponse]
+
+
+class DuplicateReportResponse(BaseModel):
+    """Schema for the near-duplicate report, largest groups first."""
+    groups: list[DuplicateGroup]
+    threshold: float
 
 
 class ItemImportRequest(BaseModel):
@@ -83,6 +143,8 @@ class ItemImportRequest(BaseModel):
     url: Optional[str] = None   # Web URL to import
     category_id: Optional[int] = None
     auto_classify: bool = True
+    sync: bool = False  # Also move or delete items whose files were moved or deleted under path
+    include_items: bool = False  # Return the imported items in full, not only their IDs
 
 
 class ItemImportResponse(BaseModel):
@@ -90,8 +152,52 @@ class ItemImportResponse(BaseModel):
     success: bool
     items_imported: int
     items_skipped: int
+    items_unchanged: int = 0  # Files not read again, unchanged since the last scan
+    items_moved: int = 0
+    items_deleted: int = 0
     errors: list[str] = []
-    items: list[ItemResponse] = []
+    item_ids: list[int] = []
+    items: list[ItemResponse] = []  # Only with include_items
+
+
+class UploadCreate(BaseModel):
+    """Schema for starting a resumable upload."""
+    filename: str
+    size: int  # Total size in bytes
+    chunk_size: Optional[int] = None  # Defaults to storage.upload_chunk_size
+    category_id: Optional[int] = None
+    auto_classify: bool = True
+    original_path: Optional[str] = None  # Path on the client, defaults to filename
+
+
+class UploadStatusResponse(BaseModel):
+    """Schema for the state of a resumable upload."""
+    upload_id: str
+    filename: str
+    size: int
+    chunk_size: int
+    total_chunks: int
+    received_bytes: int
+    received: list[tuple[int, int]]  # Received byte ranges as [start, end)
+    missing: list[int]  # Indexes of chunks still to upload
+
+
+class BlobResponse(BaseModel):
+    """Schema for stored content looked up by its SHA-256."""
+    sha256: str
+    size: Optional[int] = None
+    item_id: int
+
+
+class BlobExistsRequest(BaseModel):
+    """Schema for checking which contents the vault already has."""
+    hashes: list[str] = Field(max_length=10000)  # SHA-256 hex digests
+
+
+class BlobExistsResponse(BaseModel):
+    """Schema for a batch existence check."""
+    existing: dict[str, int]  # SHA-256 -> ID of the item holding it
+    missing: list[str]
 
 
 class ItemAssociationRequest(BaseModel):
@@ -0,0 +1,51 @@
+"""Pydantic schemas for Job API."""
+
+from datetime import datetime
+from typing import Literal, Optional
+
+from pydantic import BaseModel, ConfigDict
+
+
+class JobCreate(BaseModel):
+    """Schema for starting a background import."""
+    job_type: Literal["path", "url", "urls"]
+    path: Optional[str] = None  # Local file/directory path, for path jobs
+    url: Optional[str] = None   # Web URL, for url jobs
+    urls: list[str] = []        # Web URLs, for urls jobs (bulk imports)
+    url_list: Optional[str] = None  # Or the text of a URL list or bookmarks export, for urls jobs
+    category_id: Optional[int] = None
+    auto_classify: bool = True
+    sync: bool = False  # Path jobs: also move or delete items whose files were moved or deleted
+
+
+class JobFileResponse(BaseModel):
+    """Schema for the outcome of one file of a job."""
+    model_config = ConfigDict(from_attributes=True)
+
+    path: str
+    status: str  # imported, skipped, failed, moved (to path), deleted
+    item_id: Optional[int] = None
+    error: Optional[str] = None
+    created_at: datetime
+
+
+class JobResponse(BaseModel):
+    """Schema for job status and progress."""
+    id: int
+    job_type: str
+    status: str  # queued, running, completed, failed, cancelled
+    params: dict
+    total: Optional[int] = None  # Files to process; None until the walk has finished
+    discovered: int = 0  # Files found so far
+    imported: int = 0
+    skipped: int = 0
+    failed: int = 0
+    unchanged: int = 0  # Files not read again, unchanged since the last scan
+    moved: int = 0  # Sync: items whose file moved
+    deleted: int = 0  # Sync: items whose file was deleted
+    current: Optional[str] = None  # File most recently finished
+    error: Optional[str] = None  # Why the job as a whole failed
+    errors: list[JobFileResponse] = []  # Most recent failed files
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
@@ -1,8 +1,34 @@
 """Business logic services for KnowledgeVault."""
 
-from .storage import StorageService
+from .storage import StorageService, BlobWriter, FileTooLargeError
 from .file_processor import FileProcessor
 from .classifier import Classifier
 from .web_scraper import WebScraper
+from .result_cache import ResultCache, item_cache
+from .suggest import SuggestionIndex, suggestion_index
+from .vector_index import VectorIndex, vector_index
+from .neighbors import NeighborIndex, neighbor_index
+from .duplicates import find_near_duplicates, find_duplicate_groups
+from .extraction import (
+    ExtractionPool, ExtractionRetries, extraction_pool, extraction_retries,
+    extract_item, extraction_failed, extraction_retryable, queue_retries,
+)
+from .import_pipeline import ImportPipeline, ImportResult, import_pipeline, import_url_item
+from .scan_manifest import ScanManifest
+from .jobs import JobManager, job_manager
+from .watcher import FolderWatcher, folder_watcher
+from .uploads import (
+    UploadManager, UploadSession, UploadError, UploadNotFoundError, UploadConflictError, upload_manager,
+)
 
-__all__ = ["StorageService", "FileProcessor", "Classifier", "WebScraper"]
+__all__ = [
+    "StorageService", "BlobWriter", "FileTooLargeError", "FileProcessor", "Classifier", "WebScraper",
+    "ResultCache", "item_cache", "SuggestionIndex", "suggestion_index",
+    "VectorIndex", "vector_index", "NeighborIndex", "neighbor_index",
+    "find_near_duplicates", "find_duplicate_groups",
+    "ExtractionPool", "ExtractionRetries", "extraction_pool", "extraction_retries",
+    "extract_item", "extraction_failed", "extraction_retryable", "queue_retries",
+    "ImportPipeline", "ImportResult", "import_pipeline", "import_url_item",
+    "ScanManifest", "JobManager", "job_manager", "FolderWatcher", "folder_watcher",
+    "UploadManager", "UploadSession", "UploadError", "UploadNotFoundError", "UploadConflictError", "upload_manager",
+]
@@ -0,0 +1,156 @@
+"""Near-duplicate lookups over the MinHash LSH index."""
+
+from itertools import combinations
+from typing import Optional
+
+from sqlalchemy import and_, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from ..config import get_settings
+from ..models import ItemSignature, ItemSignatureBand
+from ..utils.minhash import signature_similarity
+
+# Buckets shared by more items than this are linked as a chain instead of
+# comparing all pairs, which keeps the report linear in bucket size
+MAX_PAIRWISE_BUCKET = 32
+
+_SIGNATURE_CHUNK = 500  # IDs per IN (...) query
+
+
+async def _load_signatures(session: AsyncSession, item_ids: set[int]) -> dict[int, bytes]:
+    ids = sorted(item_ids)
+    signatures = {}
+    for start in range(0, len(ids), _SIGNATURE_CHUNK):
+        result = await session.execute(
+            select(ItemSignature.c.item_id, ItemSignature.c.signature)
+            .where(ItemSignature.c.item_id.in_(ids[start:start + _SIGNATURE_CHUNK]))
+        )
+        signatures.update(result.tuples().all())
+    return signatures
+
+
+async def find_near_duplicates(
+    session: AsyncSession,
+    item_id: int,
+    threshold: Optional[float] = None,
+) -> list[tuple[int, float]]:
+    """
+    Items whose extracted text is nearly identical to an item's.
+
+    Candidates are the items sharing at least one LSH band bucket with the
+    item (an indexed lookup), and are kept if their estimated Jaccard
+    similarity reaches the threshold.
+
+    Returns:
+        List of (item_id, similarity), most similar first
+    """
+    if threshold is None:
+        threshold = get_settings().import_config.near_duplicate_threshold
+
+    mine = aliased(ItemSignatureBand)
+    other = aliased(ItemSignatureBand)
+    result = await session.execute(
+        select(other.c.item_id)
+        .join(mine, and_(mine.c.band == other.c.band, mine.c.bucket == other.c.bucket))
+        .where(mine.c.item_id == item_id, other.c.item_id != item_id)
+        .distinct()
+    )
+    candidates = set(result.scalars().all())
+    if not candidates:
+        return []
+
+    signatures = await _load_signatures(session, candidates | {item_id})
+    own = signatures.get(item_id)
+    if own is None:
+        return []
+
+    matches = []
+    for candidate in candidates:
+        if candidate in signatures:
+            similarity = signature_similarity(own, signatures[candidate])
+            if similarity >= threshold:
+                matches.append((candidate, similarity))
+    matches.sort(key=lambda match: (-match[1], match[0]))
+    return matches
+
+
+async def find_duplicate_groups(
+    session: AsyncSession,
+    threshold: Optional[float] = None,
+) -> list[tuple[float, list[int]]]:
+    """
+    Group all near-duplicate items in the vault.
+
+    Only items sharing an LSH bucket are compared, so the cost follows the
+    number of collisions rather than the number of item pairs. Pairs that
+    reach the threshold are joined into groups.
+
+    Returns:
+        List of (similarity, item_ids) with item_ids ascending and
+        similarity the lowest of the pair similarities linking the group;
+        largest groups first
+    """
+    if threshold is None:
+        threshold = get_settings().import_config.near_duplicate_threshold
+
+    shared = (
+        select(ItemSignatureBand.c.band, ItemSignatureBand.c.bucket)
+        .group_by(ItemSignatureBand.c.band, ItemSignatureBand.c.bucket)
+        .having(func.count() > 1)
+        .subquery()
+    )
+    result = await session.execute(
+        select(ItemSignatureBand.c.band, ItemSignatureBand.c.bucket, ItemSignatureBand.c.item_id)
+        .join(shared, and_(
+            shared.c.band == ItemSignatureBand.c.band,
+            shared.c.bucket == ItemSignatureBand.c.bucket,
+        ))
+        .order_by(ItemSignatureBand.c.band, ItemSignatureBand.c.bucket, ItemSignatureBand.c.item_id)
+    )
+
+    buckets: dict[tuple[int, int], list[int]] = {}
+    for band, bucket, item_id in result.tuples().all():
+        buckets.setdefault((band, bucket), []).append(item_id)
+
+    pairs = set()
+    for members in buckets.values():
+        if len(members) <= MAX_PAIRWISE_BUCKET:
+            pairs.update(combinations(members, 2))
+        else:
+            pairs.update(zip(members, members[1:]))
+    if not pairs:
+        return []
+
+    signatures = await _load_signatures(session, {item_id for pair in pairs for item_id in pair})
+
+    # Union-find over the verified pairs
+    parent: dict[int, int] = {}
+    weakest: dict[int, float] = {}
+
+    def find(item_id: int) -> int:
+        parent.setdefault(item_id, item_id)
+        while parent[item_id] != item_id:
+            parent[item_id] = parent[parent[item_id]]
+            item_id = parent[item_id]
+        return item_id
+
+    for a, b in sorted(pairs):
+        if a not in signatures or b not in signatures:
+            continue
+        similarity = signature_similarity(signatures[a], signatures[b])
+        if similarity < threshold:
+            continue
+        root_a, root_b = find(a), find(b)
+        if root_a != root_b:
+            parent[root_b] = root_a
+            weakest[root_a] = min(weakest.get(root_a, 1.0), weakest.pop(root_b, 1.0), similarity)
+
+    groups: dict[int, list[int]] = {}
+    for item_id in parent:
+        groups.setdefault(find(item_id), []).append(item_id)
+
+    return sorted(
+        ((weakest[root], sorted(members)) for root, members in groups.items() if len(members) > 1),
+        key=lambda group: (-len(group[1]), -group[0], group[1][0]),
+    )
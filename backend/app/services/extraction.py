@@ -0,0 +1,366 @@
+"""Text extraction in sandboxed worker processes, with retries of failures."""
+
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Iterable, Optional
+
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..config import get_settings
+from ..database import async_session_maker
+from ..models import ExtractionRetry, Item
+from ..utils.extractors import get_mime_type
+from .file_processor import FileProcessor
+from .storage import StorageService
+
+try:
+    import resource
+    HAS_RESOURCE = True
+except ImportError:
+    # Windows: workers run without a memory cap
+    HAS_RESOURCE = False
+
+STARTUP_TIMEOUT = 60.0  # seconds a new worker may take to start
+
+# Failures that may not happen again; a parser error ("failed") would
+RETRYABLE_STATUSES = ("timed_out", "crashed")
+
+
+# ---- Worker processes ----
+
+def _address_space() -> int:
+    """Virtual memory size of this process in bytes, 0 where unknown."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[0]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return 0
+
+
+def _serve(conn, max_memory: int) -> None:
+    """Process the paths received on conn, one at a time, until None arrives."""
+    if max_memory and HAS_RESOURCE:
+        # Linux does not enforce RLIMIT_RSS, so the address space is capped
+        # instead, above what the interpreter has mapped by now
+        limit = _address_space() + max_memory
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    processor = FileProcessor()
+    conn.send(None)  # Ready
+
+    while (path := conn.recv()) is not None:
+        try:
+            # The extractors are synchronous underneath; run them on a private loop
+            reply = (True, asyncio.run(processor.process_file(Path(path))))
+        except MemoryError:
+            reply = (False, "Out of memory")
+        except Exception as e:
+            reply = (False, f"{type(e).__name__}: {e}")
+        conn.send(reply)
+
+
+class _Worker:
+    """A worker process and the pipe to it; the methods block."""
+
+    def __init__(self, max_memory: int):
+        context = multiprocessing.get_context("spawn")
+        self.conn, child = context.Pipe()
+        self.process = context.Process(target=_serve, args=(child, max_memory), daemon=True)
+        self.process.start()
+        child.close()
+        self.tasks = 0
+        if not self.conn.poll(STARTUP_TIMEOUT):
+            self.kill()
+            raise RuntimeError("Extraction worker did not start")
+        self.conn.recv()
+
+    def call(self, path: str) -> tuple[bool, object]:
+        self.conn.send(path)
+        return self.conn.recv()
+
+    def stop(self) -> None:
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.process.join(5)
+        self.kill()
+
+    def kill(self) -> None:
+        # The pipe is left to be closed once unused: a thread may still be in call()
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join()
+
+
+def _failed(path: Path, status: str, error: str) -> dict:
+    """A process_file() result for a file whose extraction failed."""
+    try:
+        file_size = path.stat().st_size
+    except OSError:
+        file_size = None
+    return {
+        'title': path.name,
+        'mime_type': get_mime_type(path),
+        'file_size': file_size,
+        'extracted_text': None,
+        'thumbnail_data': None,
+        'metadata': {'extraction': {'status': status, 'error': error}},
+    }
+
+
+def extraction_failed(file_data: dict) -> bool:
+    """Whether a process_file() result is that of a failed extraction."""
+    return 'extraction' in (file_data.get('metadata') or {})
+
+
+def extraction_retryable(file_data: dict) -> bool:
+    """Whether a process_file() result is that of a failed extraction worth retrying."""
+    return extraction_failed(file_data) and \
+        file_data['metadata']['extraction']['status'] in RETRYABLE_STATUSES
+
+
+# ---- Pool ----
+
+class ExtractionPool:
+    """
+    Runs FileProcessor.process_file() in sandboxed worker processes.
+
+    Parsers of untrusted files (PyMuPDF, python-docx, BeautifulSoup,
+    Pillow) can hang, blow up in memory or crash, so they never run in
+    the server: a worker taking longer than extraction.timeout on a file
+    is killed, one allocating more than max_memory_mb gets a MemoryError
+    (or dies), and each is replaced after max_tasks_per_worker files so
+    that leaks in those libraries do not build up. The file still gets
+    an item, without text, whose item_metadata["extraction"] tells what
+    happened: {"status": ..., "error": ...}, the status being "failed"
+    when the parser raised or ran out of memory, "timed_out", or
+    "crashed" when the worker died or could not be started.
+    """
+
+    def __init__(self):
+        self._idle: Optional[asyncio.Queue] = None  # Workers, or None for a slot not started yet
+        self._threads: Optional[ThreadPoolExecutor] = None
+        self._workers = 0
+
+    @property
+    def workers(self) -> int:
+        return get_settings().extraction.workers or os.cpu_count() or 1
+
+    def _start(self) -> asyncio.Queue:
+        if self._idle is None:
+            self._workers = self.workers
+            self._idle = asyncio.Queue()
+            for _ in range(self._workers):
+                self._idle.put_nowait(None)
+            # Wait on the pipes; a killed worker's thread may linger a moment
+            self._threads = ThreadPoolExecutor(self._workers * 2, thread_name_prefix="extraction")
+        return self._idle
+
+    async def process_file(self, path: Path) -> dict:
+        """
+        Process a file in a worker, like FileProcessor.process_file().
+
+        Failures are not raised: see extraction_failed().
+        """
+        config = get_settings().extraction
+        loop = asyncio.get_running_loop()
+        idle = self._start()
+        worker = await idle.get()
+        try:
+            if worker is not None and (
+                worker.tasks >= config.max_tasks_per_worker or not worker.process.is_alive()
+            ):
+                await loop.run_in_executor(self._threads, worker.stop)
+                worker = None
+            if worker is None:
+                try:
+                    worker = await loop.run_in_executor(
+                        self._threads, _Worker, config.max_memory_mb * 1024 * 1024,
+                    )
+                except Exception as e:
+                    return _failed(path, "crashed", f"Could not start an extraction worker: {e}")
+
+            worker.tasks += 1
+            try:
+                ok, value = await asyncio.wait_for(
+                    loop.run_in_executor(self._threads, worker.call, str(path)),
+                    config.timeout,
+                )
+            except asyncio.TimeoutError:
+                worker.kill()
+                worker = None
+                return _failed(path, "timed_out", f"Extraction took longer than {config.timeout:g} seconds")
+            except (EOFError, OSError):
+                # Killed by the kernel, or crashed in a C extension
+                worker.kill()
+                code = worker.process.exitcode
+                worker = None
+                return _failed(path, "crashed", f"Extraction worker died (exit code {code})")
+            if not ok:
+                return _failed(path, "failed", value)
+            return value
+        except BaseException:
+            # Cancelled mid-file: the worker is in an unknown state
+            if worker is not None:
+                worker.kill()
+                worker = None
+            raise
+        finally:
+            idle.put_nowait(worker)
+
+    async def shutdown(self) -> None:
+        """Stop the workers; the next file starts new ones."""
+        if self._idle is None:
+            return
+        idle, threads = self._idle, self._threads
+        self._idle = self._threads = None
+        workers = [idle.get_nowait() for _ in range(idle.qsize())]
+        await asyncio.gather(*(
+            asyncio.to_thread(worker.stop) for worker in workers if worker is not None
+        ))
+        threads.shutdown(wait=False)
+
+
+extraction_pool = ExtractionPool()
+
+
+# ---- Retries ----
+
+async def queue_retries(db: AsyncSession, item_ids: Iterable[int], attempts: int = 0) -> None:
+    """
+    Queue retry number attempts + 1 of the extraction of items, in db's
+    transaction; items out of retries are dropped from the queue.
+
+    Call extraction_retries.wake() once it is committed.
+    """
+    config = get_settings().extraction
+    item_ids = list(item_ids)
+    if not item_ids:
+        return
+    table = ExtractionRetry.__table__
+    if attempts >= config.retry_attempts:
+        await db.execute(table.delete().where(table.c.item_id.in_(item_ids)))
+        return
+    retry_at = datetime.utcnow() + timedelta(seconds=config.retry_delay * 2 ** attempts)
+    statement = insert(ExtractionRetry)
+    await db.execute(
+        statement.on_conflict_do_update(
+            index_elements=[ExtractionRetry.item_id],
+            set_={"attempts": statement.excluded.attempts, "retry_at": statement.excluded.retry_at},
+        ),
+        [{"item_id": item_id, "attempts": attempts, "retry_at": retry_at} for item_id in item_ids],
+    )
+
+
+async def extract_item(db: AsyncSession, item: Item, attempts: int = 0) -> bool:
+    """
+    Extract the text and thumbnail of a file item again and commit them.
+
+    On failure the item keeps its text; a timeout or crash is queued for
+    retry number attempts + 1, while a parser error is not retried.
+    Returns whether the extraction succeeded.
+    """
+    file_data = await extraction_pool.process_file(get_settings().files_path / item.file_path)
+    metadata = {key: value for key, value in (item.item_metadata or {}).items() if key != "extraction"}
+    metadata.update(file_data['metadata'])
+    item.item_metadata = metadata
+
+    failed = extraction_failed(file_data)
+    retry = extraction_retryable(file_data)
+    if retry:
+        await queue_retries(db, [item.id], attempts)
+    else:
+        if not failed:
+            item.extracted_text = file_data['extracted_text']
+            item.mime_type = file_data['mime_type'] or item.mime_type
+            if file_data['thumbnail_data'] and not item.thumbnail_path:
+                item.thumbnail_path = await StorageService().save_thumbnail(file_data['thumbnail_data'], item.id)
+        queued = await db.get(ExtractionRetry, item.id)
+        if queued is not None:
+            await db.delete(queued)
+    await db.commit()
+    if retry:
+        extraction_retries.wake()
+    return not failed
+
+
+class ExtractionRetries:
+    """
+    Retries failed extractions in the background, one at a time.
+
+    The queue is the extraction_retries table, so it survives restarts.
+    Only timeouts and worker crashes are queued, since a file the parser
+    rejects would be rejected again. An item is retried
+    extraction.retry_delay seconds after it failed, then after twice as
+    long each time, up to retry_attempts times; after that its
+    item_metadata keeps the last failure, and POST
+    /api/items/{id}/extract can try again.
+    """
+
+    def __init__(self):
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Start the background worker."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the background worker."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def wake(self) -> None:
+        """Look at the queue again, after retries were queued."""
+        self._wake.set()
+
+    async def _run(self) -> None:
+        while True:
+            self._wake.clear()
+            try:
+                async with async_session_maker() as db:
+                    delay = await self.retry_due(db)
+            except Exception as e:
+                print(f"Extraction retry failed: {e}")
+                delay = get_settings().extraction.retry_delay
+            try:
+                await asyncio.wait_for(self._wake.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+
+    async def retry_due(self, db: AsyncSession) -> Optional[float]:
+        """Retry the extractions that are due; seconds until the next one, None if none is queued."""
+        while True:
+            # Queued rows are rewritten with Core statements; reload them
+            retry = await db.scalar(
+                select(ExtractionRetry)
+                .order_by(ExtractionRetry.retry_at)
+                .limit(1)
+                .execution_options(populate_existing=True)
+            )
+            if retry is None:
+                return None
+            wait = (retry.retry_at - datetime.utcnow()).total_seconds()
+            if wait > 0:
+                return wait
+            item = await db.get(Item, retry.item_id)
+            if item is None or item.file_path is None:
+                await db.delete(retry)
+                await db.commit()
+                continue
+            await extract_item(db, item, retry.attempts + 1)
+
+
+extraction_retries = ExtractionRetries()
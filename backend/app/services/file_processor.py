@@ -2,27 +2,26 @@
 
 import mimetypes
 from pathlib import Path
-from typing import Optional
+from typing import BinaryIO, Iterable, Iterator, Optional
 from PIL import Image
 import io
 
 from ..config import get_settings
 from .storage import StorageService
+from ..utils import file_types
+from ..utils.archive import iter_members
 from ..utils.extractors import extract_text_from_file, get_mime_type
+from ..utils.walker import FileWalker
 
 
 class FileProcessor:
     """Service for processing different file types."""
 
-    # Supported file extensions by category
-    DOCUMENT_EXTENSIONS = {'.pdf', '.docx', '.doc', '.txt', '.md', '.rst', '.html', '.htm'}
-    IMAGE_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.gif', '.webp', '.bmp', '.svg'}
-    VIDEO_EXTENSIONS = {'.mp4', '.webm', '.mkv', '.avi', '.mov', '.wmv'}
-    CODE_EXTENSIONS = {
-        '.py', '.js', '.ts', '.jsx', '.tsx', '.java', '.c', '.cpp', '.h', '.hpp',
-        '.go', '.rs', '.rb', '.php', '.swift', '.kt', '.scala', '.sh', '.bash',
-        '.json', '.yaml', '.yml', '.xml', '.toml', '.ini', '.sql', '.css', '.scss',
-    }
+    # Supported file extensions by category (see utils/file_types.py)
+    DOCUMENT_EXTENSIONS = file_types.DOCUMENT_EXTENSIONS
+    IMAGE_EXTENSIONS = file_types.IMAGE_EXTENSIONS
+    VIDEO_EXTENSIONS = file_types.VIDEO_EXTENSIONS
+    CODE_EXTENSIONS = file_types.CODE_EXTENSIONS
 
     def __init__(self):
         self.settings = get_settings()
@@ -128,11 +127,58 @@ class FileProcessor:
     @staticmethod
     def is_supported_file(file_path: Path) -> bool:
         """Check if a file type is supported."""
-        ext = file_path.suffix.lower()
-        all_supported = (
-            FileProcessor.DOCUMENT_EXTENSIONS |
-            FileProcessor.IMAGE_EXTENSIONS |
-            FileProcessor.VIDEO_EXTENSIONS |
-            FileProcessor.CODE_EXTENSIONS
+        return file_types.is_supported_file(file_path.name)
+
+    @staticmethod
+    def is_importable(file_path: Path) -> bool:
+        """Whether a path import takes a file: a supported type, or an archive to look into."""
+        return file_types.is_importable(file_path.name)
+
+    @staticmethod
+    def file_walker(source: Path) -> FileWalker:
+        """Walker under source that skips the paths directory imports exclude."""
+        settings = get_settings()
+        return FileWalker(
+            source,
+            exclude=settings.import_config.exclude,
+            skip=[settings.data_path.resolve()],
         )
-        return ext in all_supported
+
+    @staticmethod
+    def find_files(source: Path, paths: Optional[Iterable[Path]] = None) -> Iterator[Path]:
+        """
+        Supported files to import from source, yielded as the walk finds them.
+
+        A file source is yielded as is. Under a directory, paths matched by
+        import.exclude or by .gitignore/.kvaultignore files, virtualenvs and
+        the vault's data directory are skipped. With paths, only those
+        files and directories below source are walked. Archives are
+        yielded too; see archive_members().
+        """
+        if paths is None and source.is_file():
+            yield source
+            return
+
+        walker = FileProcessor.file_walker(source)
+        for root in [source] if paths is None else paths:
+            if root != source and walker.is_ignored(root):
+                continue
+            if root.is_dir():
+                for entry in walker.walk(root):
+                    if FileProcessor.is_importable(Path(entry.name)):
+                        yield Path(entry.path)
+            elif root.is_file() and FileProcessor.is_importable(root):
+                yield root
+
+    @staticmethod
+    def archive_members(path: Path, name: Optional[str] = None) -> Iterator[tuple[str, int, BinaryIO]]:
+        """
+        Supported files in an archive, as utils.archive.iter_members() yields them.
+
+        Members matched by import.exclude (say, __MACOSX/) are skipped, as
+        they would be in a directory; archives inside are not opened.
+        """
+        walker = FileWalker(path, exclude=get_settings().import_config.exclude)
+        for member, size, stream in iter_members(path, name):
+            if FileProcessor.is_supported_file(Path(member)) and not walker.excludes(member):
+                yield member, size, stream
@@ -0,0 +1,808 @@
+"""Import pipelines for local files and URLs."""
+
+import asyncio
+import itertools
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, Optional
+
+from sqlalchemy import bindparam, select, update
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..config import get_settings
+from ..models import Item
+from ..utils.archive import base_name, is_archive, member_path
+from ..utils.fts import index_items
+from ..utils.minhash import minhash_signature, write_signatures
+from .classifier import Classifier
+from .extraction import extraction_pool, extraction_retries, extraction_retryable, queue_retries
+from .file_processor import FileProcessor
+from .result_cache import item_cache
+from .scan_manifest import ScanManifest
+from .storage import StorageService, hash_path, ingest_file, store_stream
+from .suggest import suggestion_index
+from .vector_index import vector_index
+from .web_scraper import url_fetcher
+
+WRITE_BATCH = 64  # items inserted per commit
+WALK_BATCH = 256  # paths listed per step of the directory walk
+LOOKUP_BATCH = 500  # hashes per file_hash IN (...) query
+
+# ---- Worker processes ----
+
+def hash_file(path: str) -> tuple[str, int]:
+    """SHA-256 and size of a file."""
+    return hash_path(Path(path))
+
+
+def store_file(path: str, file_hash: str, files_path: str, ingest_mode: str = "copy") -> str:
+    """Put a file into the content store; returns its relative_path there."""
+    source = Path(path)
+    relative_path = f"{file_hash[:2]}/{file_hash}{source.suffix}"
+    stored_path = Path(files_path) / relative_path
+    if not stored_path.exists():
+        stored_path.parent.mkdir(parents=True, exist_ok=True)
+        ingest_file(source, stored_path, ingest_mode)
+    return relative_path
+
+
+def store_archive(path: str, name: str, files_path: str, max_size: int) -> list[dict]:
+    """
+    Stream the members of an archive into the content store.
+
+    Each member is hashed while it is copied, so the archive is read once
+    and never extracted.
+
+    Returns:
+        Per member: name, file_hash, size, relative_path, created (whether
+        the stored file is new), or error
+    """
+    members = []
+    for member, _, stream in FileProcessor.archive_members(Path(path), name):
+        entry = {"name": member, "file_hash": None, "size": None, "relative_path": None,
+                 "created": False, "error": None}
+        members.append(entry)
+        try:
+            relative_path, file_hash, size, created = store_stream(
+                stream, Path(files_path), Path(member).suffix, max_size,
+            )
+            entry.update(file_hash=file_hash, size=size, relative_path=relative_path, created=created)
+        except Exception as e:
+            entry["error"] = str(e)
+    return members
+
+
+async def _process_stored(relative_path: str) -> dict:
+    """
+    Extract the text and thumbnail of a stored file in the sandboxed
+    workers, and compute the MinHash signature of the text.
+    """
+    file_data = await extraction_pool.process_file(get_settings().files_path / relative_path)
+    file_data["relative_path"] = relative_path
+    file_data["signature"] = await asyncio.to_thread(minhash_signature, file_data.get('extracted_text'))
+    return file_data
+
+
+# ---- Pipeline ----
+
+@dataclass
+class ImportResult:
+    """Outcome of a pipeline run."""
+    item_ids: list[int] = field(default_factory=list)
+    skipped: int = 0
+    errors: list[str] = field(default_factory=list)
+
+
+@dataclass
+class _Outcome:
+    """What became of one file: imported if file_data is set, failed if error is."""
+    path: Path
+    stat: Optional[os.stat_result] = None
+    file_hash: Optional[str] = None
+    file_size: Optional[int] = None
+    file_data: Optional[dict] = None
+    error: Optional[str] = None
+    item_id: Optional[int] = None
+    category_id: Optional[int] = None
+
+    @property
+    def name(self) -> str:
+        """File name, for an archive member without the archive's."""
+        return base_name(str(self.path))
+
+    @property
+    def status(self) -> str:
+        if self.error is not None:
+            return "failed"
+        return "imported" if self.item_id is not None else "skipped"
+
+
+# Called by the writer for each file, inside the transaction recording it,
+# with (path, status, item_id, error); status is imported, skipped or failed
+FileCallback = Callable[[Path, str, Optional[int], Optional[str]], None]
+
+
+@dataclass
+class _Page:
+    """What became of one URL: imported if page_data is set, failed if error is."""
+    url: str
+    page_data: Optional[dict] = None
+    error: Optional[str] = None
+    item_id: Optional[int] = None
+    category_id: Optional[int] = None
+
+    @property
+    def status(self) -> str:
+        if self.error is not None:
+            return "failed"
+        return "imported" if self.item_id is not None else "skipped"
+
+
+# Like FileCallback, with the URL as given in place of the path
+UrlCallback = Callable[[str, str, Optional[int], Optional[str]], None]
+
+
+class _VaultHashes:
+    """
+    Tells the pipeline's stages whether content is in the vault already.
+
+    Lookups made while the previous query, or the writer, holds the
+    session are answered together by one file_hash IN (...) query.
+    """
+
+    def __init__(self, db: AsyncSession, db_lock: asyncio.Lock):
+        self._db = db
+        self._db_lock = db_lock
+        self._pending: dict[str, asyncio.Future] = {}
+        self._query: Optional[asyncio.Task] = None
+
+    async def contains(self, file_hash: str) -> bool:
+        future = self._pending.get(file_hash)
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            self._pending[file_hash] = future
+            if self._query is None:
+                self._query = asyncio.create_task(self._lookup())
+        return await future
+
+    def close(self) -> None:
+        if self._query is not None:
+            self._query.cancel()
+
+    async def _lookup(self) -> None:
+        async with self._db_lock:
+            pending, self._pending = self._pending, {}
+            self._query = None
+            hashes = list(pending)
+            try:
+                found = set()
+                for start in range(0, len(hashes), LOOKUP_BATCH):
+                    result = await self._db.execute(
+                        select(Item.file_hash).where(Item.file_hash.in_(hashes[start:start + LOOKUP_BATCH]))
+                    )
+                    found.update(result.scalars())
+            except Exception as e:
+                for future in pending.values():
+                    if not future.done():
+                        future.set_exception(e)
+                return
+        for file_hash, future in pending.items():
+            if not future.done():
+                future.set_result(file_hash in found)
+
+
+class ImportPipeline:
+    """
+    Staged, parallel import of local files.
+
+    A walker lists files in batches off the event loop; a bounded number of
+    stage tasks send each file to a pool of worker processes, first to hash
+    it and then, if the vault does not have it yet, to copy it into the
+    content store, and then to the sandboxed extraction_pool for its text
+    and thumbnail; a single writer task classifies the results and inserts
+    them in batches. Hashing, PDF/DOCX parsing and thumbnailing thus use
+    every core while the event loop stays free to serve other requests,
+    and a file the parsers choke on only fails its own extraction. Given a
+    scan manifest, the writer also records each file's stat and hash in
+    it, and files it knows by stat are not hashed again.
+    """
+
+    def __init__(self, workers: Optional[int] = None):
+        self._workers = workers
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    @property
+    def workers(self) -> int:
+        if self._workers is None:
+            self._workers = get_settings().import_config.workers or os.cpu_count() or 1
+        return self._workers
+
+    def _executor(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # spawn: forking a process that runs an event loop and database
+            # threads is not safe
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._pool
+
+    def shutdown(self) -> None:
+        """Stop the worker processes."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def _discard(self, pool: ProcessPoolExecutor) -> None:
+        """Drop a broken pool; the next run starts a new one."""
+        # Another run may have replaced it already, and its pool is fine
+        if self._pool is pool:
+            self._pool = None
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    async def run(
+        self,
+        db: AsyncSession,
+        files: Iterable[Path],
+        category_id: Optional[int] = None,
+        auto_classify: bool = True,
+        on_file: Optional[FileCallback] = None,
+        manifest: Optional[ScanManifest] = None,
+        archive_name: Optional[str] = None,
+    ) -> ImportResult:
+        """
+        Import files, skipping contents already in the vault.
+
+        Items are committed in batches as they are ready, so an interrupted
+        import keeps what it has written. on_file may add rows to the
+        session to be committed together with each file's outcome.
+
+        Archives (.zip, .tar.gz, ...) are imported as directories: each
+        supported member becomes an item whose original_path is
+        "<archive>!<member>". archive_name stands in for the path of an
+        archive imported on its own, such as an upload in a temporary file.
+        """
+        settings = get_settings()
+        loop = asyncio.get_running_loop()
+        pool = self._executor()
+        result = ImportResult()
+
+        paths: asyncio.Queue = asyncio.Queue(maxsize=WALK_BATCH)
+        ready: asyncio.Queue = asyncio.Queue(maxsize=WRITE_BATCH * 2)
+        db_lock = asyncio.Lock()  # the session is shared by the stages and the writer
+        claimed: set[str] = set()  # hashes imported by this run
+        vault_hashes = _VaultHashes(db, db_lock)
+        stages = self.workers * 2  # keep every worker busy while results are handled
+
+        async def walk() -> None:
+            iterator: Iterator[Path] = iter(files)
+            try:
+                while batch := await asyncio.to_thread(lambda: [p for _, p in zip(range(WALK_BATCH), iterator)]):
+                    for path in batch:
+                        await paths.put(path)
+            except Exception as e:
+                result.errors.append(f"Error listing files: {e}")
+            finally:
+                for _ in range(stages):
+                    await paths.put(None)
+
+        async def stage() -> None:
+            while (path := await paths.get()) is not None:
+                if is_archive(archive_name or path.name):
+                    for outcome in await prepare_archive(path):
+                        await ready.put(outcome)
+                else:
+                    await ready.put(await prepare(path))
+
+        async def prepare(path: Path) -> _Outcome:
+            outcome = _Outcome(path)
+            try:
+                # Taken before reading, so that a change while hashing is seen by the next scan
+                outcome.stat = path.stat()
+                if outcome.stat.st_size > settings.storage.max_file_size:
+                    outcome.error = f"File too large: {path.name}"
+                    return outcome
+
+                known_hash = manifest.known_hash(outcome.stat) if manifest is not None else None
+                if known_hash is not None:
+                    outcome.file_hash, outcome.file_size = known_hash, outcome.stat.st_size
+                else:
+                    outcome.file_hash, outcome.file_size = await loop.run_in_executor(pool, hash_file, str(path))
+                if outcome.file_hash in claimed:
+                    return outcome
+                claimed.add(outcome.file_hash)
+
+                if not await vault_hashes.contains(outcome.file_hash):
+                    relative_path = await loop.run_in_executor(
+                        pool, store_file, str(path), outcome.file_hash, str(settings.files_path),
+                        settings.import_config.ingest_mode,
+                    )
+                    outcome.file_data = await _process_stored(relative_path)
+            except Exception as e:
+                if isinstance(e, BrokenProcessPool):
+                    # A worker died (e.g. killed for memory); start over next run
+                    self._discard(pool)
+                # Let another copy of the same content have a go
+                if outcome.file_data is None and outcome.file_hash is not None:
+                    claimed.discard(outcome.file_hash)
+                outcome.error = f"Error importing {path.name}: {e}"
+            return outcome
+
+        async def prepare_archive(path: Path) -> list[_Outcome]:
+            name = archive_name or str(path)
+            try:
+                st = path.stat()
+                members = await loop.run_in_executor(
+                    pool, store_archive, str(path), name, str(settings.files_path),
+                    settings.storage.max_file_size,
+                )
+            except Exception as e:
+                if isinstance(e, BrokenProcessPool):
+                    self._discard(pool)
+                return [_Outcome(path, error=f"Error importing {Path(name).name}: {e}")]
+
+            outcomes = []
+            new_members = []
+            for member in members:
+                outcome = _Outcome(
+                    Path(member_path(name, member["name"])),
+                    stat=st,
+                    file_hash=member["file_hash"],
+                    file_size=member["size"],
+                )
+                outcomes.append(outcome)
+                if manifest is not None:
+                    manifest.seen.add(str(outcome.path))
+                if member["error"] is not None:
+                    outcome.error = f"Error importing {outcome.name}: {member['error']}"
+                    continue
+                try:
+                    new = outcome.file_hash not in claimed
+                    claimed.add(outcome.file_hash)
+                    if not new or await vault_hashes.contains(outcome.file_hash):
+                        if member["created"]:
+                            # The content is stored under another extension already
+                            (settings.files_path / member["relative_path"]).unlink(missing_ok=True)
+                        continue
+                    new_members.append((outcome, member["relative_path"]))
+                except Exception as e:
+                    if new:
+                        claimed.discard(outcome.file_hash)
+                    outcome.error = f"Error importing {outcome.name}: {e}"
+
+            async def process(outcome: _Outcome, relative_path: str) -> None:
+                outcome.file_data = await _process_stored(relative_path)
+
+            # Members are extracted side by side, in as many workers as there are
+            await asyncio.gather(*(process(outcome, relative_path) for outcome, relative_path in new_members))
+            return outcomes
+
+        async def write() -> None:
+            batch = []
+            while (outcome := await ready.get()) is not None:
+                batch.append(outcome)
+                if len(batch) >= WRITE_BATCH or ready.empty():
+                    await self._write_batch(db, db_lock, batch, category_id, auto_classify, result, on_file, manifest)
+                    batch = []
+            if batch:
+                await self._write_batch(db, db_lock, batch, category_id, auto_classify, result, on_file, manifest)
+
+        async def feed() -> None:
+            await asyncio.gather(walk(), *(stage() for _ in range(stages)))
+            await ready.put(None)
+
+        tasks = [asyncio.create_task(feed()), asyncio.create_task(write())]
+        try:
+            # A writer that failed no longer drains ready, so the stages
+            # would wait on it forever: stop them and raise its error
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+            for task in done:
+                task.result()
+        finally:
+            # Make sure the writer is done with the session before returning
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            vault_hashes.close()
+        return result
+
+    async def _write_batch(
+        self,
+        db: AsyncSession,
+        db_lock: asyncio.Lock,
+        batch: list[_Outcome],
+        category_id: Optional[int],
+        auto_classify: bool,
+        result: ImportResult,
+        on_file: Optional[FileCallback],
+        manifest: Optional[ScanManifest],
+    ) -> None:
+        """
+        Classify and insert a batch of processed files in one transaction.
+
+        Items are inserted with one executemany INSERT ... RETURNING; a
+        file whose content another writer (say, an upload) stored in the
+        meantime hits the unique file_hash index and is skipped.
+        """
+        storage = StorageService()
+        classifier = Classifier()
+        now = datetime.utcnow()
+        retries: list[int] = []  # items whose extraction failed
+
+        async with db_lock:
+            try:
+                rows = []
+                for outcome in batch:
+                    if outcome.file_data is None or outcome.error is not None:
+                        continue
+                    file_data = outcome.file_data
+                    item_category_id = category_id
+                    confidence = None
+                    if auto_classify and not item_category_id:
+                        text_for_classification = file_data.get('extracted_text', '') or outcome.name
+                        item_category_id, confidence = await classifier.classify(
+                            text_for_classification,
+                            file_path=outcome.path,
+                            session=db,
+                        )
+
+                    outcome.category_id = item_category_id
+                    rows.append({
+                        "title": outcome.name,
+                        "content_type": "file",
+                        "file_path": file_data['relative_path'],
+                        "original_path": str(outcome.path),
+                        "extracted_text": file_data.get('extracted_text'),
+                        "file_hash": outcome.file_hash,
+                        "file_size": outcome.file_size,
+                        "mime_type": file_data.get('mime_type'),
+                        "category_id": item_category_id,
+                        "confidence": confidence,
+                        "item_metadata": file_data.get('metadata'),
+                        "created_at": now,
+                        "updated_at": now,
+                    })
+
+                # Core statements skip the ORM, and the session hooks that
+                # keep the search indexes current; see _items_inserted()
+                conn = await db.connection()
+                inserted = {}
+                if rows:
+                    returned = await conn.execute(
+                        insert(Item).on_conflict_do_nothing().returning(Item.id, Item.file_hash),
+                        rows,
+                    )
+                    inserted = {file_hash: item_id for item_id, file_hash in returned.tuples()}
+                    await conn.run_sync(index_items, inserted.values(), get_settings().search.fts_tokenizer)
+
+                thumbnails = []
+                for outcome in batch:
+                    if outcome.file_data is None or outcome.error is not None:
+                        continue
+                    outcome.item_id = inserted.get(outcome.file_hash)
+                    if outcome.item_id is not None and outcome.file_data.get('thumbnail_data'):
+                        thumbnails.append({
+                            "item_id": outcome.item_id,
+                            "thumbnail_path": await storage.save_thumbnail(
+                                outcome.file_data['thumbnail_data'],
+                                outcome.item_id,
+                            ),
+                        })
+                await conn.run_sync(write_signatures, {
+                    outcome.item_id: outcome.file_data.get('signature')
+                    for outcome in batch if outcome.item_id is not None
+                })
+                if thumbnails:
+                    table = Item.__table__
+                    await conn.execute(
+                        update(table)
+                        .where(table.c.id == bindparam("item_id"))
+                        .values(thumbnail_path=bindparam("thumbnail_path")),
+                        thumbnails,
+                    )
+
+                retries += [
+                    outcome.item_id for outcome in batch
+                    if outcome.item_id is not None and extraction_retryable(outcome.file_data)
+                ]
+                await queue_retries(db, retries)
+
+                for outcome in batch:
+                    if on_file is not None:
+                        on_file(outcome.path, outcome.status, outcome.item_id, outcome.error)
+
+                if manifest is not None:
+                    await manifest.record(db, [
+                        (outcome.path, outcome.stat, outcome.file_hash)
+                        for outcome in batch
+                        if outcome.error is None and outcome.file_hash is not None
+                    ])
+
+                await db.commit()
+            except Exception as e:
+                await db.rollback()
+                retries = []
+                for outcome in batch:
+                    if outcome.file_data is not None and outcome.error is None:
+                        outcome.item_id = None
+                        outcome.error = f"Error importing {outcome.name}: {e}"
+                    if on_file is not None:
+                        on_file(outcome.path, outcome.status, None, outcome.error)
+                await db.commit()
+
+        _items_inserted([
+            (outcome.item_id, outcome.name, outcome.category_id)
+            for outcome in batch if outcome.item_id is not None
+        ], now)
+        if retries:
+            extraction_retries.wake()
+
+        for outcome in batch:
+            if outcome.item_id is not None:
+                result.item_ids.append(outcome.item_id)
+            else:
+                result.skipped += 1
+                if outcome.error is not None:
+                    result.errors.append(outcome.error)
+
+    async def run_urls(
+        self,
+        db: AsyncSession,
+        urls: Iterable[str],
+        category_id: Optional[int] = None,
+        auto_classify: bool = True,
+        on_url: Optional[UrlCallback] = None,
+    ) -> ImportResult:
+        """
+        Import web pages, skipping URLs already in the vault.
+
+        Pages are fetched concurrently through url_fetcher, which limits
+        requests per host and retries failures, and committed in batches
+        as they arrive, like files in run(). A URL stored before is
+        skipped without being requested.
+        """
+        result = ImportResult()
+        ready: asyncio.Queue = asyncio.Queue()
+        in_flight = asyncio.Semaphore(LOOKUP_BATCH)  # url_fetcher holds the real limits
+        db_lock = asyncio.Lock()
+        claimed: set[str] = set()  # final URLs imported by this run
+        tasks: set[asyncio.Task] = set()
+
+        async def fetch(url: str) -> None:
+            page = _Page(url)
+            try:
+                page.page_data = await url_fetcher.scrape(url)
+                page.page_data['signature'] = await asyncio.to_thread(
+                    minhash_signature, page.page_data.get('extracted_text'),
+                )
+            except Exception as e:
+                page.error = f"Error importing {url}: {e}"
+            finally:
+                in_flight.release()
+            await ready.put(page)
+
+        async def start() -> None:
+            iterator = iter(dict.fromkeys(urls))
+            while chunk := list(itertools.islice(iterator, LOOKUP_BATCH)):
+                async with db_lock:
+                    known = set(await db.scalars(select(Item.url).where(Item.url.in_(chunk))))
+                for url in chunk:
+                    if url in known:
+                        await ready.put(_Page(url))
+                        continue
+                    await in_flight.acquire()
+                    task = asyncio.create_task(fetch(url))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+
+        async def write() -> None:
+            batch = []
+            while (page := await ready.get()) is not None:
+                batch.append(page)
+                if len(batch) >= WRITE_BATCH or ready.empty():
+                    await self._write_pages(db, db_lock, batch, category_id, auto_classify, result, claimed, on_url)
+                    batch = []
+            if batch:
+                await self._write_pages(db, db_lock, batch, category_id, auto_classify, result, claimed, on_url)
+
+        writer = asyncio.create_task(write())
+        try:
+            try:
+                await start()
+            except Exception as e:
+                result.errors.append(f"Error listing URLs: {e}")
+            while tasks:
+                await asyncio.gather(*tasks)
+            await ready.put(None)
+            await writer
+        finally:
+            for task in [*tasks, writer]:
+                task.cancel()
+            await asyncio.gather(*tasks, writer, return_exceptions=True)
+        return result
+
+    async def _write_pages(
+        self,
+        db: AsyncSession,
+        db_lock: asyncio.Lock,
+        batch: list[_Page],
+        category_id: Optional[int],
+        auto_classify: bool,
+        result: ImportResult,
+        claimed: set[str],
+        on_url: Optional[UrlCallback],
+    ) -> None:
+        """
+        Classify and insert a batch of fetched pages in one transaction.
+
+        A page is skipped when the URL it ended up at, after redirects,
+        is in the vault or was imported by this run already.
+        """
+        classifier = Classifier()
+        now = datetime.utcnow()
+        claims = []
+
+        async with db_lock:
+            try:
+                fetched = [page for page in batch if page.page_data is not None and page.error is None]
+                final_urls = [page.page_data['url'] for page in fetched]
+                known = set(await db.scalars(select(Item.url).where(Item.url.in_(final_urls))))
+
+                rows = []
+                for page in fetched:
+                    page_data = page.page_data
+                    if page_data['url'] in known or page_data['url'] in claimed:
+                        page.page_data = None
+                        continue
+                    claimed.add(page_data['url'])
+                    claims.append(page_data['url'])
+                    item_category_id = category_id
+                    confidence = None
+                    if auto_classify and not item_category_id:
+                        text_for_classification = (
+                            f"{page_data['title']} {page_data.get('description', '')} "
+                            f"{page_data.get('extracted_text', '')[:2000]}"
+                        )
+                        item_category_id, confidence = await classifier.classify(
+                            text_for_classification,
+                            session=db,
+                        )
+
+                    page.category_id = item_category_id
+                    rows.append({
+                        "title": page_data['title'],
+                        "content_type": "url",
+                        "url": page_data['url'],
+                        "description": page_data.get('description'),
+                        "extracted_text": page_data.get('extracted_text'),
+                        "category_id": item_category_id,
+                        "confidence": confidence,
+                        "item_metadata": page_data.get('metadata'),
+                        "created_at": now,
+                        "updated_at": now,
+                    })
+
+                # Core, as in _write_batch(); see _items_inserted()
+                inserted = {}
+                if rows:
+                    conn = await db.connection()
+                    returned = await conn.execute(insert(Item).returning(Item.id, Item.url), rows)
+                    inserted = {url: item_id for item_id, url in returned.tuples()}
+                    await conn.run_sync(index_items, inserted.values(), get_settings().search.fts_tokenizer)
+                for page in batch:
+                    if page.page_data is not None and page.error is None:
+                        page.item_id = inserted.get(page.page_data['url'])
+                if inserted:
+                    await conn.run_sync(write_signatures, {
+                        page.item_id: page.page_data['signature']
+                        for page in batch if page.item_id is not None
+                    })
+
+                for page in batch:
+                    if on_url is not None:
+                        on_url(page.url, page.status, page.item_id, page.error)
+
+                await db.commit()
+            except Exception as e:
+                await db.rollback()
+                claimed.difference_update(claims)
+                for page in batch:
+                    if page.page_data is not None and page.error is None:
+                        page.item_id = None
+                        page.error = f"Error importing {page.url}: {e}"
+                    if on_url is not None:
+                        on_url(page.url, page.status, None, page.error)
+                await db.commit()
+
+        _items_inserted([
+            (page.item_id, page.page_data['title'], page.category_id)
+            for page in batch if page.item_id is not None
+        ], now)
+
+        for page in batch:
+            if page.item_id is not None:
+                result.item_ids.append(page.item_id)
+            else:
+                result.skipped += 1
+                if page.error is not None:
+                    result.errors.append(page.error)
+
+
+def _items_inserted(items: list[tuple[int, str, Optional[int]]], created_at: datetime) -> None:
+    """Tell the search indexes about (id, title, category_id) items committed with Core statements."""
+    if not items:
+        return
+    item_cache.invalidate()
+    vector_index.mark_dirty({item_id for item_id, _, _ in items})
+    for item_id, title, category_id in items:
+        suggestion_index.upsert_item(item_id, title, created_at, False)
+        if category_id is not None:
+            suggestion_index.adjust_count("category", category_id, 1)
+
+
+import_pipeline = ImportPipeline()
+
+
+# ---- URLs ----
+
+async def import_url_item(
+    db: AsyncSession,
+    url: str,
+    category_id: Optional[int] = None,
+    auto_classify: bool = True,
+) -> Item:
+    """
+    Fetch a web page and store it as an item.
+
+    Raises:
+        ValueError: If the page cannot be fetched or is already in the vault
+    """
+    classifier = Classifier()
+
+    try:
+        # Scrape URL
+        page_data = await url_fetcher.scrape(url)
+    except Exception as e:
+        raise ValueError(f"Failed to fetch URL: {str(e)}")
+
+    # Check for duplicates
+    existing = await db.execute(
+        select(Item).where(Item.url == page_data['url'])
+    )
+    if existing.scalar_one_or_none():
+        raise ValueError("URL already exists in vault")
+
+    # Auto-classify if enabled
+    confidence = None
+    if auto_classify and not category_id:
+        text_for_classification = (
+            f"{page_data['title']} {page_data.get('description', '')} "
+            f"{page_data.get('extracted_text', '')[:2000]}"
+        )
+        category_id, confidence = await classifier.classify(
+            text_for_classification,
+            session=db,
+        )
+
+    # Create item
+    item = Item(
+        title=page_data['title'],
+        content_type="url",
+        url=page_data['url'],
+        description=page_data.get('description'),
+        extracted_text=page_data.get('extracted_text'),
+        category_id=category_id,
+        confidence=confidence,
+        item_metadata=page_data.get('metadata'),
+    )
+
+    db.add(item)
+    await db.commit()
+    await db.refresh(item)
+    return item
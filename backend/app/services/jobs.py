@@ -0,0 +1,389 @@
+"""Background import jobs with persisted, resumable progress."""
+
+import asyncio
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..database import async_session_maker
+from ..models import Job, JobFile
+from ..schemas.job import JobFileResponse, JobResponse
+from ..utils.archive import is_archive, split_member
+from .file_processor import FileProcessor
+from .import_pipeline import import_pipeline, import_url_item
+from .scan_manifest import ScanManifest
+
+TERMINAL_STATUSES = ("completed", "failed", "cancelled")
+UNFINISHED_STATUSES = ("queued", "running")
+
+ERROR_LIMIT = 20  # failed files returned with a job
+
+
+@dataclass
+class JobProgress:
+    """Live counters of a running job, ahead of what is committed."""
+    discovered: int = 0
+    imported: int = 0
+    skipped: int = 0
+    failed: int = 0
+    unchanged: int = 0
+    moved: int = 0
+    deleted: int = 0
+    current: Optional[str] = None
+
+
+class JobManager:
+    """
+    Runs import jobs as background tasks.
+
+    Every finished file is recorded in job_files in the same transaction
+    as its item, so a job interrupted by a crash or restart is resumed at
+    startup and skips the files already recorded instead of hashing them
+    again. Listeners (the SSE endpoint) get a snapshot of a job at most
+    every PUBLISH_INTERVAL seconds while it runs, and when it ends.
+    """
+
+    PUBLISH_INTERVAL = 0.5
+
+    def __init__(self):
+        self._tasks: dict[int, asyncio.Task] = {}
+        self._progress: dict[int, JobProgress] = {}
+        self._snapshots: dict[int, JobResponse] = {}
+        self._listeners: dict[int, set[asyncio.Queue]] = {}
+        self._pending_publish: set[int] = set()
+        self._cancelling: set[int] = set()
+
+    # ---- Lifecycle ----
+
+    async def create(self, db: AsyncSession, job_type: str, params: dict) -> Job:
+        """Persist a new job and start it."""
+        job = Job(job_type=job_type, status="queued", params=params)
+        db.add(job)
+        await db.commit()
+        self.start(job.id)
+        return job
+
+    def start(self, job_id: int) -> None:
+        """Run a job in the background unless it is running already."""
+        if job_id in self._tasks:
+            return
+        task = asyncio.create_task(self._run(job_id))
+        self._tasks[job_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(job_id, None))
+
+    async def resume_unfinished(self) -> None:
+        """Restart jobs that were queued or running when the server stopped."""
+        async with async_session_maker() as db:
+            result = await db.execute(
+                select(Job.id).where(Job.status.in_(UNFINISHED_STATUSES)).order_by(Job.id)
+            )
+            for job_id in result.scalars().all():
+                self.start(job_id)
+
+    async def stop(self) -> None:
+        """Stop running jobs, leaving them to be resumed on the next start."""
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def wait(self, job_id: int) -> None:
+        """Wait until a job started by this process has ended."""
+        task = self._tasks.get(job_id)
+        if task is not None:
+            # Unlike gather(), wait() leaves the job running if the waiter is cancelled
+            await asyncio.wait({task})
+
+    async def cancel(self, db: AsyncSession, job_id: int) -> Optional[Job]:
+        """
+        Cancel a job; items imported so far are kept.
+
+        Returns:
+            The job, or None if there is no such job
+        """
+        task = self._tasks.get(job_id)
+        if task is not None:
+            self._cancelling.add(job_id)
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+        job = await db.get(Job, job_id, populate_existing=True)
+        if job is not None and job.status in UNFINISHED_STATUSES:
+            job.status = "cancelled"
+            job.finished_at = datetime.utcnow()
+            await db.commit()
+        return job
+
+    async def resume(self, db: AsyncSession, job_id: int) -> Optional[Job]:
+        """
+        Restart a failed or cancelled job where it stopped.
+
+        Returns:
+            The job, or None if there is no such job
+        """
+        job = await db.get(Job, job_id)
+        if job is not None and job.status in ("failed", "cancelled"):
+            job.status = "queued"
+            job.error = None
+            job.finished_at = None
+            await db.commit()
+            self.start(job_id)
+        return job
+
+    # ---- Running ----
+
+    async def _run(self, job_id: int) -> None:
+        async with async_session_maker() as db:
+            job = await db.get(Job, job_id)
+            if job is None or job.status in TERMINAL_STATUSES:
+                return
+
+            progress = JobProgress()
+            for status, count in await self._counts(db, job_id):
+                setattr(progress, status, count)
+            self._progress[job_id] = progress
+
+            job.status = "running"
+            job.started_at = job.started_at or datetime.utcnow()
+            await db.commit()
+            self._snapshots[job_id] = await self.describe(db, job)
+            self._publish(job_id)
+
+            try:
+                if job.job_type == "path":
+                    await self._run_path(db, job, progress)
+                elif job.job_type == "urls":
+                    await self._run_urls(db, job, progress)
+                else:
+                    await self._run_url(db, job, progress)
+                status, error = "completed", None
+            except asyncio.CancelledError:
+                if job_id not in self._cancelling:
+                    # Server shutdown: leave the job running, to be resumed
+                    self._progress.pop(job_id, None)
+                    raise
+                status, error = "cancelled", None
+            except Exception as e:
+                status, error = "failed", str(e)
+            finally:
+                self._cancelling.discard(job_id)
+
+            await db.rollback()
+            job = await db.get(Job, job_id, populate_existing=True)
+            job.status = status
+            job.error = error
+            job.finished_at = datetime.utcnow()
+            if status == "completed":
+                job.total = progress.discovered
+            # Not recorded per file in job_files, so kept on the job
+            job.unchanged = progress.unchanged
+            await db.commit()
+
+            self._progress.pop(job_id, None)
+            self._snapshots[job_id] = await self.describe(db, job)
+            self._publish(job_id)
+            self._snapshots.pop(job_id, None)
+
+    async def _done_paths(self, db: AsyncSession, job_id: int) -> set[str]:
+        result = await db.execute(select(JobFile.path).where(JobFile.job_id == job_id))
+        return set(result.scalars().all())
+
+    async def _run_path(self, db: AsyncSession, job: Job, progress: JobProgress) -> None:
+        source = Path(job.params["path"])
+        if not source.exists():
+            raise ValueError(f"Path not found: {source}")
+        # Watched folders import just the paths that changed (files or directories)
+        paths = job.params.get("paths")
+        done = await self._done_paths(db, job.id)
+        manifest = await ScanManifest.load(db, source)
+        job_id = job.id
+
+        def files() -> Iterator[Path]:
+            # Runs in the pipeline's walker thread
+            for path in FileProcessor.find_files(source, None if paths is None else map(Path, paths)):
+                # The members of an archive that is read are counted as the writer reports them
+                changed = manifest.check(path)
+                if not (changed and is_archive(path.name)):
+                    progress.discovered += 1
+                if str(path) in done:
+                    continue
+                if changed:
+                    yield path
+                else:
+                    progress.unchanged += 1
+            manifest.complete = True
+
+        def on_file(path: Path, status: str, item_id: Optional[int], error: Optional[str]) -> None:
+            if split_member(str(path)) is not None:
+                progress.discovered += 1
+                if str(path) in done:
+                    return  # Recorded before the job was resumed
+            db.add(JobFile(
+                job_id=job_id,
+                path=str(path),
+                status=status,
+                item_id=item_id,
+                error=error,
+            ))
+            setattr(progress, status, getattr(progress, status) + 1)
+            progress.current = str(path)
+            self._schedule_publish(job_id)
+
+        await import_pipeline.run(
+            db,
+            files(),
+            category_id=job.params.get("category_id"),
+            auto_classify=job.params.get("auto_classify", True),
+            on_file=on_file,
+            manifest=manifest,
+        )
+        if job.params.get("sync"):
+            await manifest.sync(db, on_file, scope=paths)
+
+    async def _run_url(self, db: AsyncSession, job: Job, progress: JobProgress) -> None:
+        url = job.params["url"]
+        job_id = job.id
+        progress.discovered = 1
+        if url in await self._done_paths(db, job_id):
+            return
+        try:
+            item = await import_url_item(
+                db,
+                url,
+                category_id=job.params.get("category_id"),
+                auto_classify=job.params.get("auto_classify", True),
+            )
+            record = JobFile(job_id=job_id, path=url, status="imported", item_id=item.id)
+            progress.imported += 1
+        except ValueError as e:
+            await db.rollback()
+            record = JobFile(job_id=job_id, path=url, status="failed", error=str(e))
+            progress.failed += 1
+        db.add(record)
+        await db.commit()
+        progress.current = url
+
+    async def _run_urls(self, db: AsyncSession, job: Job, progress: JobProgress) -> None:
+        urls = job.params["urls"]
+        job_id = job.id
+        progress.discovered = len(urls)
+        done = await self._done_paths(db, job_id)
+
+        def on_url(url: str, status: str, item_id: Optional[int], error: Optional[str]) -> None:
+            db.add(JobFile(
+                job_id=job_id,
+                path=url,
+                status=status,
+                item_id=item_id,
+                error=error,
+            ))
+            setattr(progress, status, getattr(progress, status) + 1)
+            progress.current = url
+            self._schedule_publish(job_id)
+
+        await import_pipeline.run_urls(
+            db,
+            [url for url in urls if url not in done],
+            category_id=job.params.get("category_id"),
+            auto_classify=job.params.get("auto_classify", True),
+            on_url=on_url,
+        )
+
+    # ---- Status ----
+
+    async def _counts(self, db: AsyncSession, job_id: int) -> list[tuple[str, int]]:
+        result = await db.execute(
+            select(JobFile.status, func.count())
+            .where(JobFile.job_id == job_id)
+            .group_by(JobFile.status)
+        )
+        return result.tuples().all()
+
+    async def describe(self, db: AsyncSession, job: Job, with_errors: bool = True) -> JobResponse:
+        """Job status with live counters if it is running, else committed ones."""
+        response = JobResponse(
+            id=job.id,
+            job_type=job.job_type,
+            status=job.status,
+            params=job.params,
+            total=job.total,
+            error=job.error,
+            created_at=job.created_at,
+            started_at=job.started_at,
+            finished_at=job.finished_at,
+        )
+        progress = self._progress.get(job.id)
+        if progress is None:
+            progress = JobProgress()
+            for status, count in await self._counts(db, job.id):
+                setattr(progress, status, count)
+            progress.discovered = job.total or 0
+            progress.unchanged = job.unchanged or 0
+        response.discovered = progress.discovered
+        response.imported = progress.imported
+        response.skipped = progress.skipped
+        response.failed = progress.failed
+        response.unchanged = progress.unchanged
+        response.moved = progress.moved
+        response.deleted = progress.deleted
+        response.current = progress.current
+
+        if with_errors:
+            result = await db.execute(
+                select(JobFile)
+                .where(JobFile.job_id == job.id, JobFile.status == "failed")
+                .order_by(JobFile.id.desc())
+                .limit(ERROR_LIMIT)
+            )
+            response.errors = [JobFileResponse.model_validate(row) for row in result.scalars().all()]
+        return response
+
+    # ---- Listeners ----
+
+    def subscribe(self, job_id: int) -> asyncio.Queue:
+        """Queue receiving the latest snapshot of a job as it changes."""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=1)
+        self._listeners.setdefault(job_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, job_id: int, queue: asyncio.Queue) -> None:
+        listeners = self._listeners.get(job_id)
+        if listeners is not None:
+            listeners.discard(queue)
+            if not listeners:
+                del self._listeners[job_id]
+
+    def _schedule_publish(self, job_id: int) -> None:
+        if job_id not in self._pending_publish and job_id in self._listeners:
+            self._pending_publish.add(job_id)
+            asyncio.get_running_loop().call_later(self.PUBLISH_INTERVAL, self._publish, job_id)
+
+    def _publish(self, job_id: int) -> None:
+        self._pending_publish.discard(job_id)
+        snapshot = self._snapshots.get(job_id)
+        if snapshot is None:
+            return
+        progress = self._progress.get(job_id)
+        if progress is not None:
+            snapshot = snapshot.model_copy(update={
+                "discovered": progress.discovered,
+                "imported": progress.imported,
+                "skipped": progress.skipped,
+                "failed": progress.failed,
+                "unchanged": progress.unchanged,
+                "moved": progress.moved,
+                "deleted": progress.deleted,
+                "current": progress.current,
+            })
+        for queue in self._listeners.get(job_id, ()):
+            # Only the latest state matters to a listener that fell behind
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(snapshot)
+
+
+job_manager = JobManager()
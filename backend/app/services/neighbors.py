@@ -0,0 +1,303 @@
+"""Precomputed nearest-neighbour lists for "more like this" lookups."""
+
+import asyncio
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..config import get_settings
+from ..database import async_session_maker
+from ..models import Item
+from .vector_index import TopK, VectorIndex, exclude_block, vector_index
+
+
+class NeighborIndex:
+    """
+    Top-k most similar items of every item, stored next to the vectors.
+
+    Row i of two memory-mapped matrices holds the neighbour IDs (-1 for
+    empty slots) and similarities of item i, so a lookup reads one row.
+
+    Lists are maintained by a background worker: item writes only queue
+    IDs, and the worker wakes after a short delay to process everything
+    queued in one batch. For each changed item it recomputes the item's own
+    list with a batched scan of the vector matrix, and the same scan patches
+    every other list the item now enters or must leave; lists left with a
+    weaker tail than before are recomputed in the next batch.
+    """
+
+    IDS_FILE = "neighbors_ids.i32"
+    SCORES_FILE = "neighbors_scores.f32"
+    META_FILE = "neighbors.json"
+
+    GROW_ROWS = 4096
+    UPDATE_BATCH = 256
+    BATCH_DELAY = 1.0  # seconds to gather writes before updating
+
+    def __init__(self, vectors: VectorIndex, k: Optional[int] = None):
+        self._vectors = vectors
+        self._k = k
+        self._ids: Optional[np.memmap] = None
+        self._scores: Optional[np.memmap] = None
+        self._synced_at: Optional[datetime] = None
+        self._pending: set[int] = set()  # items whose vectors changed
+        self._refill: set[int] = set()  # items whose list may miss an entry
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+        vectors.add_listener(self.schedule)
+
+    @property
+    def k(self) -> int:
+        if self._k is None:
+            self._k = get_settings().semantic.neighbors
+        return self._k
+
+    # ---- Background worker ----
+
+    def start(self) -> None:
+        """Start the background worker (and catch up on startup)."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+            self._wake.set()
+
+    async def stop(self) -> None:
+        """Stop the background worker."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def schedule(self, item_ids: set[int]) -> None:
+        """Queue items whose neighbours must be recomputed."""
+        self._pending |= item_ids
+        self._wake.set()
+
+    async def _run(self) -> None:
+        while True:
+            await self._wake.wait()
+            await asyncio.sleep(self.BATCH_DELAY)
+            self._wake.clear()
+            try:
+                async with async_session_maker() as session:
+                    await self.refresh(session)
+            except Exception as e:
+                print(f"Neighbor index update failed: {e}")
+
+    async def refresh(self, session: AsyncSession) -> None:
+        """Bring vectors up to date, then update the lists of queued items."""
+        # Opening (or building) the vector index queues any stale items first
+        await self._vectors.ensure_current(session)
+
+        async with self._lock:
+            if self._ids is None:
+                if self._open():
+                    await self._catch_up(session)
+                else:
+                    self._create()
+                    result = await session.execute(select(Item.id))
+                    self._pending |= set(result.scalars().all())
+
+            started = datetime.utcnow()
+            while self._pending or self._refill:
+                changed, self._pending = self._pending, set()
+                refill, self._refill = self._refill - changed, set()
+                try:
+                    # Items queued so far have their vectors written first
+                    await self._vectors.ensure_current(session)
+                    queued = np.zeros(len(self._ids), dtype=bool)
+                    queued[[i for i in changed | refill if i < len(queued)]] = True
+                    for item_ids, patch in ((sorted(changed), True), (sorted(refill), False)):
+                        for start in range(0, len(item_ids), self.UPDATE_BATCH):
+                            batch = item_ids[start:start + self.UPDATE_BATCH]
+                            await asyncio.to_thread(self._update, batch, queued, patch)
+                except BaseException:
+                    self._pending |= changed
+                    self._refill |= refill
+                    raise
+            self._synced_at = started
+            self._save()
+
+    async def _catch_up(self, session: AsyncSession) -> None:
+        """Queue items changed or deleted while the worker was not running."""
+        result = await session.execute(select(Item.id, Item.updated_at))
+        existing = set()
+        for item_id, updated_at in result.all():
+            existing.add(item_id)
+            if self._synced_at is None or (updated_at and updated_at > self._synced_at):
+                self._pending.add(item_id)
+        self._pending.update(
+            int(row) for row in np.flatnonzero(self._ids[:, 0] >= 0) if int(row) not in existing
+        )
+
+    # ---- Maintenance ----
+
+    def _update(self, item_ids: list[int], queued: np.ndarray, patch: bool) -> None:
+        """
+        Recompute the lists of a batch of items.
+
+        With patch, the items' vectors changed, so the lists of all other
+        items are patched too: stale references to the batch are dropped,
+        and a batch item is inserted into every list whose weakest entry it
+        now beats. Lists whose weakest entry got weaker are queued for a
+        refill, which recomputes them without patching. The scan that finds the batch's own neighbours yields
+        those similarities, so this costs no extra pass. Lists queued in the
+        same round are left alone, since they are computed from current
+        vectors anyway.
+        """
+        k = self.k
+        min_similarity = get_settings().semantic.min_similarity
+        batch = np.asarray(item_ids, dtype=np.int64)
+        self._ensure_rows(max(int(batch.max()) + 1, self._vectors.rows))
+        if len(queued) < len(self._ids):
+            queued = np.pad(queued, (0, len(self._ids) - len(queued)))
+
+        # Weakest score of each full list that loses an entry below
+        floors = {}
+        if patch:
+            referencing = np.isin(self._ids, batch)
+            referencing[queued] = False
+            for row in np.flatnonzero(referencing.any(axis=1)):
+                if self._ids[row, -1] >= 0:
+                    floors[int(row)] = float(self._scores[row, -1])
+                keep = ~referencing[row]
+                self._write_list(row, self._ids[row][keep], self._scores[row][keep])
+
+            # Similarity a batch item needs to enter each list
+            thresholds = np.where(self._ids[:, -1] >= 0, self._scores[:, -1], min_similarity)
+            thresholds[queued] = np.inf
+
+        vectors = self._vectors.vectors(batch)
+        top = TopK(len(batch), k)
+        entering = []
+        for start, block in self._vectors.blocks():
+            scores = vectors @ block.T
+            exclude_block(scores, batch, start)
+            top.add(scores, start)
+            if patch:
+                hits = np.argwhere(scores > thresholds[start:start + block.shape[0]])
+                entering.extend(
+                    (float(scores[query, row]), start + int(row), int(batch[query]))
+                    for query, row in hits
+                )
+
+        ids, scores = top.result(min_similarity)
+        self._ids[batch] = ids
+        self._scores[batch] = scores
+
+        for score, row, item_id in sorted(entering, reverse=True):
+            row_ids = self._ids[row]
+            row_scores = self._scores[row]
+            if row_ids[-1] >= 0 and score <= row_scores[-1]:
+                continue
+            valid = row_ids >= 0
+            self._write_list(row, np.append(row_ids[valid], item_id), np.append(row_scores[valid], score))
+
+        # A full list whose weakest entry got weaker may be missing an item
+        # that used to rank just below it
+        for row, floor in floors.items():
+            if self._ids[row, -1] < 0 or self._scores[row, -1] < floor:
+                self._refill.add(row)
+
+    def _write_list(self, row: int, ids: np.ndarray, scores: np.ndarray) -> None:
+        """Store a neighbour list sorted by similarity, truncated to k."""
+        order = np.argsort(-scores, kind="stable")[:self.k]
+        padded_ids = np.full(self.k, -1, dtype=np.int32)
+        padded_scores = np.zeros(self.k, dtype=np.float32)
+        padded_ids[:len(order)] = ids[order]
+        padded_scores[:len(order)] = scores[order]
+        self._ids[row] = padded_ids
+        self._scores[row] = padded_scores
+
+    # ---- Storage ----
+
+    @property
+    def directory(self) -> Path:
+        return self._vectors.directory
+
+    def _open(self) -> bool:
+        """Map stored lists; False if missing or built with a different k."""
+        try:
+            meta = json.loads((self.directory / self.META_FILE).read_text())
+        except (OSError, ValueError):
+            return False
+        if meta.get("k") != self.k:
+            return False
+        if not (self.directory / self.IDS_FILE).exists() or not (self.directory / self.SCORES_FILE).exists():
+            return False
+
+        synced_at = meta.get("synced_at")
+        self._synced_at = datetime.fromisoformat(synced_at) if synced_at else None
+        self._map()
+        return True
+
+    def _create(self) -> None:
+        self._close()
+        for name, fill in ((self.IDS_FILE, -1), (self.SCORES_FILE, 0)):
+            path = self.directory / name
+            np.full((self.GROW_ROWS, self.k), fill, dtype=np.int32 if fill else np.float32).tofile(path)
+        self._synced_at = None
+        self._map()
+
+    def _map(self) -> None:
+        rows = (self.directory / self.IDS_FILE).stat().st_size // (4 * self.k)
+        self._ids = np.memmap(self.directory / self.IDS_FILE, dtype=np.int32, mode="r+", shape=(rows, self.k))
+        self._scores = np.memmap(self.directory / self.SCORES_FILE, dtype=np.float32, mode="r+", shape=(rows, self.k))
+
+    def _ensure_rows(self, rows: int) -> None:
+        """Grow both matrices so that they have at least rows rows."""
+        current = len(self._ids)
+        if rows <= current:
+            return
+        new_rows = -(-max(rows, current * 2) // self.GROW_ROWS) * self.GROW_ROWS
+        self._close()
+        for name, fill in ((self.IDS_FILE, -1), (self.SCORES_FILE, 0)):
+            with open(self.directory / name, "ab") as f:
+                np.full((new_rows - current, self.k), fill, dtype=np.int32 if fill else np.float32).tofile(f)
+        self._map()
+
+    def _close(self) -> None:
+        for matrix in (self._ids, self._scores):
+            if matrix is not None:
+                matrix.flush()
+        self._ids = None
+        self._scores = None
+
+    def _save(self) -> None:
+        self._ids.flush()
+        self._scores.flush()
+        meta = {
+            "k": self.k,
+            "synced_at": self._synced_at.isoformat() if self._synced_at else None,
+        }
+        tmp_path = self.directory / (self.META_FILE + ".tmp")
+        tmp_path.write_text(json.dumps(meta))
+        os.replace(tmp_path, self.directory / self.META_FILE)
+
+    # ---- Lookup ----
+
+    def neighbors(self, item_id: int, limit: int) -> list[tuple[int, float]]:
+        """
+        Most similar items to an item, from its stored list.
+
+        Returns:
+            List of (item_id, similarity), most similar first; empty if the
+            item's list has not been computed yet
+        """
+        if self._ids is None or not 0 <= item_id < len(self._ids):
+            return []
+        ids = self._ids[item_id][:limit]
+        scores = self._scores[item_id][:limit]
+        return [(int(i), float(score)) for i, score in zip(ids, scores) if i >= 0]
+
+
+neighbor_index = NeighborIndex(vector_index)
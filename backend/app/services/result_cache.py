@@ -0,0 +1,76 @@
+"""In-process cache for read-heavy aggregate queries, invalidated on writes."""
+
+from collections import OrderedDict
+from typing import Any, Hashable
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from ..models import Item, Category, Tag
+
+# Models whose changes can alter cached item listings, and their tables
+_WATCHED_MODELS = (Item, Category, Tag)
+_WATCHED_TABLES = {"items", "categories", "tags", "item_tags"}
+_WRITE_FLAG = "result_cache_dirty"
+
+
+class ResultCache:
+    """
+    Small LRU cache whose entries are all dropped when vault content changes.
+
+    Invalidation is driven by ORM session events: any committed flush touching
+    items, categories or tags, or any INSERT/UPDATE/DELETE statement on
+    their tables executed through a session, clears the cache. Writes to
+    other tables (scan manifests, retry queues, jobs) leave it alone.
+    """
+
+    def __init__(self, max_entries: int = 64):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[Hashable, Any] = OrderedDict()
+
+    def get(self, key: Hashable) -> Any:
+        """Return the cached value for key, or None."""
+        value = self._entries.get(key)
+        if value is not None:
+            self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Store a value, evicting the least recently used entry if full."""
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self) -> None:
+        """Drop all entries."""
+        self._entries.clear()
+
+
+item_cache = ResultCache()
+
+
+@event.listens_for(Session, "after_flush")
+def _mark_model_writes(session, flush_context):
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, _WATCHED_MODELS):
+            session.info[_WRITE_FLAG] = True
+            return
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _mark_statement_writes(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        if orm_execute_state.statement.table.name in _WATCHED_TABLES:
+            orm_execute_state.session.info[_WRITE_FLAG] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_on_commit(session):
+    if session.info.pop(_WRITE_FLAG, False):
+        item_cache.invalidate()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_write_flag(session):
+    session.info.pop(_WRITE_FLAG, None)
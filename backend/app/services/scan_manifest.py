@@ -0,0 +1,221 @@
+"""Scan manifest for incremental folder imports."""
+
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Optional
+
+from sqlalchemy import delete, exists, func, or_, select
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models import Item, ScanEntry
+from ..utils.archive import base_name, is_archive, split_member
+
+_DELETE_BATCH = 500  # paths per DELETE ... IN
+
+
+def _under(column, root: Path):
+    """SQL condition: column is root or a path below it."""
+    prefix = str(root).rstrip(os.sep) + os.sep
+    return or_(column == str(root), func.substr(column, 1, len(prefix)) == prefix)
+
+
+class ScanManifest:
+    """
+    What earlier scans found under a folder, keyed by path.
+
+    A file whose size, mtime_ns and inode still match its entry, and whose
+    content is still in the vault, is not read again, so rescanning an
+    unchanged folder costs one stat() per file. A file under a new path
+    with the stat of a known entry (a rename or a hard link) reuses that
+    entry's hash. In sync mode, paths recorded before but not seen by the
+    scan are moves if their content was seen at another path, and
+    deletions otherwise.
+
+    Archive members have entries of their own, "<archive>!<member>" with
+    the archive's stat, so an unchanged archive is not opened and a
+    changed one only has its new members processed.
+    """
+
+    def __init__(self, root: Path, entries: dict[str, tuple[int, int, int, str, bool]]):
+        self.root = root
+        # path -> (size, mtime_ns, inode, file_hash, content still in the vault)
+        self._entries = entries
+        self._by_stat = {}
+        # archive path -> paths of its members' entries
+        self._members: dict[str, list[str]] = {}
+        for path, entry in entries.items():
+            archive = split_member(path)
+            if archive is not None:
+                self._members.setdefault(archive[0], []).append(path)
+            else:
+                self._by_stat[entry[:3]] = entry[3]
+        self.seen: set[str] = set()
+        # Set by the caller once every file under the root has been checked;
+        # sync() refuses to run on a partial scan
+        self.complete = False
+
+    @classmethod
+    async def load(cls, db: AsyncSession, root: Path) -> "ScanManifest":
+        """Entries for root and everything below it."""
+        in_vault = exists().where(Item.file_hash == ScanEntry.file_hash)
+        result = await db.execute(
+            select(
+                ScanEntry.path, ScanEntry.size, ScanEntry.mtime_ns, ScanEntry.inode,
+                ScanEntry.file_hash, in_vault,
+            ).where(_under(ScanEntry.path, root))
+        )
+        return cls(root, {path: tuple(entry) for path, *entry in result.tuples()})
+
+    def check(self, path: Path) -> bool:
+        """
+        Note that the scan found a file.
+
+        Returns:
+            False if the file is unchanged since the last scan and its
+            content is in the vault, True if it has to be imported
+        """
+        key = str(path)
+        self.seen.add(key)
+        if is_archive(path.name):
+            return self._check_archive(path)
+        entry = self._entries.get(key)
+        if entry is None or not entry[4]:
+            return True
+        try:
+            st = path.stat()
+        except OSError:
+            return True  # Let the import report it
+        return (st.st_size, st.st_mtime_ns, st.st_ino) != entry[:3]
+
+    def _check_archive(self, path: Path) -> bool:
+        try:
+            st = path.stat()
+        except OSError:
+            return True
+        stat = (st.st_size, st.st_mtime_ns, st.st_ino)
+        # Entries with another stat are members of an earlier version of the archive
+        members = [member for member in self._members.get(str(path), []) if self._entries[member][:3] == stat]
+        if not members or not all(self._entries[member][4] for member in members):
+            return True
+        self.seen.update(members)
+        return False
+
+    def known_hash(self, st: os.stat_result) -> Optional[str]:
+        """Hash of a file whose stat matches an entry, e.g. a renamed file."""
+        return self._by_stat.get((st.st_size, st.st_mtime_ns, st.st_ino))
+
+    async def record(self, db: AsyncSession, files: list[tuple[Path, os.stat_result, str]]) -> None:
+        """Add or update the entries of scanned (path, stat, hash) files, in the caller's transaction."""
+        if not files:
+            return
+        stmt = insert(ScanEntry).values([
+            {
+                "path": str(path),
+                "size": st.st_size,
+                "mtime_ns": st.st_mtime_ns,
+                "inode": st.st_ino,
+                "file_hash": file_hash,
+            }
+            for path, st, file_hash in files
+        ])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[ScanEntry.path],
+            set_={
+                "size": stmt.excluded.size,
+                "mtime_ns": stmt.excluded.mtime_ns,
+                "inode": stmt.excluded.inode,
+                "file_hash": stmt.excluded.file_hash,
+                "scanned_at": datetime.utcnow(),
+            },
+        )
+        await db.execute(stmt)
+
+    async def sync(
+        self,
+        db: AsyncSession,
+        on_file: Optional[Callable[[Path, str, Optional[int], Optional[str]], None]] = None,
+        scope: Optional[list[str]] = None,
+    ) -> tuple[int, int]:
+        """
+        Reconcile the vault with a complete scan: items whose original file
+        is gone, or was overwritten, point to another copy of their content
+        under the root if there is one, and are deleted otherwise. Commits.
+
+        on_file is called with (path, "moved", item_id, None) with the new
+        path, or (old path, "deleted", None, None). With scope, only the
+        listed paths and what is below them were scanned, and only items
+        there are reconciled.
+
+        Returns:
+            Number of items moved and deleted
+
+        Raises:
+            ValueError: If the scan did not finish
+        """
+        if not self.complete:
+            raise ValueError("The scan did not finish; not syncing")
+
+        result = await db.execute(
+            select(ScanEntry.path, ScanEntry.file_hash).where(_under(ScanEntry.path, self.root))
+        )
+        entries = dict(result.tuples().all())
+        # Content found by this scan, for items whose file moved
+        found: dict[str, str] = {}
+        for path, file_hash in entries.items():
+            if path in self.seen:
+                found.setdefault(file_hash, path)
+
+        in_scope = self._in_scope(scope)
+        gone_entries = [path for path in entries if path not in self.seen and in_scope(path)]
+        for start in range(0, len(gone_entries), _DELETE_BATCH):
+            await db.execute(
+                delete(ScanEntry).where(ScanEntry.path.in_(gone_entries[start:start + _DELETE_BATCH]))
+            )
+
+        # Items whose file is gone, or now holds other content
+        result = await db.execute(
+            select(Item.id, Item.original_path, Item.file_hash).where(
+                Item.content_type == "file",
+                _under(Item.original_path, self.root),
+            )
+        )
+        gone_ids = [
+            item_id for item_id, path, file_hash in result.tuples()
+            if in_scope(path) and (path not in self.seen or entries.get(path, file_hash) != file_hash)
+        ]
+
+        moved = deleted = 0
+        for start in range(0, len(gone_ids), _DELETE_BATCH):
+            result = await db.execute(select(Item).where(Item.id.in_(gone_ids[start:start + _DELETE_BATCH])))
+            for item in result.scalars().all():
+                old_path = Path(item.original_path)
+                new_path = found.get(item.file_hash)
+                if new_path is not None:
+                    if item.title == base_name(str(old_path)):
+                        item.title = base_name(new_path)
+                    item.original_path = new_path
+                    moved += 1
+                    if on_file is not None:
+                        on_file(Path(new_path), "moved", item.id, None)
+                else:
+                    await db.delete(item)
+                    deleted += 1
+                    if on_file is not None:
+                        on_file(old_path, "deleted", None, None)
+
+        await db.commit()
+        return moved, deleted
+
+    @staticmethod
+    def _in_scope(scope: Optional[list[str]]) -> Callable[[str], bool]:
+        if scope is None:
+            return lambda path: True
+        roots = set(scope)
+
+        def in_scope(path: str) -> bool:
+            # An archive's members are in scope with the archive
+            path = (split_member(path) or (path,))[0]
+            return path in roots or any(str(parent) in roots for parent in Path(path).parents)
+        return in_scope
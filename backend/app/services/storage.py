@@ -1,7 +1,12 @@
 """Storage service for file management."""
 
+import asyncio
+import errno
 import hashlib
+import mmap
+import os
 import shutil
+import uuid
 from pathlib import Path
 from typing import Optional, BinaryIO
 import aiofiles
@@ -10,6 +15,250 @@ import aiofiles.os
 from ..config import get_settings
 
 
+class FileTooLargeError(ValueError):
+    """Raised when written content exceeds the size limit."""
+
+
+# Read size when a file cannot be memory-mapped
+_READ_BLOCK = 4 * 1024 * 1024
+
+# ioctl(FICLONE): share the source's extents (btrfs, XFS, bcachefs, ...)
+_FICLONE = 0x40049409
+
+def hash_path(path: Path) -> tuple[str, int]:
+    """
+    SHA-256 and size of a file.
+
+    The file is memory-mapped, so the data goes from the page cache
+    straight to the hash (which releases the GIL while it runs) without
+    being copied into Python buffers; files that cannot be mapped are
+    read in large blocks.
+    """
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return hasher.hexdigest(), 0
+        try:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                if hasattr(mmap, "MADV_SEQUENTIAL"):
+                    mapped.madvise(mmap.MADV_SEQUENTIAL)
+                hasher.update(mapped)
+                return hasher.hexdigest(), len(mapped)
+        except (OSError, ValueError):
+            pass  # e.g. a pipe or a file system without mmap
+        size = 0
+        buffer = bytearray(_READ_BLOCK)
+        view = memoryview(buffer)
+        while n := f.readinto(buffer):
+            hasher.update(view[:n])
+            size += n
+    return hasher.hexdigest(), size
+
+
+def store_stream(
+    stream: BinaryIO,
+    files_path: Path,
+    ext: str = "",
+    max_size: Optional[int] = None,
+) -> tuple[str, str, int, bool]:
+    """
+    Copy a stream into the content store, hashing it on the way (synchronous
+    counterpart of BlobWriter, for worker processes and threads).
+
+    If a file with the same hash and extension is already stored, the copy
+    is dropped.
+
+    Returns:
+        Tuple of (relative_path, file_hash, size, created), created telling
+        whether the stored file is new
+
+    Raises:
+        FileTooLargeError: If the stream is longer than max_size
+    """
+    temp_path = files_path / ".tmp" / f"{uuid.uuid4().hex}.part"
+    temp_path.parent.mkdir(parents=True, exist_ok=True)
+    hasher = hashlib.sha256()
+    size = 0
+    try:
+        with open(temp_path, "wb") as f:
+            while block := stream.read(_READ_BLOCK):
+                size += len(block)
+                if max_size is not None and size > max_size:
+                    raise FileTooLargeError(f"File too large. Maximum size is {max_size} bytes")
+                hasher.update(block)
+                f.write(block)
+        file_hash = hasher.hexdigest()
+        relative_path = f"{file_hash[:2]}/{file_hash}{ext}"
+        stored_path = files_path / relative_path
+        created = not stored_path.exists()
+        if created:
+            stored_path.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(temp_path, stored_path)
+    finally:
+        if temp_path.exists():
+            temp_path.unlink()
+    return relative_path, file_hash, size, created
+
+
+def _clone(source: Path, target: Path) -> bool:
+    """Reflink source to target; False if the file system cannot."""
+    if not hasattr(os, "copy_file_range"):
+        return False  # FICLONE is Linux-only, as is copy_file_range
+    import fcntl
+
+    with open(source, "rb") as src, open(target, "wb") as dst:
+        try:
+            fcntl.ioctl(dst.fileno(), _FICLONE, src.fileno())
+            return True
+        except OSError:
+            pass
+
+        # copy_file_range copies in the kernel, and reflinks or does a
+        # server-side copy where the file system supports it
+        size = os.fstat(src.fileno()).st_size
+        copied = 0
+        try:
+            while copied < size:
+                n = os.copy_file_range(src.fileno(), dst.fileno(), size - copied)
+                if n == 0:
+                    break
+                copied += n
+        except OSError as e:
+            if e.errno not in (errno.EXDEV, errno.ENOSYS, errno.EOPNOTSUPP, errno.EINVAL) or copied:
+                raise
+            return False
+        return copied == size
+
+
+def ingest_file(source: Path, target: Path, mode: str = "copy") -> None:
+    """
+    Put a copy of source at target, without reading it in Python if possible.
+
+    With mode "hardlink", target becomes another name for source when
+    both are on one file system: nothing is copied, but a later in-place
+    edit of the source changes the stored file too. Otherwise the file is
+    reflinked (copy-on-write, as cheap as a link), copied in the kernel
+    with copy_file_range(), or streamed with shutil.copyfile(), in that
+    order of preference. The data goes to a temporary name next to target
+    first, so target only ever appears complete.
+    """
+    temp_path = target.with_name(f".{target.name}.{os.getpid()}.{uuid.uuid4().hex[:8]}.tmp")
+    try:
+        if mode == "hardlink":
+            try:
+                os.link(source, temp_path)
+                os.replace(temp_path, target)
+                return
+            except OSError:
+                pass  # Another file system, or links unsupported; copy instead
+        if not _clone(source, temp_path):
+            shutil.copyfile(source, temp_path)
+        shutil.copystat(source, temp_path)
+        os.replace(temp_path, target)
+    finally:
+        if temp_path.exists():
+            temp_path.unlink()
+
+
+async def move_to_store(files_path: Path, temp_path: Path, file_hash: str, ext: str = "") -> str:
+    """
+    Rename a fully written temporary file to its content-addressed path.
+
+    If a file with the same hash and extension is already stored, the
+    temporary file is deleted instead.
+
+    Returns:
+        Relative path of the stored file
+    """
+    relative_path = f"{file_hash[:2]}/{file_hash}{ext}"
+    file_path = files_path / relative_path
+    if file_path.exists():
+        await aiofiles.os.remove(temp_path)
+    else:
+        await aiofiles.os.makedirs(file_path.parent, exist_ok=True)
+        await aiofiles.os.replace(temp_path, file_path)
+    return relative_path
+
+
+class BlobWriter:
+    """
+    File written to the content store incrementally.
+
+    Data goes to a temporary file under files/.tmp while its SHA-256 is
+    updated chunk by chunk, so memory use is bounded by the chunk size and
+    the size limit is enforced as soon as it is crossed. commit() then
+    renames the file to files/<hh>/<hash><ext>, which is atomic because
+    the temporary directory is on the same filesystem. Used as an async
+    context manager, an uncommitted file is discarded on exit.
+    """
+
+    def __init__(self, files_path: Path, max_size: Optional[int] = None):
+        self.files_path = files_path
+        self.max_size = max_size
+        self.temp_path = files_path / ".tmp" / f"{uuid.uuid4().hex}.part"
+        self.size = 0
+        self._hasher = hashlib.sha256()
+        self._file = None
+        self._done = False
+
+    async def _open(self) -> None:
+        if self._file is None:
+            await aiofiles.os.makedirs(self.temp_path.parent, exist_ok=True)
+            self._file = await aiofiles.open(self.temp_path, "wb")
+
+    async def write(self, chunk: bytes) -> None:
+        """Append a chunk, raising FileTooLargeError past max_size."""
+        if self.max_size is not None and self.size + len(chunk) > self.max_size:
+            raise FileTooLargeError(f"File too large. Maximum size is {self.max_size} bytes")
+        await self._open()
+        await self._file.write(chunk)
+        self._hasher.update(chunk)
+        self.size += len(chunk)
+
+    @property
+    def file_hash(self) -> str:
+        """SHA-256 of the data written so far."""
+        return self._hasher.hexdigest()
+
+    async def commit(self, ext: str = "") -> str:
+        """
+        Move the file to its content-addressed path.
+
+        If a file with the same hash and extension is already stored, the
+        new copy is dropped instead.
+
+        Returns:
+            Relative path of the stored file
+        """
+        await self._open()
+        await self._file.close()
+        self._done = True
+
+        return await move_to_store(self.files_path, self.temp_path, self.file_hash, ext)
+
+    async def close(self) -> Path:
+        """Finish writing; the temporary file can be read until commit() or discard()."""
+        await self._open()
+        await self._file.close()
+        return self.temp_path
+
+    async def discard(self) -> None:
+        """Delete the temporary file."""
+        if self._done:
+            return
+        self._done = True
+        if self._file is not None:
+            await self._file.close()
+            await aiofiles.os.remove(self.temp_path)
+
+    async def __aenter__(self) -> "BlobWriter":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.discard()
+
+
 class StorageService:
     """Service for managing file storage."""
 
@@ -50,23 +299,21 @@ class StorageService:
 
         return relative_path, file_hash
 
+    def open_writer(self, max_size: Optional[int] = None) -> BlobWriter:
+        """Start writing a file of unknown hash in chunks (see BlobWriter)."""
+        return BlobWriter(self.files_path, max_size)
+
     async def save_file_from_path(self, source_path: Path) -> tuple[str, str, int]:
         """
         Save a file from a local path.
 
+        The file is hashed and stored in a worker thread, copied as
+        import.ingest_mode says (see ingest_file()).
+
         Returns:
             Tuple of (relative_path, file_hash, file_size)
         """
-        # Calculate hash
-        hasher = hashlib.sha256()
-        file_size = 0
-
-        async with aiofiles.open(source_path, "rb") as f:
-            while chunk := await f.read(8192):
-                hasher.update(chunk)
-                file_size += len(chunk)
-
-        file_hash = hasher.hexdigest()
+        file_hash, file_size = await asyncio.to_thread(hash_path, source_path)
 
         # Check if file already exists
         subdir = file_hash[:2]
@@ -77,8 +324,9 @@ class StorageService:
 
         if not file_path.exists():
             await aiofiles.os.makedirs(file_path.parent, exist_ok=True)
-            # Copy file
-            shutil.copy2(source_path, file_path)
+            await asyncio.to_thread(
+                ingest_file, source_path, file_path, self.settings.import_config.ingest_mode,
+            )
 
         return relative_path, file_hash, file_size
 
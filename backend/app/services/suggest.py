@@ -0,0 +1,391 @@
+"""In-memory typeahead index over item titles, tag names and category names."""
+
+import asyncio
+import heapq
+from bisect import bisect_left, insort
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import event, func, inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from ..models import Item, Category, Tag, ItemTag
+
+# Boost favorites above everything created in the next ~30 years
+_FAVORITE_BOOST = 1e9
+
+# Categories and tags are few and precise, so they rank above titles
+_KIND_PRIORITY = {"category": 2, "tag": 1, "item": 0}
+
+_PENDING = "suggest_pending"
+
+
+def _is_cjk(ch: str) -> bool:
+    return "\u3040" <= ch <= "\u30ff" or "\u3400" <= ch <= "\u9fff" or "\uac00" <= ch <= "\ud7af"
+
+
+class SuggestionIndex:
+    """
+    Prefix index for search-as-you-type suggestions.
+
+    Each title, tag and category name is stored in a sorted list under every
+    word start (and every CJK character, since Chinese has no spaces), so a
+    prefix lookup is two bisections. Titles rank by recency with favorites
+    boosted; tags and categories rank by item count. Broad prefixes whose
+    range is too large to scan per keystroke keep a memoized top list, which
+    item writes update in place rather than invalidate, and narrower prefixes
+    are answered from a broader memo whenever enough of its entries match.
+
+    The index is loaded lazily and then kept current from ORM session events:
+    committed titles, tag and category names and item counts are applied
+    row by row, while bulk statements on the tables behind them mark the
+    affected part for reload.
+    """
+
+    MAX_KEY_CHARS = 24
+    SCAN_LIMIT = 1024
+    MEMO_SIZE = 50
+
+    def __init__(self):
+        self._keys: list[tuple[str, str, int]] = []  # (key, kind, ref_id), sorted
+        self._entries: dict[tuple[str, int], dict] = {}
+        self._memo: dict[str, list[tuple[str, int]]] = {}
+        self._items_loaded = False
+        self._aux_loaded = False
+        self._lock = asyncio.Lock()
+
+    # ---- Loading ----
+
+    async def ensure_loaded(self, session: AsyncSession) -> None:
+        """Load whatever part of the index is missing or stale."""
+        if self._items_loaded and self._aux_loaded:
+            return
+
+        async with self._lock:
+            if not self._items_loaded:
+                result = await session.execute(
+                    select(Item.id, Item.title, Item.created_at, Item.is_favorite)
+                )
+                self._replace_kind("item", [
+                    (item_id, title, self._item_score(created_at, is_favorite))
+                    for item_id, title, created_at, is_favorite in result.all()
+                ])
+                self._items_loaded = True
+
+            if not self._aux_loaded:
+                tag_counts = (
+                    select(ItemTag.c.tag_id, func.count().label("count"))
+                    .group_by(ItemTag.c.tag_id)
+                    .subquery()
+                )
+                tags = await session.execute(
+                    select(Tag.id, Tag.name, tag_counts.c.count)
+                    .outerjoin(tag_counts, Tag.id == tag_counts.c.tag_id)
+                )
+                self._replace_kind("tag", [
+                    (tag_id, name, float(count or 0)) for tag_id, name, count in tags.all()
+                ])
+
+                category_counts = (
+                    select(Item.category_id, func.count(Item.id).label("count"))
+                    .group_by(Item.category_id)
+                    .subquery()
+                )
+                categories = await session.execute(
+                    select(Category.id, Category.name, category_counts.c.count)
+                    .outerjoin(category_counts, Category.id == category_counts.c.category_id)
+                )
+                self._replace_kind("category", [
+                    (category_id, name, float(count or 0))
+                    for category_id, name, count in categories.all()
+                ])
+                self._aux_loaded = True
+
+    def _replace_kind(self, kind: str, rows: list[tuple[int, str, float]]) -> None:
+        """Rebuild all entries of one kind in a single sort."""
+        self._keys = [k for k in self._keys if k[1] != kind]
+        self._entries = {ref: e for ref, e in self._entries.items() if ref[0] != kind}
+
+        for ref_id, text, score in rows:
+            if not text:
+                continue
+            self._entries[(kind, ref_id)] = {
+                "text": text, "type": kind, "id": ref_id,
+                "rank": (_KIND_PRIORITY[kind], score),
+            }
+            self._keys.extend((key, kind, ref_id) for key in self._index_keys(text))
+
+        self._keys.sort()
+        self._memo.clear()
+        self._warm_memo()
+
+    def _warm_memo(self) -> None:
+        """Precompute top results for single-character prefixes with large ranges."""
+        i = 0
+        while i < len(self._keys):
+            first = self._keys[i][0][:1]
+            hi = bisect_left(self._keys, (first + "\U0010ffff",), lo=i)
+            if hi - i > self.SCAN_LIMIT:
+                self._memo[first] = self._top_refs(range(i, hi), self.MEMO_SIZE)
+            i = max(hi, i + 1)
+
+    def mark_stale(self, items: bool = False, aux: bool = False) -> None:
+        """Schedule a reload of item titles and/or tag and category names."""
+        if items:
+            self._items_loaded = False
+        if aux:
+            self._aux_loaded = False
+
+    # ---- Incremental updates ----
+
+    def upsert_item(self, item_id: int, title: str, created_at: Optional[datetime], is_favorite: bool) -> None:
+        """Add or update an item title."""
+        if self._items_loaded:
+            self._upsert("item", item_id, title, self._item_score(created_at, is_favorite))
+
+    def remove_item(self, item_id: int) -> None:
+        """Remove an item title."""
+        self._remove("item", item_id)
+
+    def upsert_name(self, kind: str, ref_id: int, name: str) -> None:
+        """Add a tag or category, or rename one keeping its item count."""
+        if self._aux_loaded:
+            entry = self._entries.get((kind, ref_id))
+            self._upsert(kind, ref_id, name, entry["rank"][1] if entry else 0.0)
+
+    def remove_name(self, kind: str, ref_id: int) -> None:
+        """Remove a tag or category."""
+        self._remove(kind, ref_id)
+
+    def adjust_count(self, kind: str, ref_id: int, delta: int) -> None:
+        """Add delta to the item count of a tag or category."""
+        entry = self._entries.get((kind, ref_id))
+        if self._aux_loaded and entry is not None:
+            self._upsert(kind, ref_id, entry["text"], entry["rank"][1] + delta)
+
+    def _upsert(self, kind: str, ref_id: int, text: str, score: float) -> None:
+        self._remove(kind, ref_id)
+        if not text:
+            return
+
+        ref = (kind, ref_id)
+        self._entries[ref] = {"text": text, "type": kind, "id": ref_id, "rank": (_KIND_PRIORITY[kind], score)}
+        for key in self._index_keys(text):
+            insort(self._keys, (key, kind, ref_id))
+            # Only an entry outranking a memo's last one is known to belong
+            # in it; otherwise the memo stays valid, for its length
+            for memo in self._memos_covering(key):
+                if ref not in memo and memo and self._rank(ref) > self._rank(memo[-1]):
+                    memo.append(ref)
+                    memo.sort(key=self._rank, reverse=True)
+                    del memo[self.MEMO_SIZE:]
+
+    def _remove(self, kind: str, ref_id: int) -> None:
+        ref = (kind, ref_id)
+        entry = self._entries.pop(ref, None)
+        if entry is None:
+            return
+        for key in self._index_keys(entry["text"]):
+            i = bisect_left(self._keys, (key, kind, ref_id))
+            if i < len(self._keys) and self._keys[i] == (key, kind, ref_id):
+                del self._keys[i]
+            # A shortened memo stays valid for limits up to its new length
+            for memo in self._memos_covering(key):
+                if ref in memo:
+                    memo.remove(ref)
+
+    def _memos_covering(self, key: str) -> list[list[tuple[str, int]]]:
+        """Memoized result lists for prefixes of key."""
+        memos = []
+        for length in range(1, len(key) + 1):
+            memo = self._memo.get(key[:length])
+            if memo is not None:
+                memos.append(memo)
+        return memos
+
+    # ---- Lookup ----
+
+    def suggest(self, q: str, limit: int = 10) -> list[dict]:
+        """
+        Return up to limit suggestions whose text has a word starting with q.
+
+        Returns:
+            List of dicts with text, type ("item", "tag" or "category") and id
+        """
+        prefix = q.strip().casefold()[:self.MAX_KEY_CHARS]
+        if not prefix:
+            return []
+
+        memo = self._memo.get(prefix)
+        if memo is not None and len(memo) >= limit:
+            return self._collect(memo, limit)
+
+        # The top entries of a broader prefix that also match this one are its
+        # top entries too, which avoids scanning a large range on a cold prefix
+        for length in range(len(prefix) - 1, 0, -1):
+            parent = self._memo.get(prefix[:length])
+            if parent is not None:
+                matching = [
+                    ref for ref in parent
+                    if any(key.startswith(prefix) for key in self._index_keys(self._entries[ref]["text"]))
+                ]
+                results = self._collect(matching, limit)
+                if len(results) >= limit:
+                    self._memo[prefix] = matching
+                    return results
+                break
+
+        lo = bisect_left(self._keys, (prefix,))
+        hi = bisect_left(self._keys, (prefix + "\U0010ffff",))
+        refs = self._top_refs(range(lo, hi), max(limit, self.MEMO_SIZE))
+        if hi - lo > self.SCAN_LIMIT:
+            self._memo[prefix] = refs
+        return self._collect(refs, limit)
+
+    def _collect(self, refs: list[tuple[str, int]], limit: int) -> list[dict]:
+        """Render ranked refs as suggestions, skipping repeated texts."""
+        results = []
+        seen_texts = set()
+        for ref in refs:
+            entry = self._entries[ref]
+            if entry["text"] in seen_texts:
+                continue
+            seen_texts.add(entry["text"])
+            results.append({"text": entry["text"], "type": entry["type"], "id": entry["id"]})
+            if len(results) >= limit:
+                break
+        return results
+
+    def _top_refs(self, positions: range, n: int) -> list[tuple[str, int]]:
+        refs = {self._keys[i][1:] for i in positions}
+        return heapq.nlargest(n, refs, key=self._rank)
+
+    def _rank(self, ref: tuple[str, int]) -> tuple[int, float]:
+        return self._entries[ref]["rank"]
+
+    # ---- Helpers ----
+
+    @classmethod
+    def _index_keys(cls, text: str) -> set[str]:
+        """Normalized keys for every word start and CJK character in text."""
+        folded = text.casefold()
+        keys = set()
+        prev_alnum = False
+        for i, ch in enumerate(folded):
+            is_alnum = ch.isalnum()
+            if (is_alnum and not prev_alnum) or _is_cjk(ch):
+                keys.add(folded[i:i + cls.MAX_KEY_CHARS])
+            prev_alnum = is_alnum
+        return keys
+
+    @staticmethod
+    def _item_score(created_at: Optional[datetime], is_favorite: bool) -> float:
+        score = created_at.timestamp() if created_at else 0.0
+        return score + (_FAVORITE_BOOST if is_favorite else 0.0)
+
+
+suggestion_index = SuggestionIndex()
+
+
+# Tables whose bulk statements can change titles, tag or category names, or counts
+_ITEM_TABLES = {"items"}
+_AUX_TABLES = {"tags", "categories", "item_tags"}
+
+
+def _pending(session) -> dict:
+    return session.info.setdefault(_PENDING, {
+        "items": {}, "names": {}, "counts": {}, "stale_items": False, "stale_aux": False,
+    })
+
+
+def _count(pending: dict, kind: str, ref_id: Optional[int], delta: int) -> None:
+    if ref_id is not None:
+        key = (kind, ref_id)
+        pending["counts"][key] = pending["counts"].get(key, 0) + delta
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_changes(session, flush_context):
+    pending = _pending(session)
+
+    for obj in (*session.new, *session.dirty):
+        if isinstance(obj, Item):
+            state = inspect(obj)
+            values = state.dict
+            if "title" in values:
+                pending["items"][obj.id] = (
+                    values["title"], values.get("created_at"), values.get("is_favorite", False),
+                )
+            if obj in session.new:
+                _count(pending, "category", values.get("category_id"), 1)
+                for tag in values.get("tags", ()):
+                    _count(pending, "tag", tag.id, 1)
+                continue
+            category = state.attrs.category_id.history
+            if category.added and not category.deleted:
+                pending["stale_aux"] = True  # Previous category not loaded
+            for category_id in category.added:
+                _count(pending, "category", category_id, 1)
+            for category_id in category.deleted:
+                _count(pending, "category", category_id, -1)
+            tags = state.attrs.tags.history
+            for tag in tags.added:
+                _count(pending, "tag", tag.id, 1)
+            for tag in tags.deleted:
+                _count(pending, "tag", tag.id, -1)
+        elif isinstance(obj, (Tag, Category)):
+            kind = "tag" if isinstance(obj, Tag) else "category"
+            if obj in session.new or inspect(obj).attrs.name.history.has_changes():
+                pending["names"][(kind, obj.id)] = obj.name
+
+    for obj in session.deleted:
+        if isinstance(obj, Item):
+            values = inspect(obj).dict
+            pending["items"][obj.id] = None
+            _count(pending, "category", values.get("category_id"), -1)
+            if "tags" in values:
+                for tag in values["tags"]:
+                    _count(pending, "tag", tag.id, -1)
+            else:
+                pending["stale_aux"] = True
+        elif isinstance(obj, (Tag, Category)):
+            pending["names"][("tag" if isinstance(obj, Tag) else "category", obj.id)] = None
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _collect_statement_writes(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        table = orm_execute_state.statement.table.name
+        if table in _ITEM_TABLES:
+            # Titles, and the category counts
+            _pending(orm_execute_state.session).update(stale_items=True, stale_aux=True)
+        elif table in _AUX_TABLES:
+            _pending(orm_execute_state.session)["stale_aux"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_changes(session):
+    pending = session.info.pop(_PENDING, None)
+    if not pending:
+        return
+
+    suggestion_index.mark_stale(items=pending["stale_items"], aux=pending["stale_aux"])
+    for item_id, values in pending["items"].items():
+        if values is None:
+            suggestion_index.remove_item(item_id)
+        else:
+            suggestion_index.upsert_item(item_id, *values)
+    for (kind, ref_id), name in pending["names"].items():
+        if name is None:
+            suggestion_index.remove_name(kind, ref_id)
+        else:
+            suggestion_index.upsert_name(kind, ref_id, name)
+    for (kind, ref_id), delta in pending["counts"].items():
+        if delta:
+            suggestion_index.adjust_count(kind, ref_id, delta)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changes(session):
+    session.info.pop(_PENDING, None)
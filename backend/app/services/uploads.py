@@ -0,0 +1,404 @@
+"""Resumable chunked uploads assembled in the content store."""
+
+import asyncio
+import hashlib
+import json
+import re
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import AsyncIterator, Optional
+
+import aiofiles
+import aiofiles.os
+
+from ..config import get_settings
+from .storage import move_to_store
+
+# Chunk sizes clients may ask for
+MIN_CHUNK_SIZE = 256 * 1024
+MAX_CHUNK_SIZE = 64 * 1024 * 1024
+
+_ID_RE = re.compile(r"^[0-9a-f]{32}$")
+_READ_SIZE = 1024 * 1024  # bytes per read when hashing chunks back from disk
+
+
+class UploadError(ValueError):
+    """Raised for upload requests that cannot be honoured."""
+
+
+class UploadNotFoundError(UploadError):
+    """Raised for unknown or expired upload sessions."""
+
+
+class UploadConflictError(UploadError):
+    """Raised for a session that another request is finishing."""
+
+
+@dataclass
+class UploadSession:
+    """
+    State of one resumable upload.
+
+    The file is split into chunks of chunk_size bytes (the last may be
+    shorter), written at their offsets in a preallocated .part file.
+    """
+    id: str
+    filename: str
+    size: int
+    chunk_size: int
+    category_id: Optional[int] = None
+    auto_classify: bool = True
+    original_path: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    updated_at: float = field(default_factory=time.time)
+    received: set[int] = field(default_factory=set)
+
+    @property
+    def total_chunks(self) -> int:
+        return max(1, -(-self.size // self.chunk_size))
+
+    @property
+    def missing(self) -> list[int]:
+        """Indexes of the chunks not received yet."""
+        return [index for index in range(self.total_chunks) if index not in self.received]
+
+    @property
+    def received_bytes(self) -> int:
+        return sum(self.chunk_length(index) for index in self.received)
+
+    @property
+    def received_ranges(self) -> list[tuple[int, int]]:
+        """Received byte ranges as merged [start, end) pairs."""
+        ranges = []
+        for index in sorted(self.received):
+            start = index * self.chunk_size
+            end = start + self.chunk_length(index)
+            if ranges and ranges[-1][1] == start:
+                ranges[-1] = (ranges[-1][0], end)
+            else:
+                ranges.append((start, end))
+        return ranges
+
+    def chunk_length(self, index: int) -> int:
+        return min(self.chunk_size, self.size - index * self.chunk_size)
+
+
+class _Assembly:
+    """In-memory state of a session: the running hash and its locks."""
+
+    def __init__(self, session: UploadSession):
+        self.session = session
+        self.hasher = hashlib.sha256()
+        self.hashed = 0  # chunks [0, hashed) are in the hash
+        self.writing: set[int] = set()
+        self.closed = False  # set once finishing starts
+        self.finishing = False  # set while a request holds the finished session
+        self.lock = asyncio.Lock()
+
+
+class UploadManager:
+    """
+    Upload sessions stored under files/.tmp/uploads.
+
+    Each session is a sparse <id>.part file of the final size plus an
+    <id>.json with the received chunk indexes, so uploads survive both
+    dropped connections and server restarts. Chunks may arrive in any
+    order and concurrently.
+
+    The SHA-256 is computed while chunks arrive: a chunk that starts at
+    the hashed prefix is hashed as it streams in, and chunks that arrived
+    ahead of it are read back (normally from the page cache) as soon as
+    the prefix reaches them. Finishing therefore only renames the .part
+    file into the content store; only a session resumed after a restart
+    has its earlier chunks read once more.
+    """
+
+    def __init__(self):
+        self._assemblies: dict[str, _Assembly] = {}
+
+    @property
+    def directory(self) -> Path:
+        return get_settings().files_path / ".tmp" / "uploads"
+
+    def _part_path(self, upload_id: str) -> Path:
+        return self.directory / f"{upload_id}.part"
+
+    def _meta_path(self, upload_id: str) -> Path:
+        return self.directory / f"{upload_id}.json"
+
+    # ---- Sessions ----
+
+    async def create(
+        self,
+        filename: str,
+        size: int,
+        chunk_size: Optional[int] = None,
+        category_id: Optional[int] = None,
+        auto_classify: bool = True,
+        original_path: Optional[str] = None,
+    ) -> UploadSession:
+        """
+        Start an upload of a file of known size.
+
+        Raises:
+            UploadError: If the size or chunk size is out of range
+        """
+        settings = get_settings()
+        if size < 0:
+            raise UploadError("Size must not be negative")
+        if size > settings.storage.max_upload_size:
+            raise UploadError(f"File too large. Maximum size is {settings.storage.max_upload_size} bytes")
+        chunk_size = chunk_size or settings.storage.upload_chunk_size
+        if not MIN_CHUNK_SIZE <= chunk_size <= MAX_CHUNK_SIZE:
+            raise UploadError(f"Chunk size must be between {MIN_CHUNK_SIZE} and {MAX_CHUNK_SIZE} bytes")
+
+        await self.expire()
+        session = UploadSession(
+            id=uuid.uuid4().hex,
+            filename=filename,
+            size=size,
+            chunk_size=chunk_size,
+            category_id=category_id,
+            auto_classify=auto_classify,
+            original_path=original_path,
+        )
+        await aiofiles.os.makedirs(self.directory, exist_ok=True)
+        async with aiofiles.open(self._part_path(session.id), "wb") as f:
+            await f.truncate(size)
+        await self._save(session)
+        self._assemblies[session.id] = _Assembly(session)
+        return session
+
+    async def get(self, upload_id: str) -> UploadSession:
+        """
+        Look up a session, loading it from disk after a restart.
+
+        Raises:
+            UploadNotFoundError: If there is no such session
+        """
+        return (await self._assembly(upload_id)).session
+
+    async def _assembly(self, upload_id: str) -> _Assembly:
+        assembly = self._assemblies.get(upload_id)
+        if assembly is not None:
+            return assembly
+        if not _ID_RE.match(upload_id):
+            raise UploadNotFoundError(f"Upload not found: {upload_id}")
+        try:
+            async with aiofiles.open(self._meta_path(upload_id)) as f:
+                meta = json.loads(await f.read())
+        except (OSError, ValueError):
+            raise UploadNotFoundError(f"Upload not found: {upload_id}")
+        if not self._part_path(upload_id).exists():
+            raise UploadNotFoundError(f"Upload not found: {upload_id}")
+
+        meta["received"] = set(meta.get("received", []))
+        # Another request may have loaded it while we were reading
+        return self._assemblies.setdefault(upload_id, _Assembly(UploadSession(**meta)))
+
+    async def _save(self, session: UploadSession) -> None:
+        meta = asdict(session)
+        meta["received"] = sorted(session.received)
+        tmp_path = self._meta_path(session.id).with_suffix(f".{uuid.uuid4().hex}.tmp")
+        async with aiofiles.open(tmp_path, "w") as f:
+            await f.write(json.dumps(meta))
+        await aiofiles.os.replace(tmp_path, self._meta_path(session.id))
+
+    async def abort(self, upload_id: str) -> None:
+        """
+        Delete a session and its data.
+
+        Raises:
+            UploadError: If chunks are still being written
+        """
+        assembly = await self._assembly(upload_id)
+        async with assembly.lock:
+            if assembly.writing:
+                raise UploadError("Chunks are still being uploaded")
+            assembly.closed = True
+            self._delete(upload_id)
+
+    def _delete(self, upload_id: str) -> None:
+        self._assemblies.pop(upload_id, None)
+        for path in (self._part_path(upload_id), self._meta_path(upload_id)):
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+
+    async def expire(self) -> int:
+        """
+        Delete sessions idle for longer than storage.upload_expire_hours.
+
+        Returns:
+            Number of sessions deleted
+        """
+        cutoff = time.time() - get_settings().storage.upload_expire_hours * 3600
+        if not self.directory.exists():
+            return 0
+        expired = 0
+        for meta_path in self.directory.glob("*.json"):
+            try:
+                if meta_path.stat().st_mtime >= cutoff:
+                    continue
+            except FileNotFoundError:
+                continue
+            upload_id = meta_path.stem
+            assembly = self._assemblies.get(upload_id)
+            if assembly is not None and assembly.writing:
+                continue
+            self._delete(upload_id)
+            expired += 1
+        return expired
+
+    # ---- Chunks ----
+
+    async def write_chunk(self, upload_id: str, index: int, data: AsyncIterator[bytes]) -> UploadSession:
+        """
+        Store one chunk from a stream of its bytes.
+
+        A chunk that was already received is overwritten, which a client
+        retrying after a lost response may do safely.
+
+        Raises:
+            UploadNotFoundError: If there is no such session
+            UploadError: If the index is out of range, the chunk is being
+                written by another request, or the data has the wrong length
+        """
+        assembly = await self._assembly(upload_id)
+        session = assembly.session
+        if not 0 <= index < session.total_chunks:
+            raise UploadError(f"Chunk index must be between 0 and {session.total_chunks - 1}")
+
+        expected = session.chunk_length(index)
+        async with assembly.lock:
+            if assembly.closed:
+                raise UploadError("Upload is being finished")
+            if index in assembly.writing:
+                raise UploadError(f"Chunk {index} is already being uploaded")
+            if index in session.received:
+                # Overwritten data must be hashed again
+                session.received.discard(index)
+                if index < assembly.hashed:
+                    assembly.hasher = hashlib.sha256()
+                    assembly.hashed = 0
+                await self._save(session)
+            # Hash inline if this chunk extends the hashed prefix; the
+            # prefix cannot move past it until it is received
+            hasher = assembly.hasher.copy() if assembly.hashed == index else None
+            assembly.writing.add(index)
+
+        try:
+            length = 0
+            async with aiofiles.open(self._part_path(upload_id), "r+b") as f:
+                await f.seek(index * session.chunk_size)
+                async for piece in data:
+                    length += len(piece)
+                    if length > expected:
+                        raise UploadError(f"Chunk {index} must be {expected} bytes")
+                    await f.write(piece)
+                    if hasher is not None:
+                        hasher.update(piece)
+            if length != expected:
+                raise UploadError(f"Chunk {index} must be {expected} bytes, got {length}")
+
+            async with assembly.lock:
+                session.received.add(index)
+                session.updated_at = time.time()
+                if hasher is not None and assembly.hashed == index:
+                    assembly.hasher = hasher
+                    assembly.hashed += 1
+                await self._advance(assembly)
+                await self._save(session)
+        finally:
+            assembly.writing.discard(index)
+        return session
+
+    async def _advance(self, assembly: _Assembly) -> None:
+        """Hash received chunks that now continue the hashed prefix."""
+        session = assembly.session
+        while assembly.hashed in session.received and assembly.hashed not in assembly.writing:
+            index = assembly.hashed
+            await asyncio.to_thread(
+                self._hash_range,
+                assembly.hasher,
+                self._part_path(session.id),
+                index * session.chunk_size,
+                session.chunk_length(index),
+            )
+            assembly.hashed += 1
+
+    @staticmethod
+    def _hash_range(hasher, path: Path, offset: int, length: int) -> None:
+        with open(path, "rb") as f:
+            f.seek(offset)
+            while length > 0:
+                block = f.read(min(_READ_SIZE, length))
+                if not block:
+                    raise UploadError("Upload data is truncated")
+                hasher.update(block)
+                length -= len(block)
+
+    # ---- Completion ----
+
+    async def finish(self, upload_id: str) -> tuple[str, int]:
+        """
+        Verify that all chunks arrived and compute the file hash.
+
+        No more chunks are accepted afterwards. The session is left in
+        place, so the caller can check for duplicates before calling
+        store() or abort(), or release() if it does neither.
+
+        Returns:
+            Tuple of (file_hash, size)
+
+        Raises:
+            UploadConflictError: If another request is finishing the session
+            UploadError: If chunks are missing or still being written
+        """
+        assembly = await self._assembly(upload_id)
+        session = assembly.session
+        async with assembly.lock:
+            if assembly.finishing:
+                raise UploadConflictError("Upload is already being finished")
+            if assembly.writing:
+                raise UploadError("Chunks are still being uploaded")
+            missing = session.missing if session.size else []
+            if missing:
+                raise UploadError(f"{len(missing)} of {session.total_chunks} chunks are missing")
+            assembly.closed = True
+            await self._advance(assembly)
+            assembly.finishing = True
+        return assembly.hasher.hexdigest(), session.size
+
+    def release(self, upload_id: str) -> None:
+        """Let a finished session that was neither stored nor aborted be finished again."""
+        assembly = self._assemblies.get(upload_id)
+        if assembly is not None:
+            assembly.finishing = False
+
+    def data_path(self, upload_id: str) -> Path:
+        """The data of a finished upload, to read before store() or abort()."""
+        return self._part_path(upload_id)
+
+    async def store(self, upload_id: str, file_hash: str) -> str:
+        """
+        Move a finished upload into the content store and end the session.
+
+        Returns:
+            Relative path of the stored file
+        """
+        session = await self.get(upload_id)
+        relative_path = await move_to_store(
+            get_settings().files_path,
+            self._part_path(upload_id),
+            file_hash,
+            Path(session.filename).suffix,
+        )
+        self._delete(upload_id)
+        return relative_path
+
+
+upload_manager = UploadManager()
@@ -0,0 +1,452 @@
+"""Memory-mapped store of item embeddings for semantic search."""
+
+import asyncio
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Optional
+
+import numpy as np
+from sqlalchemy import event, inspect, select
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from ..config import get_settings
+from ..models import Item
+from ..utils.embeddings import (
+    DF_BUCKETS,
+    MAX_DIMENSIONS,
+    df_buckets,
+    document_features,
+    text_features,
+    vectorize,
+)
+
+_PENDING = "vector_index_pending"
+
+# Item columns that feed the embedding
+_TEXT_FIELDS = ("title", "description", "extracted_text")
+
+
+def _default_directory() -> Path:
+    """Directory holding the SQLite database file."""
+    settings = get_settings()
+    database = make_url(settings.database_url).database
+    if database and database != ":memory:":
+        return Path(database).resolve().parent
+    return settings.data_path
+
+
+def exclude_block(scores: np.ndarray, exclude: np.ndarray, start: int) -> None:
+    """Mask each query's excluded item in a (queries x block rows) score block."""
+    local = exclude - start
+    inside = (local >= 0) & (local < scores.shape[1])
+    scores[np.flatnonzero(inside), local[inside]] = -np.inf
+
+
+class TopK:
+    """Running per-query top-k over score blocks, selected with argpartition."""
+
+    def __init__(self, queries: int, k: int):
+        self.k = k
+        self.ids = np.zeros((queries, 0), dtype=np.int64)
+        self.scores = np.zeros((queries, 0), dtype=np.float32)
+
+    def add(self, scores: np.ndarray, start: int) -> None:
+        """Merge a (queries x block rows) block whose first row is start."""
+        k = self.k
+        top = np.argpartition(-scores, min(k, scores.shape[1]) - 1, axis=1)[:, :k]
+        ids = np.concatenate([self.ids, top + start], axis=1)
+        scores = np.concatenate([self.scores, np.take_along_axis(scores, top, axis=1)], axis=1)
+        if ids.shape[1] > k:
+            keep = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+            ids = np.take_along_axis(ids, keep, axis=1)
+            scores = np.take_along_axis(scores, keep, axis=1)
+        self.ids, self.scores = ids, scores
+
+    def result(self, min_similarity: float = 0.0) -> tuple[np.ndarray, np.ndarray]:
+        """(IDs, scores) sorted best first, padded to k; weak or unused slots have ID -1."""
+        order = np.argsort(-self.scores, axis=1, kind="stable")
+        ids = np.take_along_axis(self.ids, order, axis=1)
+        scores = np.take_along_axis(self.scores, order, axis=1)
+        ids[~(scores > max(min_similarity, 0.0))] = -1
+
+        pad = self.k - ids.shape[1]
+        if pad > 0:
+            ids = np.pad(ids, ((0, 0), (0, pad)), constant_values=-1)
+            scores = np.pad(scores, ((0, 0), (0, pad)))
+        scores = np.where(ids >= 0, scores, 0.0)
+        return ids, scores.astype(np.float32)
+
+
+class VectorIndex:
+    """
+    Item embeddings in a float32 matrix memory-mapped next to vault.db.
+
+    Row i holds the unit vector of item i (zeros for missing items), so an
+    update is an in-place row write and a search is a batched matrix-vector
+    product over the mapped file. IDF weights come from a hashed document
+    frequency table stored alongside the matrix.
+
+    Items written through ORM sessions are queued on commit and embedded
+    before the next search; on first use, items changed since the last sync
+    or missing from the matrix are caught up. Document frequencies only
+    grow as items are added, so rebuild() refreshes them after heavy edits
+    or deletions.
+    """
+
+    MATRIX_FILE = "vectors.f32"
+    DF_FILE = "vectors_df.npy"
+    META_FILE = "vectors.json"
+
+    GROW_ROWS = 4096
+    EMBED_BATCH = 256
+    SEARCH_BATCH_ROWS = 65536
+
+    def __init__(self, directory: Optional[Path] = None, dimensions: Optional[int] = None):
+        self._directory = directory
+        self._dimensions = dimensions
+        self._matrix: Optional[np.memmap] = None
+        self._df = np.zeros(DF_BUCKETS, dtype=np.int32)
+        self._docs = 0
+        self._synced_at: Optional[datetime] = None
+        self._dirty: set[int] = set()
+        self._listeners: list[Callable[[set[int]], None]] = []
+        self._lock = asyncio.Lock()
+
+    @property
+    def directory(self) -> Path:
+        if self._directory is None:
+            self._directory = _default_directory()
+        return self._directory
+
+    @property
+    def dimensions(self) -> int:
+        if self._dimensions is None:
+            self._dimensions = get_settings().semantic.dimensions
+        if not 1 <= self._dimensions <= MAX_DIMENSIONS:
+            raise ValueError(f"Vector dimensions must be between 1 and {MAX_DIMENSIONS}")
+        return self._dimensions
+
+    # ---- Synchronization ----
+
+    def add_listener(self, callback: Callable[[set[int]], None]) -> None:
+        """Call callback with the IDs of items whose vectors are about to change."""
+        self._listeners.append(callback)
+
+    def mark_dirty(self, item_ids: set[int]) -> None:
+        """Queue items whose text was created, changed or deleted."""
+        self._dirty |= item_ids
+        for callback in self._listeners:
+            callback(item_ids)
+
+    async def ensure_current(self, session: AsyncSession) -> None:
+        """Open (or build) the index and embed all queued items."""
+        async with self._lock:
+            if self._matrix is None:
+                if not self._open():
+                    await self._rebuild(session)
+                    return
+                await self._catch_up(session)
+
+            if not self._dirty:
+                return
+
+            started = datetime.utcnow()
+            item_ids, self._dirty = self._dirty, set()
+            try:
+                await self._embed_items(session, sorted(item_ids))
+            except BaseException:
+                self._dirty |= item_ids
+                raise
+            self._synced_at = started
+            self._save()
+
+    async def rebuild(self, session: AsyncSession) -> int:
+        """
+        Re-embed every item with freshly counted document frequencies.
+
+        Returns:
+            Number of indexed items
+        """
+        async with self._lock:
+            return await self._rebuild(session)
+
+    async def _rebuild(self, session: AsyncSession) -> int:
+        started = datetime.utcnow()
+        covered = set(self._dirty)
+        result = await session.execute(select(Item.id).order_by(Item.id))
+        item_ids = list(result.scalars().all())
+        for callback in self._listeners:
+            callback(set(item_ids))
+
+        # First pass counts document frequencies, second pass embeds with them
+        df = np.zeros(DF_BUCKETS, dtype=np.int32)
+        docs = 0
+        for batch in self._batches(item_ids):
+            rows = await self._load_texts(session, batch)
+            docs += await asyncio.to_thread(self._count_documents, df, rows.values())
+
+        self._close()
+        self._df, self._docs = df, docs
+        path = self.directory / self.MATRIX_FILE
+        tmp_path = path.with_name(path.name + ".tmp")
+        try:
+            self._matrix = self._map(tmp_path, self._round_rows(max(item_ids, default=0) + 1), create=True)
+            for batch in self._batches(item_ids):
+                rows = await self._load_texts(session, batch)
+                await asyncio.to_thread(self._write_rows, batch, rows, False)
+            self._close()
+            os.replace(tmp_path, path)
+        except BaseException:
+            # Reopen (or rebuild) from disk on next use
+            self._close()
+            raise
+
+        self._matrix = self._map(path)
+        self._dirty -= covered
+        self._synced_at = started
+        self._save()
+        return len(item_ids)
+
+    async def _catch_up(self, session: AsyncSession) -> None:
+        """Queue items changed while the index was not running."""
+        result = await session.execute(select(Item.id, Item.updated_at))
+        stored = self._stored_rows()
+
+        existing = set()
+        stale = set()
+        for item_id, updated_at in result.all():
+            existing.add(item_id)
+            if item_id >= len(stored) or not stored[item_id]:
+                stale.add(item_id)
+            elif self._synced_at is None or (updated_at and updated_at > self._synced_at):
+                stale.add(item_id)
+
+        stale.update(int(i) for i in np.flatnonzero(stored) if int(i) not in existing)
+        if stale:
+            self.mark_dirty(stale)
+
+    async def _embed_items(self, session: AsyncSession, item_ids: list[int]) -> None:
+        for batch in self._batches(item_ids):
+            rows = await self._load_texts(session, batch)
+            await asyncio.to_thread(self._write_rows, batch, rows, True)
+
+    async def _load_texts(self, session: AsyncSession, item_ids: list[int]) -> dict[int, tuple]:
+        result = await session.execute(
+            select(Item.id, Item.title, Item.description, Item.extracted_text)
+            .where(Item.id.in_(item_ids))
+        )
+        return {row[0]: tuple(row[1:]) for row in result.all()}
+
+    def _batches(self, item_ids: list[int]):
+        for start in range(0, len(item_ids), self.EMBED_BATCH):
+            yield item_ids[start:start + self.EMBED_BATCH]
+
+    @staticmethod
+    def _count_documents(df: np.ndarray, rows) -> int:
+        """Add each document's features to df; returns the number of documents counted."""
+        docs = 0
+        for texts in rows:
+            hashes, _ = document_features(*texts)
+            if len(hashes):
+                df[np.unique(df_buckets(hashes))] += 1
+                docs += 1
+        return docs
+
+    def _write_rows(self, item_ids: list[int], rows: dict[int, tuple], count_new: bool) -> None:
+        """Embed and store a batch; items missing from rows are cleared."""
+        self._ensure_rows(max(item_ids) + 1)
+        for item_id in item_ids:
+            texts = rows.get(item_id)
+            if texts is None:
+                self._matrix[item_id] = 0.0
+                continue
+
+            features = document_features(*texts)
+            hashes, _ = features
+            if count_new and len(hashes) and not self._matrix[item_id].any():
+                self._df[np.unique(df_buckets(hashes))] += 1
+                self._docs += 1
+
+            vector = vectorize(features, self._df, self._docs, self.dimensions)
+            self._matrix[item_id] = 0.0 if vector is None else vector
+
+    # ---- Storage ----
+
+    def _open(self) -> bool:
+        """Map the stored index; False if it is missing or was built differently."""
+        try:
+            meta = json.loads((self.directory / self.META_FILE).read_text())
+            df = np.load(self.directory / self.DF_FILE)
+        except (OSError, ValueError):
+            return False
+
+        path = self.directory / self.MATRIX_FILE
+        if meta.get("dimensions") != self.dimensions or df.shape != (DF_BUCKETS,) or not path.exists():
+            return False
+
+        self._df = df.astype(np.int32)
+        self._docs = int(meta.get("docs", 0))
+        synced_at = meta.get("synced_at")
+        self._synced_at = datetime.fromisoformat(synced_at) if synced_at else None
+        self._matrix = self._map(path)
+        return True
+
+    def _map(self, path: Path, rows: int = 0, create: bool = False) -> np.memmap:
+        row_bytes = self.dimensions * np.dtype(np.float32).itemsize
+        if create:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(path, "wb") as f:
+                f.truncate(rows * row_bytes)
+        else:
+            rows = path.stat().st_size // row_bytes
+        return np.memmap(path, dtype=np.float32, mode="r+", shape=(max(rows, 1), self.dimensions))
+
+    def _round_rows(self, rows: int) -> int:
+        return -(-rows // self.GROW_ROWS) * self.GROW_ROWS
+
+    def _ensure_rows(self, rows: int) -> None:
+        """Grow the matrix file so that it has at least rows rows."""
+        if rows <= len(self._matrix):
+            return
+        path = Path(self._matrix.filename)
+        new_rows = self._round_rows(max(rows, len(self._matrix) * 2))
+        self._close()
+        with open(path, "r+b") as f:
+            f.truncate(new_rows * self.dimensions * np.dtype(np.float32).itemsize)
+        self._matrix = self._map(path)
+
+    def _close(self) -> None:
+        if self._matrix is not None:
+            self._matrix.flush()
+            self._matrix = None
+
+    def _save(self) -> None:
+        self._matrix.flush()
+
+        df_path = self.directory / self.DF_FILE
+        tmp_df_path = df_path.with_name("tmp_" + df_path.name)
+        np.save(tmp_df_path, self._df)
+        os.replace(tmp_df_path, df_path)
+
+        meta = {
+            "dimensions": self.dimensions,
+            "docs": self._docs,
+            "synced_at": self._synced_at.isoformat() if self._synced_at else None,
+        }
+        (self.directory / self.META_FILE).write_text(json.dumps(meta))
+
+    def _stored_rows(self) -> np.ndarray:
+        """Boolean mask of rows holding a vector."""
+        mask = np.zeros(len(self._matrix), dtype=bool)
+        for start in range(0, len(self._matrix), self.SEARCH_BATCH_ROWS):
+            block = self._matrix[start:start + self.SEARCH_BATCH_ROWS]
+            mask[start:start + len(block)] = np.einsum("ij,ij->i", block, block) > 0
+        return mask
+
+    # ---- Lookup ----
+
+    def embed_query(self, q: str) -> Optional[np.ndarray]:
+        """Embed search text with the index's IDF weights."""
+        return vectorize(text_features(q), self._df, self._docs, self.dimensions)
+
+    def search(self, vector: np.ndarray, k: int, min_similarity: float = 0.0) -> list[tuple[int, float]]:
+        """
+        Top-k items by cosine similarity to a unit query vector.
+
+        Returns:
+            List of (item_id, similarity), most similar first
+        """
+        ids, scores = self.search_many(vector[np.newaxis, :], k, min_similarity)
+        return [(int(i), float(score)) for i, score in zip(ids[0], scores[0]) if i >= 0]
+
+    def search_many(
+        self,
+        vectors: np.ndarray,
+        k: int,
+        min_similarity: float = 0.0,
+        exclude: Optional[np.ndarray] = None,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Top-k items for each of a batch of unit query vectors.
+
+        The matrix is scanned once in row blocks; each block is multiplied by
+        the whole batch and only its per-query top k is kept, so memory use
+        is bounded by the block size.
+
+        Args:
+            vectors: Query vectors, one per row
+            min_similarity: Matches must be more similar than this
+            exclude: Optional item ID per query to leave out (e.g. itself)
+
+        Returns:
+            Tuple of (item IDs, similarities), each of shape (len(vectors), k)
+            and most similar first; unused slots have ID -1
+        """
+        top = TopK(len(vectors), k)
+        for start, block in self.blocks():
+            scores = vectors @ block.T
+            if exclude is not None:
+                exclude_block(scores, exclude, start)
+            top.add(scores, start)
+        return top.result(min_similarity)
+
+    def blocks(self):
+        """Yield (first row, rows) blocks of the matrix, SEARCH_BATCH_ROWS at a time."""
+        matrix = self._matrix
+        if matrix is None:
+            return
+        for start in range(0, len(matrix), self.SEARCH_BATCH_ROWS):
+            yield start, matrix[start:start + self.SEARCH_BATCH_ROWS]
+
+    @property
+    def rows(self) -> int:
+        """Number of rows (highest storable item ID + 1)."""
+        return 0 if self._matrix is None else len(self._matrix)
+
+    def vectors(self, item_ids) -> np.ndarray:
+        """Stored vectors of the given items (zeros for items without one)."""
+        ids = np.asarray(item_ids, dtype=np.int64)
+        result = np.zeros((len(ids), self.dimensions), dtype=np.float32)
+        if self._matrix is not None and len(ids):
+            in_range = (ids >= 0) & (ids < len(self._matrix))
+            result[in_range] = self._matrix[ids[in_range]]
+        return result
+
+    def similarity(self, item_ids: list[int], vector: np.ndarray) -> np.ndarray:
+        """Cosine similarity of the given items to a unit query vector."""
+        return self.vectors(item_ids) @ vector
+
+
+vector_index = VectorIndex()
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_changes(session, flush_context):
+    changed = set()
+    for obj in (*session.new, *session.deleted):
+        if isinstance(obj, Item):
+            changed.add(obj.id)
+    for obj in session.dirty:
+        if isinstance(obj, Item):
+            attrs = inspect(obj).attrs
+            if any(attrs[field].history.has_changes() for field in _TEXT_FIELDS):
+                changed.add(obj.id)
+
+    if changed:
+        session.info.setdefault(_PENDING, set()).update(changed)
+
+
+@event.listens_for(Session, "after_commit")
+def _queue_changes(session):
+    changed = session.info.pop(_PENDING, None)
+    if changed:
+        vector_index.mark_dirty(changed)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changes(session):
+    session.info.pop(_PENDING, None)
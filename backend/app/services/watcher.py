@@ -0,0 +1,242 @@
+"""Watched folders, mirrored into the vault as their files change."""
+
+import asyncio
+import os
+from pathlib import Path
+from typing import Optional
+
+from sqlalchemy import delete, func, select
+
+from ..config import WatchedFolder, get_settings
+from ..database import async_session_maker
+from ..models import Category, Job, JobFile
+from .file_processor import FileProcessor
+from .jobs import TERMINAL_STATUSES, job_manager
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+    HAS_WATCHDOG = True
+except ImportError:
+    HAS_WATCHDOG = False
+    FileSystemEventHandler = object
+
+
+def _snapshot(root: Path) -> dict[str, tuple[int, int, int]]:
+    """Stat of every supported file under root, for polling."""
+    snapshot = {}
+    for path in FileProcessor.find_files(root):
+        try:
+            st = path.stat()
+        except OSError:
+            continue
+        snapshot[str(path)] = (st.st_size, st.st_mtime_ns, st.st_ino)
+    return snapshot
+
+
+class _Folder:
+    """A watched folder and the changes waiting to be imported."""
+
+    def __init__(self, root: Path, params: dict):
+        self.root = root
+        self.params = params  # category_id, auto_classify, sync
+        self.mode = "polling"  # or "events" when watchdog reports changes
+        self.pending: set[str] = set()
+        self.first_change = 0.0
+        self.last_change = 0.0
+        self.changed = asyncio.Event()
+
+    def add(self, paths: list[str]) -> None:
+        now = asyncio.get_running_loop().time()
+        if not self.pending:
+            self.first_change = now
+        self.last_change = now
+        self.pending.update(paths)
+        self.changed.set()
+
+    def take(self) -> list[str]:
+        """Pending paths, without those inside a pending directory."""
+        paths, self.pending = self.pending, set()
+        self.changed.clear()
+        return sorted(
+            path for path in paths
+            if not any(str(parent) in paths for parent in Path(path).parents)
+        )
+
+
+class _EventHandler(FileSystemEventHandler):
+    """Hands watchdog events (from its thread) to a folder on the event loop."""
+
+    IGNORED = {"opened", "closed_no_write"}
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, folder: _Folder):
+        super().__init__()
+        self._loop = loop
+        self._folder = folder
+
+    def on_any_event(self, event) -> None:
+        if event.event_type in self.IGNORED:
+            return
+        if event.is_directory and event.event_type == "modified":
+            return  # The changes inside are reported themselves
+        paths = [event.src_path]
+        if getattr(event, "dest_path", ""):
+            paths.append(event.dest_path)
+        self._loop.call_soon_threadsafe(self._folder.add, [str(path) for path in paths])
+
+
+class FolderWatcher:
+    """
+    Imports changes to the folders listed under watch.folders in config.yaml.
+
+    Changes are reported by watchdog (inotify, FSEvents, ...) or, without
+    it, found by comparing stat snapshots every poll_interval. Changed
+    paths are collected until none arrived for debounce_seconds (or for
+    max_delay_seconds at most) and then imported as one path job limited
+    to them, so saving a file in an editor, or copying a batch of files,
+    is one incremental import. Changes arriving while a job runs go into
+    the next one. Each folder is rescanned at startup to catch up with
+    changes made while the server was down. Only the latest keep_jobs
+    finished jobs of a folder are kept, so the jobs table does not grow
+    with every batch of changes.
+    """
+
+    def __init__(self):
+        self._folders: list[_Folder] = []
+        self._tasks: list[asyncio.Task] = []
+        self._observer = None
+
+    async def start(self) -> None:
+        """Start watching the configured folders."""
+        config = get_settings().watch
+        async with async_session_maker() as db:
+            for folder_config in config.folders:
+                folder = await self._load_folder(db, folder_config)
+                if folder is not None:
+                    self._folders.append(folder)
+        if not self._folders:
+            return
+
+        if HAS_WATCHDOG:
+            loop = asyncio.get_running_loop()
+            self._observer = Observer()
+            self._observer.start()
+            for folder in self._folders:
+                try:
+                    self._observer.schedule(_EventHandler(loop, folder), str(folder.root), recursive=True)
+                    folder.mode = "events"
+                except OSError as e:
+                    # e.g. out of inotify watches, or a file system without events
+                    print(f"Cannot watch {folder.root} ({e}), polling it instead")
+
+        for folder in self._folders:
+            self._tasks.append(asyncio.create_task(self._import_changes(folder)))
+            if folder.mode == "polling":
+                self._tasks.append(asyncio.create_task(self._poll(folder)))
+
+    async def stop(self) -> None:
+        """Stop watching; a job in progress is left to the job manager."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self._observer is not None:
+            self._observer.stop()
+            await asyncio.to_thread(self._observer.join)
+            self._observer = None
+        self._folders = []
+
+    async def _load_folder(self, db, folder_config: WatchedFolder) -> Optional[_Folder]:
+        root = Path(folder_config.path).expanduser().resolve()
+        if not root.is_dir():
+            print(f"Watched folder not found: {root}")
+            return None
+
+        category_id = None
+        if folder_config.category:
+            category_id = await db.scalar(
+                select(Category.id).where(func.lower(Category.name) == folder_config.category.lower())
+            )
+            if category_id is None:
+                print(f"Category '{folder_config.category}' not found for watched folder {root}")
+
+        return _Folder(root, {
+            "category_id": category_id,
+            "auto_classify": folder_config.auto_classify,
+            "sync": folder_config.sync,
+        })
+
+    async def _import_changes(self, folder: _Folder) -> None:
+        config = get_settings().watch
+        loop = asyncio.get_running_loop()
+
+        def relevant(paths: list[str]) -> list[str]:
+            # Drop changes in excluded directories (.git, ...) and to unsupported files
+            walker = FileProcessor.file_walker(folder.root)
+            return [
+                path for path in paths
+                if not walker.is_ignored(Path(path))
+                and not (os.path.isfile(path) and not FileProcessor.is_importable(Path(path)))
+            ]
+
+        # Catch up with changes made while the server was not running
+        await self._import(folder, None)
+        while True:
+            await folder.changed.wait()
+            # Wait for a quiet moment, but not forever if changes keep coming
+            while (delay := min(
+                folder.last_change + config.debounce_seconds,
+                folder.first_change + config.max_delay_seconds,
+            ) - loop.time()) > 0:
+                await asyncio.sleep(delay)
+            paths = await asyncio.to_thread(relevant, folder.take())
+            if paths:
+                await self._import(folder, paths)
+
+    async def _import(self, folder: _Folder, paths: Optional[list[str]]) -> None:
+        params = dict(folder.params, path=str(folder.root), watch=True)
+        if paths is not None:
+            params["paths"] = paths
+        try:
+            async with async_session_maker() as db:
+                job = await job_manager.create(db, "path", params)
+            await job_manager.wait(job.id)
+            await self._prune_jobs(folder)
+        except Exception as e:
+            print(f"Error importing changes in {folder.root}: {e}")
+
+    async def _prune_jobs(self, folder: _Folder) -> None:
+        """Delete the finished jobs of a folder beyond the latest keep_jobs."""
+        async with async_session_maker() as db:
+            result = await db.execute(
+                select(Job.id)
+                .where(
+                    Job.job_type == "path",
+                    Job.status.in_(TERMINAL_STATUSES),
+                    Job.params["watch"].as_boolean(),
+                    Job.params["path"].as_string() == str(folder.root),
+                )
+                .order_by(Job.id.desc())
+                .offset(get_settings().watch.keep_jobs)
+            )
+            job_ids = result.scalars().all()
+            if job_ids:
+                # job_files first: SQLite does not enforce the cascade
+                await db.execute(delete(JobFile).where(JobFile.job_id.in_(job_ids)))
+                await db.execute(delete(Job).where(Job.id.in_(job_ids)))
+                await db.commit()
+
+    async def _poll(self, folder: _Folder) -> None:
+        interval = get_settings().watch.poll_interval
+        snapshot = await asyncio.to_thread(_snapshot, folder.root)
+        while True:
+            await asyncio.sleep(interval)
+            current = await asyncio.to_thread(_snapshot, folder.root)
+            changed = [path for path, entry in current.items() if snapshot.get(path) != entry]
+            changed += [path for path in snapshot if path not in current]
+            snapshot = current
+            if changed:
+                folder.add(changed)
+
+
+folder_watcher = FolderWatcher()
@@ -1,11 +1,17 @@
 """Web scraper service for importing web pages."""
 
+import asyncio
+import random
 import re
+import time
+from email.utils import parsedate_to_datetime
 from typing import Optional
 from urllib.parse import urlparse
 
 from bs4 import BeautifulSoup
 
+from ..config import get_settings
+
 # Try to import curl_cffi for better anti-bot bypass, fall back to httpx
 try:
     from curl_cffi.requests import AsyncSession
@@ -14,6 +20,43 @@ except ImportError:
     HAS_CURL_CFFI = False
     import httpx
 
+# httpx speaks HTTP/2 only with the h2 package (curl_cffi always does)
+try:
+    import h2  # noqa: F401
+    HAS_H2 = True
+except ImportError:
+    HAS_H2 = False
+
+# Responses worth asking for again: timeouts, rate limits, server trouble
+RETRY_STATUSES = {408, 425, 429, 500, 502, 503, 504}
+
+
+class FetchError(Exception):
+    """A page could not be fetched; retryable for network errors and RETRY_STATUSES."""
+
+    def __init__(self, message: str, status: Optional[int] = None, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+    @property
+    def retryable(self) -> bool:
+        return self.status is None or self.status in RETRY_STATUSES
+
+
+def _retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds a Retry-After header asks to wait (a delay or an HTTP date)."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
 
 class WebScraper:
     """Service for scraping and importing web pages."""
@@ -34,22 +77,29 @@ class WebScraper:
         'Cache-Control': 'max-age=0',
     }
 
-    def __init__(self):
+    def __init__(self, max_connections: int = 10, timeout: float = 30.0):
         self.client = None
         self._use_curl_cffi = HAS_CURL_CFFI
+        self._max_connections = max_connections
+        self._timeout = timeout
 
     async def _get_client(self):
-        """Get or create the HTTP client."""
+        """Get or create the HTTP client, which keeps connections alive between requests."""
         if self.client is None:
             if self._use_curl_cffi:
                 # Use curl_cffi with Chrome impersonation for better anti-bot bypass
-                self.client = AsyncSession(impersonate="chrome120")
+                self.client = AsyncSession(impersonate="chrome120", max_clients=self._max_connections)
             else:
                 # Fall back to httpx
                 self.client = httpx.AsyncClient(
-                    timeout=30.0,
+                    timeout=self._timeout,
                     follow_redirects=True,
                     headers=self.DEFAULT_HEADERS,
+                    http2=HAS_H2,
+                    limits=httpx.Limits(
+                        max_connections=self._max_connections,
+                        max_keepalive_connections=self._max_connections,
+                    ),
                 )
         return self.client
 
@@ -59,25 +109,39 @@ class WebScraper:
 
         Returns:
             Tuple of (html_content, final_url)
+
+        Raises:
+            FetchError: On a network error or an HTTP error status
         """
         client = await self._get_client()
 
         if self._use_curl_cffi:
             # curl_cffi request
-            response = await client.get(
-                url,
-                headers=self.DEFAULT_HEADERS,
-                allow_redirects=True,
-                timeout=30,
-            )
-            if response.status_code >= 400:
-                raise Exception(f"HTTP {response.status_code}: {response.reason}")
-            return response.text, str(response.url)
+            try:
+                response = await client.get(
+                    url,
+                    headers=self.DEFAULT_HEADERS,
+                    allow_redirects=True,
+                    timeout=self._timeout,
+                )
+            except Exception as e:
+                raise FetchError(str(e))
+            reason = response.reason
         else:
             # httpx request
-            response = await client.get(url)
-            response.raise_for_status()
-            return response.text, str(response.url)
+            try:
+                response = await client.get(url)
+            except httpx.HTTPError as e:
+                raise FetchError(str(e) or type(e).__name__)
+            reason = response.reason_phrase
+
+        if response.status_code >= 400:
+            raise FetchError(
+                f"HTTP {response.status_code}: {reason}",
+                status=response.status_code,
+                retry_after=_retry_after(response.headers.get("retry-after")),
+            )
+        return response.text, str(response.url)
 
     async def scrape_url(self, url: str) -> dict:
         """
@@ -92,7 +156,11 @@ class WebScraper:
             - metadata: additional metadata
         """
         html_content, final_url = await self._fetch_url(url)
+        # Parsing a large page takes a while; keep the event loop free meanwhile
+        return await asyncio.to_thread(self._parse_page, html_content, url, final_url)
 
+    def _parse_page(self, html_content: str, url: str, final_url: str) -> dict:
+        """Extract title, description, text and metadata from a fetched page."""
         soup = BeautifulSoup(html_content, 'html.parser')
 
         # Extract title
@@ -205,3 +273,79 @@ class WebScraper:
             else:
                 await self.client.aclose()
             self.client = None
+
+
+class UrlFetcher:
+    """
+    Scrapes pages for URL imports over one shared, pooled client.
+
+    Connections are kept alive (and multiplexed over HTTP/2 where
+    available) across imports. At most import.url_concurrency requests
+    run at a time, at most url_per_host of them to one host, started at
+    least url_host_interval seconds apart. Network errors, timeouts, 429
+    and 5xx responses are retried url_retries times with exponential
+    backoff and jitter, or after the Retry-After the server asked for.
+    """
+
+    MAX_BACKOFF = 60.0
+
+    def __init__(self):
+        self._scraper: Optional[WebScraper] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._hosts: dict[str, tuple[asyncio.Semaphore, list[float]]] = {}
+
+    def _start(self) -> WebScraper:
+        if self._scraper is None:
+            config = get_settings().import_config
+            self._scraper = WebScraper(max_connections=config.url_concurrency, timeout=config.url_timeout)
+            self._slots = asyncio.Semaphore(config.url_concurrency)
+        return self._scraper
+
+    async def scrape(self, url: str) -> dict:
+        """
+        Scrape a URL like WebScraper.scrape_url(), politely and with retries.
+
+        Raises:
+            FetchError: If the page could not be fetched
+        """
+        scraper = self._start()
+        config = get_settings().import_config
+        host = urlparse(url).netloc.lower()
+        if host not in self._hosts:
+            self._hosts[host] = (asyncio.Semaphore(config.url_per_host), [0.0])
+        host_slots, next_start = self._hosts[host]
+        loop = asyncio.get_running_loop()
+
+        attempt = 0
+        while True:
+            async with host_slots:
+                # Space out the requests to one host
+                delay = next_start[0] - loop.time()
+                next_start[0] = max(next_start[0], loop.time()) + config.url_host_interval
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                try:
+                    async with self._slots:
+                        return await scraper.scrape_url(url)
+                except FetchError as e:
+                    if not e.retryable or attempt >= config.url_retries:
+                        raise
+                    wait = e.retry_after
+                    if wait is not None:
+                        # Keep the host waiting too, not just this request
+                        next_start[0] = max(next_start[0], loop.time() + min(wait, self.MAX_BACKOFF))
+            if wait is None:
+                wait = 2 ** attempt + random.random()
+            await asyncio.sleep(min(wait, self.MAX_BACKOFF))
+            attempt += 1
+
+    async def close(self) -> None:
+        """Close the shared client; the next scrape opens a new one."""
+        if self._scraper is not None:
+            await self._scraper.close()
+        self._scraper = None
+        self._slots = None
+        self._hosts = {}
+
+
+url_fetcher = UrlFetcher()
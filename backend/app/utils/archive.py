@@ -0,0 +1,83 @@
+"""Reading .zip and .tar archives member by member, without extracting them."""
+
+import posixpath
+import tarfile
+import zipfile
+from pathlib import Path
+from typing import BinaryIO, Iterator, Optional
+
+ARCHIVE_SUFFIXES = (".zip", ".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tbz2", ".tar.xz", ".txz")
+
+# Joins an archive's path and a member's name, as in course.zip!week1/notes.md
+MEMBER_SEPARATOR = "!"
+
+# Tried in order for zip names stored without the UTF-8 flag
+_ZIP_NAME_ENCODINGS = ("utf-8", "gbk")
+
+
+def is_archive(name: str) -> bool:
+    """Whether a file name has an archive suffix."""
+    return name.lower().endswith(ARCHIVE_SUFFIXES)
+
+
+def member_path(archive: str, member: str) -> str:
+    """Path recorded for a member of an archive."""
+    return f"{archive}{MEMBER_SEPARATOR}{member}"
+
+
+def split_member(path: str) -> Optional[tuple[str, str]]:
+    """(archive, member) of a path made by member_path(), None for other paths."""
+    start = 0
+    while (index := path.find(MEMBER_SEPARATOR, start)) != -1:
+        if is_archive(path[:index]):
+            return path[:index], path[index + 1:]
+        start = index + 1
+    return None
+
+
+def base_name(path: str) -> str:
+    """Last component of a path, or of the member's name for an archive member."""
+    member = split_member(path)
+    return posixpath.basename(member[1]) if member is not None else Path(path).name
+
+
+def _zip_name(info: zipfile.ZipInfo) -> str:
+    if info.flag_bits & 0x800:
+        return info.filename
+    # zipfile decoded the name as cp437; archives made on Chinese Windows use GBK
+    raw = info.filename.encode("cp437", errors="replace")
+    for encoding in _ZIP_NAME_ENCODINGS:
+        try:
+            return raw.decode(encoding)
+        except UnicodeDecodeError:
+            continue
+    return info.filename
+
+
+def _normalize(name: str) -> str:
+    return posixpath.normpath(name.replace("\\", "/")).lstrip("/")
+
+
+def iter_members(path: Path, name: Optional[str] = None) -> Iterator[tuple[str, int, BinaryIO]]:
+    """
+    Regular files in an archive as (name, size, stream), in archive order.
+
+    The format is chosen by name (the path's by default). A stream can
+    only be read until the next member is yielded: tar archives are read
+    sequentially, so a compressed one is decompressed exactly once.
+    Directories, links and devices are skipped.
+    """
+    if (name or path.name).lower().endswith(".zip"):
+        with zipfile.ZipFile(path) as archive:
+            for info in archive.infolist():
+                if info.is_dir():
+                    continue
+                with archive.open(info) as stream:
+                    yield _normalize(_zip_name(info)), info.file_size, stream
+    else:
+        with tarfile.open(path, "r|*") as archive:
+            for info in archive:
+                if not info.isfile():
+                    continue
+                stream = archive.extractfile(info)
+                yield _normalize(info.name), info.size, stream
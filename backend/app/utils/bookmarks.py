@@ -0,0 +1,53 @@
+"""URL lists from browser bookmark exports or plain text."""
+
+import json
+from typing import Iterator
+from urllib.parse import urlparse
+
+
+def _is_web_url(url: str) -> bool:
+    return urlparse(url).scheme in ("http", "https")
+
+
+def _json_urls(node) -> Iterator[str]:
+    # Chrome's Bookmarks file keeps them under "url", Firefox's JSON backups under "uri"
+    if isinstance(node, dict):
+        for key in ("url", "uri"):
+            if isinstance(node.get(key), str):
+                yield node[key]
+        for value in node.values():
+            if isinstance(value, (dict, list)):
+                yield from _json_urls(value)
+    elif isinstance(node, list):
+        for value in node:
+            yield from _json_urls(value)
+
+
+def _html_urls(text: str) -> Iterator[str]:
+    from bs4 import BeautifulSoup
+
+    for link in BeautifulSoup(text, "html.parser").find_all("a", href=True):
+        yield link["href"]
+
+
+def parse_urls(text: str) -> list[str]:
+    """
+    Web URLs in a bookmarks export or a list, in order and without repeats.
+
+    Reads the Netscape bookmark HTML every browser exports, Chrome's
+    Bookmarks JSON file and Firefox's JSON backups, or else one URL per
+    line (blank lines and lines starting with # are skipped). Other
+    schemes (javascript:, place:, file:, ...) are dropped.
+    """
+    stripped = text.lstrip()
+    urls = None
+    if stripped.startswith(("{", "[")):
+        try:
+            urls = _json_urls(json.loads(stripped))
+        except json.JSONDecodeError:
+            pass
+    elif stripped.lower().startswith(("<!doctype netscape-bookmark-file", "<html", "<dl")):
+        urls = _html_urls(text)
+    if urls is None:
+        urls = (line for line in text.splitlines() if not line.lstrip().startswith("#"))
+    return list(dict.fromkeys(url.strip() for url in urls if _is_web_url(url.strip())))
@@ -0,0 +1,156 @@
+"""Offline text embeddings: hashed TF-IDF vectors computed with NumPy."""
+
+import math
+import re
+import zlib
+from collections import Counter
+from functools import lru_cache
+from typing import Optional
+
+import numpy as np
+
+# Feature hashes are split into a document-frequency bucket (bits 0-17),
+# a vector slot (bits 18-30) and a sign (bit 31)
+DF_BUCKETS = 1 << 18
+MAX_DIMENSIONS = 1 << 13
+
+# Relative weight of each field in the document vector
+FIELD_WEIGHTS = {"title": 3.0, "description": 2.0, "extracted_text": 1.0}
+
+# Only the beginning of long documents is embedded
+MAX_TEXT_CHARS = 20000
+
+# Subword features relate inflections ("transform", "transforms",
+# "transformation") at a lower weight than whole words
+_NGRAM = 4
+_NGRAM_WEIGHT = 0.3
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+_CJK_RUN_RE = re.compile(
+    r"[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff]+"
+)
+
+
+# Features of a text: unique feature hashes and their summed weights
+Features = tuple[np.ndarray, np.ndarray]
+
+_EMPTY: Features = (np.zeros(0, dtype=np.uint32), np.zeros(0, dtype=np.float64))
+
+
+def _hash(feature: str) -> int:
+    # Stable across processes, unlike the salted built-in hash()
+    return zlib.crc32(feature.encode("utf-8"))
+
+
+@lru_cache(maxsize=65536)
+def _word_features(word: str) -> Features:
+    """Feature hashes and weights contributed by one case-folded word."""
+    hashes = []
+    weights = []
+
+    for run in _CJK_RUN_RE.findall(word):
+        grams = [run] if len(run) == 1 else [run[i:i + 2] for i in range(len(run) - 1)]
+        hashes.extend(_hash(gram) for gram in grams)
+        weights.extend([1.0] * len(grams))
+
+    for part in _CJK_RUN_RE.sub(" ", word).split():
+        if len(part) < 2 or part.isdigit():
+            continue
+        hashes.append(_hash(part))
+        weights.append(1.0)
+        if len(part) > _NGRAM:
+            padded = f"<{part}>"
+            grams = [padded[i:i + _NGRAM] for i in range(len(padded) - _NGRAM + 1)]
+            hashes.extend(_hash("#" + gram) for gram in grams)
+            weights.extend([_NGRAM_WEIGHT] * len(grams))
+
+    return np.array(hashes, dtype=np.uint32), np.array(weights, dtype=np.float64)
+
+
+def _combine(parts: list[Features]) -> Features:
+    """Concatenate features, summing the weights of equal hashes."""
+    parts = [part for part in parts if len(part[0])]
+    if not parts:
+        return _EMPTY
+    hashes = np.concatenate([h for h, _ in parts])
+    weights = np.concatenate([w for _, w in parts])
+    unique, inverse = np.unique(hashes, return_inverse=True)
+    return unique, np.bincount(inverse, weights=weights, minlength=len(unique))
+
+
+def _raw_features(text: Optional[str], weight: float) -> Features:
+    """Features of a text with repeated hashes not yet summed."""
+    if not text:
+        return _EMPTY
+
+    words = Counter(_WORD_RE.findall(text[:MAX_TEXT_CHARS].casefold()))
+    per_word = [_word_features(word) for word in words]
+    if not per_word:
+        return _EMPTY
+
+    # Features are computed once per distinct word, then scaled by its count
+    lengths = [len(hashes) for hashes, _ in per_word]
+    counts = np.fromiter(words.values(), dtype=np.float64, count=len(words)) * weight
+    return (
+        np.concatenate([hashes for hashes, _ in per_word]),
+        np.concatenate([weights for _, weights in per_word]) * np.repeat(counts, lengths),
+    )
+
+
+def text_features(text: Optional[str]) -> Features:
+    """
+    Weighted features of a text.
+
+    Words are case-folded; words of five or more characters also contribute
+    their character 4-grams. CJK runs, which have no word breaks, contribute
+    overlapping character bigrams.
+    """
+    return _combine([_raw_features(text, 1.0)])
+
+
+def document_features(title: Optional[str], description: Optional[str], extracted_text: Optional[str]) -> Features:
+    """Features of an item, with title and description weighted above the body."""
+    return _combine([
+        _raw_features(title, FIELD_WEIGHTS["title"]),
+        _raw_features(description, FIELD_WEIGHTS["description"]),
+        _raw_features(extracted_text, FIELD_WEIGHTS["extracted_text"]),
+    ])
+
+
+def df_buckets(hashes: np.ndarray) -> np.ndarray:
+    """Document-frequency bucket of each feature hash."""
+    return (hashes & (DF_BUCKETS - 1)).astype(np.int64)
+
+
+def vectorize(features: Features, df: np.ndarray, docs: int, dimensions: int) -> Optional[np.ndarray]:
+    """
+    Project weighted features onto an L2-normalized float32 vector.
+
+    Each feature gets a sublinear TF-IDF weight and is added, with a sign
+    taken from its hash, to one of `dimensions` slots (the hashing trick),
+    so no vocabulary has to be fitted or stored and vectors can be computed
+    one document at a time.
+
+    Args:
+        features: Weighted features from document_features or text_features
+        df: Hashed document frequencies (DF_BUCKETS counts)
+        docs: Number of documents counted in df
+
+    Returns:
+        Unit vector, or None if the text has no features
+    """
+    hashes, counts = features
+    if not len(hashes):
+        return None
+
+    idf = np.log((1.0 + docs) / (1.0 + df[df_buckets(hashes)])) + 1.0
+    # Sublinear TF; fractional counts (subword-only features) stay below one
+    tf = np.where(counts >= 1.0, 1.0 + np.log(np.maximum(counts, 1.0)), counts)
+    signs = np.where(hashes >> 31, -1.0, 1.0)
+    slots = (((hashes >> 18) & (MAX_DIMENSIONS - 1)) % dimensions).astype(np.int64)
+
+    vector = np.bincount(slots, weights=signs * tf * idf, minlength=dimensions)
+    norm = math.sqrt(float(vector @ vector))
+    if norm == 0.0:
+        return None
+    return (vector / norm).astype(np.float32)
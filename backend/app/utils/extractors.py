@@ -15,6 +15,8 @@ async def extract_text_from_file(file_path: Path, mime_type: Optional[str] = Non
     - PDF files (.pdf)
     - Word documents (.docx)
     - HTML files (.html, .htm)
+
+    A malformed file raises the parser's error.
     """
     if not mime_type:
         mime_type, _ = mimetypes.guess_type(str(file_path))
@@ -35,25 +37,21 @@ async def extract_text_from_file(file_path: Path, mime_type: Optional[str] = Non
     if not mime_type:
         return None
 
-    try:
-        if mime_type.startswith('text/') or mime_type in ['application/json', 'application/xml']:
-            return await _extract_text_plain(file_path)
-
-        elif mime_type == 'application/pdf':
-            return await _extract_text_pdf(file_path)
+    # Parser errors are raised, for services/extraction.py to report
+    if mime_type.startswith('text/') or mime_type in ['application/json', 'application/xml']:
+        return await _extract_text_plain(file_path)
 
-        elif mime_type in [
-            'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
-            'application/msword'
-        ]:
-            return await _extract_text_docx(file_path)
+    elif mime_type == 'application/pdf':
+        return await _extract_text_pdf(file_path)
 
-        elif mime_type == 'text/html':
-            return await _extract_text_html(file_path)
+    elif mime_type in [
+        'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+        'application/msword'
+    ]:
+        return await _extract_text_docx(file_path)
 
-    except Exception as e:
-        print(f"Error extracting text from {file_path}: {e}")
-        return None
+    elif mime_type == 'text/html':
+        return await _extract_text_html(file_path)
 
     return None
 
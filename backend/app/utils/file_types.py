@@ -0,0 +1,25 @@
+"""File types the vault imports, by extension."""
+
+from pathlib import PurePath
+
+from .archive import is_archive
+
+DOCUMENT_EXTENSIONS = {'.pdf', '.docx', '.doc', '.txt', '.md', '.rst', '.html', '.htm'}
+IMAGE_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.gif', '.webp', '.bmp', '.svg'}
+VIDEO_EXTENSIONS = {'.mp4', '.webm', '.mkv', '.avi', '.mov', '.wmv'}
+CODE_EXTENSIONS = {
+    '.py', '.js', '.ts', '.jsx', '.tsx', '.java', '.c', '.cpp', '.h', '.hpp',
+    '.go', '.rs', '.rb', '.php', '.swift', '.kt', '.scala', '.sh', '.bash',
+    '.json', '.yaml', '.yml', '.xml', '.toml', '.ini', '.sql', '.css', '.scss',
+}
+SUPPORTED_EXTENSIONS = DOCUMENT_EXTENSIONS | IMAGE_EXTENSIONS | VIDEO_EXTENSIONS | CODE_EXTENSIONS
+
+
+def is_supported_file(name: str) -> bool:
+    """Whether a file name has a supported extension."""
+    return PurePath(name).suffix.lower() in SUPPORTED_EXTENSIONS
+
+
+def is_importable(name: str) -> bool:
+    """Whether a directory import takes a file: a supported type, or an archive to look into."""
+    return is_supported_file(name) or is_archive(name)
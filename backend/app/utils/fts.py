@@ -0,0 +1,366 @@
+"""SQLite FTS5 helpers for the items full-text index."""
+
+import re
+from typing import Iterable, Optional
+
+from sqlalchemy import bindparam, column, table, text
+from sqlalchemy.engine import Connection
+
+# Core handle for the FTS5 virtual table (it is not an ORM model)
+items_fts = table("items_fts", column("rowid"))
+
+# Indexed columns, in the order used for bm25() weights
+FTS_COLUMNS = ("title", "description", "extracted_text")
+
+# Supported tokenizer modes:
+# - unicode61: SQLite default, one token per run of letters (no CJK word breaks)
+# - trigram:   SQLite trigram tokenizer, substring matching for terms of 3+ chars
+# - bigram:    CJK runs are pre-tokenized into overlapping bigrams in Python
+TOKENIZERS = ("unicode61", "trigram", "bigram")
+
+# Items whose rows are written to items_fts per statement in bigram mode
+_INDEX_BATCH = 500
+
+_TERM_RE = re.compile(r"\w+", re.UNICODE)
+
+# Han (incl. extension A and compatibility), kana and hangul syllables
+_CJK_CHARS = "\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff"
+_CJK_RUN_RE = re.compile(f"[{_CJK_CHARS}]+")
+
+# Control characters are separators for unicode61, so they split tokens without
+# colliding with real text. RUN_MARK wraps a CJK run, BIGRAM_SEP joins bigrams.
+RUN_MARK = "\x1e"
+BIGRAM_SEP = "\x1f"
+
+# Markers passed to snippet()/highlight() around matches, parsed into offsets
+MATCH_START = "\x02"
+MATCH_END = "\x03"
+_MARKER_SPLIT_RE = re.compile(f"([{MATCH_START}{MATCH_END}{BIGRAM_SEP}])")
+# Text around the bigrams of a run, e.g. the ellipsis of a truncated snippet
+_RUN_EDGES_RE = re.compile(
+    f"([^{_CJK_CHARS}{MATCH_START}{MATCH_END}]*)(.*?)([^{_CJK_CHARS}{MATCH_START}{MATCH_END}]*)",
+    re.DOTALL,
+)
+
+
+def _bigram_run(match: re.Match) -> str:
+    run = match.group(0)
+    if len(run) == 1:
+        grams = [run]
+    else:
+        grams = [run[i:i + 2] for i in range(len(run) - 1)]
+    return f"{RUN_MARK}{BIGRAM_SEP.join(grams)}{RUN_MARK}"
+
+
+def cjk_bigrams(value: Optional[str]) -> Optional[str]:
+    """
+    Split CJK runs into overlapping bigrams for the unicode61 tokenizer.
+
+    "机器学习 notes" becomes "机器 器学 学习 notes" (with control-character
+    separators), so any CJK substring of two or more characters is a phrase of
+    adjacent tokens. Non-CJK text is left untouched.
+    """
+    if not value:
+        return value
+    return _CJK_RUN_RE.sub(_bigram_run, value)
+
+
+def _restore_run(segment: str) -> str:
+    """Rejoin the bigrams of one CJK run, keeping match markers in place."""
+    lead, segment, tail = _RUN_EDGES_RE.fullmatch(segment).groups()
+    parts = [part for part in _MARKER_SPLIT_RE.split(segment) if part]
+    tokens = [part for part in parts if part not in (MATCH_START, MATCH_END, BIGRAM_SEP)]
+    if len(tokens) < 2:
+        return lead + segment.replace(BIGRAM_SEP, "") + tail
+
+    # Bigram i covers characters i and i+1 of the run
+    chars = list(tokens[0]) + [token[-1] for token in tokens[1:]]
+    markers: list[tuple[int, int, str]] = []  # (position, order, marker)
+    index = -1
+    for part in parts:
+        if part == MATCH_START:
+            markers.append((index + 1, 1, MATCH_START))
+        elif part == MATCH_END:
+            markers.append((index + len(tokens[index]), 0, MATCH_END))
+        elif part != BIGRAM_SEP:
+            index += 1
+
+    restored = []
+    markers.sort()
+    for position, char in enumerate(chars + [""]):
+        while markers and markers[0][0] == position:
+            restored.append(markers.pop(0)[2])
+        restored.append(char)
+    return lead + "".join(restored) + tail
+
+
+def parse_fragment(value: Optional[str], tokenizer: str = "unicode61") -> Optional[tuple[str, list[tuple[int, int]]]]:
+    """
+    Split snippet()/highlight() output into text and match offsets.
+
+    The FTS functions are called with MATCH_START/MATCH_END markers. In
+    bigram mode their output is pre-tokenized text, so CJK runs are turned
+    back into the original characters first (a snippet may start inside a
+    run, which is still recognizable by its bigram separators).
+
+    Returns:
+        Tuple of (plain text, [start, end) character ranges of matches), or
+        None if value is empty
+    """
+    if not value:
+        return None
+
+    if tokenizer == "bigram":
+        value = "".join(
+            _restore_run(segment) if BIGRAM_SEP in segment else segment
+            for segment in value.split(RUN_MARK)
+        )
+
+    text = []
+    ranges = []
+    depth = 0
+    start = 0
+    for char in value:
+        if char == MATCH_START:
+            if depth == 0:
+                start = len(text)
+            depth += 1
+        elif char == MATCH_END:
+            depth = max(depth - 1, 0)
+            if depth == 0 and len(text) > start:
+                if ranges and ranges[-1][1] == start:
+                    ranges[-1] = (ranges[-1][0], len(text))
+                else:
+                    ranges.append((start, len(text)))
+        else:
+            text.append(char)
+    return "".join(text), ranges
+
+
+def _create_table_sql(tokenizer: str) -> str:
+    """
+    CREATE statement for the FTS5 table.
+
+    unicode61 and trigram index the items table as external content. The
+    bigram table stores its own, pre-tokenized copy of the text, written
+    by index_items(), so that the schema needs no Python SQL function and
+    the vault stays writable with the plain sqlite3 shell.
+    """
+    if tokenizer == "trigram":
+        options = "content='items', content_rowid='id', tokenize='trigram'"
+    elif tokenizer == "bigram":
+        options = "prefix='1 2'"
+    else:
+        options = "content='items', content_rowid='id', prefix='2 3'"
+
+    return (
+        "CREATE VIRTUAL TABLE items_fts USING fts5("
+        f"title, description, extracted_text, {options})"
+    )
+
+
+def _trigger_statements(tokenizer: str) -> list[str]:
+    """Triggers keeping items_fts in sync with the items table."""
+    cols = ", ".join(FTS_COLUMNS)
+
+    if tokenizer == "bigram":
+        # Rows are written by index_items(); the triggers only drop stale ones,
+        # so a change made outside the app, or a write path that misses
+        # index_items(), leaves a gap that ensure_fts_index() reports and fills
+        return [
+            """
+            CREATE TRIGGER IF NOT EXISTS items_fts_ad AFTER DELETE ON items BEGIN
+                DELETE FROM items_fts WHERE rowid = old.id;
+            END
+            """,
+            f"""
+            CREATE TRIGGER IF NOT EXISTS items_fts_au AFTER UPDATE OF {cols} ON items BEGIN
+                DELETE FROM items_fts WHERE rowid = old.id;
+            END
+            """,
+        ]
+
+    new_values = ", ".join(f"new.{c}" for c in FTS_COLUMNS)
+    old_values = ", ".join(f"old.{c}" for c in FTS_COLUMNS)
+
+    return [
+        f"""
+        CREATE TRIGGER IF NOT EXISTS items_fts_ai AFTER INSERT ON items BEGIN
+            INSERT INTO items_fts(rowid, {cols}) VALUES (new.id, {new_values});
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS items_fts_ad AFTER DELETE ON items BEGIN
+            INSERT INTO items_fts(items_fts, rowid, {cols})
+            VALUES ('delete', old.id, {old_values});
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS items_fts_au AFTER UPDATE OF {cols} ON items BEGIN
+            INSERT INTO items_fts(items_fts, rowid, {cols})
+            VALUES ('delete', old.id, {old_values});
+            INSERT INTO items_fts(rowid, {cols}) VALUES (new.id, {new_values});
+        END
+        """,
+    ]
+
+
+def _drop_statements() -> list[str]:
+    return [
+        "DROP TRIGGER IF EXISTS items_fts_ai",
+        "DROP TRIGGER IF EXISTS items_fts_ad",
+        "DROP TRIGGER IF EXISTS items_fts_au",
+        "DROP TABLE IF EXISTS items_fts",
+        "DROP VIEW IF EXISTS items_fts_source",  # Bigram content table of older vaults
+    ]
+
+
+def index_items(conn: Connection, item_ids: Iterable[int], tokenizer: str) -> None:
+    """
+    Write the items_fts rows of items added or edited, in bigram mode, where
+    no trigger does; a no-op for the other tokenizers.
+
+    Must run in the transaction that wrote the items.
+    """
+    if tokenizer != "bigram":
+        return
+    item_ids = list(item_ids)
+    select_rows = text(
+        "SELECT id, title, description, extracted_text FROM items WHERE id IN :ids"
+    ).bindparams(bindparam("ids", expanding=True))
+    delete_rows = text("DELETE FROM items_fts WHERE rowid IN :ids").bindparams(bindparam("ids", expanding=True))
+    insert_row = text(
+        "INSERT INTO items_fts(rowid, title, description, extracted_text) "
+        "VALUES (:id, :title, :description, :extracted_text)"
+    )
+    for start in range(0, len(item_ids), _INDEX_BATCH):
+        chunk = item_ids[start:start + _INDEX_BATCH]
+        rows = conn.execute(select_rows, {"ids": chunk}).all()
+        conn.execute(delete_rows, {"ids": chunk})
+        if rows:
+            conn.execute(insert_row, [
+                {
+                    "id": row.id,
+                    "title": cjk_bigrams(row.title),
+                    "description": cjk_bigrams(row.description),
+                    "extracted_text": cjk_bigrams(row.extracted_text),
+                }
+                for row in rows
+            ])
+
+
+def rebuild_fts_index(conn: Connection, tokenizer: str = "unicode61") -> int:
+    """
+    Rebuild items_fts from the items table.
+
+    Returns:
+        Number of indexed items
+    """
+    if tokenizer == "bigram":
+        conn.execute(text("DELETE FROM items_fts"))
+        index_items(conn, conn.execute(text("SELECT id FROM items")).scalars().all(), tokenizer)
+    else:
+        conn.execute(text("INSERT INTO items_fts(items_fts) VALUES ('rebuild')"))
+    return conn.execute(text("SELECT COUNT(*) FROM items")).scalar() or 0
+
+
+def ensure_fts_index(conn: Connection, tokenizer: str = "unicode61") -> None:
+    """
+    Create the FTS5 table and sync triggers, backfilling existing vaults.
+
+    The table and triggers are recreated when the definition (e.g. the
+    tokenizer) changed since the index was built. Otherwise the indexed
+    rowids are compared with the items table: in bigram mode items missing
+    from the index (written without index_items()) are indexed and stale
+    rows dropped, and the other modes rebuild the index on any difference
+    (e.g. vaults created before the triggers existed).
+    """
+    if tokenizer not in TOKENIZERS:
+        raise ValueError(f"Unknown FTS tokenizer: {tokenizer!r} (expected one of {TOKENIZERS})")
+
+    expected_sql = _create_table_sql(tokenizer)
+    current_sql = conn.execute(
+        text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'items_fts'")
+    ).scalar()
+
+    needs_rebuild = False
+    if current_sql != expected_sql:
+        for statement in _drop_statements():
+            conn.execute(text(statement))
+        conn.execute(text(expected_sql))
+        needs_rebuild = True
+
+    for statement in _trigger_statements(tokenizer):
+        conn.execute(text(statement))
+
+    if not needs_rebuild:
+        missing = conn.execute(text(
+            "SELECT id FROM items WHERE id NOT IN (SELECT id FROM items_fts_docsize)"
+        )).scalars().all()
+        stale = conn.execute(text(
+            "SELECT id FROM items_fts_docsize WHERE id NOT IN (SELECT id FROM items)"
+        )).scalars().all()
+        if missing or stale:
+            print(f"Search index out of date: {len(missing)} items missing, {len(stale)} stale rows")
+            if tokenizer == "bigram":
+                index_items(conn, missing + stale, tokenizer)
+            else:
+                needs_rebuild = True
+
+    if needs_rebuild:
+        rebuild_fts_index(conn, tokenizer)
+
+
+def _is_cjk(term: str) -> bool:
+    return bool(_CJK_RUN_RE.fullmatch(term))
+
+
+def match_phrase(words: list[str], tokenizer: str = "unicode61", prefix: bool = False) -> Optional[str]:
+    """
+    Quote words as one FTS5 phrase, tokenized the same way as indexed text.
+
+    In bigram mode CJK runs become adjacent bigrams, and a lone CJK character
+    matches as a bigram prefix. In trigram mode words shorter than three
+    characters cannot use the index, which includes most CJK words (数学,
+    指针): they are dropped here, and search matches such terms with a LIKE
+    scan of that term (see build_match_expression()), so CJK vaults should
+    use bigram mode. prefix is ignored in trigram mode since trigram phrases
+    already match substrings.
+
+    Returns:
+        Phrase expression, or None if no word is indexable
+    """
+    if tokenizer == "trigram":
+        words = [word for word in words if len(word) >= 3]
+    if not words:
+        return None
+
+    if tokenizer == "bigram":
+        phrase = f'"{" ".join(cjk_bigrams(word) for word in words)}"'
+        if prefix or (len(words) == 1 and len(words[0]) == 1 and _is_cjk(words[0])):
+            phrase += "*"
+    elif tokenizer == "trigram":
+        phrase = f'"{" ".join(words)}"'
+    else:
+        phrase = f'"{" ".join(words)}"' + ("*" if prefix else "")
+    return phrase
+
+
+def build_match_query(q: str, tokenizer: str = "unicode61") -> Optional[str]:
+    """
+    Convert free text from the search box into an FTS5 MATCH expression.
+
+    Every word becomes a quoted phrase (so FTS5 operators in user input are
+    treated literally) and all phrases must match. The last term is a prefix
+    term, which keeps search-as-you-type results useful mid-word.
+
+    Returns:
+        MATCH expression, or None if the query has no indexable terms
+    """
+    terms = _TERM_RE.findall(q)
+    phrases = [
+        match_phrase([term], tokenizer, prefix=i == len(terms) - 1)
+        for i, term in enumerate(terms)
+    ]
+    phrases = [phrase for phrase in phrases if phrase is not None]
+    return " ".join(phrases) if phrases else None
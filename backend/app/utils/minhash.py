@@ -0,0 +1,184 @@
+"""MinHash signatures and LSH banding for near-duplicate detection."""
+
+import hashlib
+import re
+import zlib
+from typing import Iterable, Optional
+
+import numpy as np
+from sqlalchemy import bindparam, text
+from sqlalchemy.engine import Connection
+
+# A signature is NUM_PERM 32-bit minimums, split into BANDS bands of
+# ROWS values. Two texts become candidates when any band matches, which
+# happens with probability 1 - (1 - J^ROWS)^BANDS for Jaccard similarity J:
+# ~1.0 at J=0.8, 0.64 at J=0.5 and 0.12 at J=0.3.
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+
+# Shingles are runs of SHINGLE consecutive words (CJK characters count as
+# words). Texts with fewer than MIN_WORDS words get no signature, since a
+# few shared words say little about the whole document.
+SHINGLE = 3
+MIN_WORDS = 32
+
+# Only the beginning of long documents is compared
+MAX_TEXT_CHARS = 200000
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+_CJK_CHAR_RE = re.compile(r"[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff]")
+
+# Universal hash functions (a * x + b) mod p over 32-bit shingle hashes
+_PRIME = np.uint64(4294967311)  # smallest prime above 2**32
+_rng = np.random.RandomState(20240601)
+_A = _rng.randint(1, 1 << 32, size=NUM_PERM, dtype=np.uint64)
+_B = _rng.randint(0, 1 << 32, size=NUM_PERM, dtype=np.uint64)
+
+_CHUNK = 2048  # shingles hashed per step, bounds temporary memory
+_WRITE_BATCH = 500  # items per IN (...) query
+
+
+def _words(value: str) -> list[str]:
+    folded = _CJK_CHAR_RE.sub(lambda m: f" {m.group(0)} ", value[:MAX_TEXT_CHARS].casefold())
+    return _WORD_RE.findall(folded)
+
+
+def minhash_signature(value: Optional[str]) -> Optional[np.ndarray]:
+    """
+    MinHash signature of a text's word shingles.
+
+    The fraction of equal positions in two signatures estimates the Jaccard
+    similarity of the texts' shingle sets, so reformatted or lightly edited
+    copies of a document score close to 1.
+
+    Returns:
+        NUM_PERM uint32 values, or None if the text is too short
+    """
+    if not value:
+        return None
+    words = _words(value)
+    if len(words) < MIN_WORDS:
+        return None
+
+    vocabulary = {word: zlib.crc32(word.encode("utf-8")) for word in set(words)}
+    hashes = np.fromiter((vocabulary[word] for word in words), dtype=np.uint64, count=len(words))
+
+    # Mix word hashes into one 32-bit hash per shingle (wrapping uint64 math)
+    mixed = np.zeros(len(words) - SHINGLE + 1, dtype=np.uint64)
+    for offset in range(SHINGLE):
+        mixed = mixed * np.uint64(0x100000001B3) + hashes[offset:offset + len(mixed)]
+    shingles = np.unique((mixed ^ (mixed >> np.uint64(32))) & np.uint64(0xFFFFFFFF))
+
+    signature = np.full(NUM_PERM, np.iinfo(np.uint64).max, dtype=np.uint64)
+    for start in range(0, len(shingles), _CHUNK):
+        chunk = shingles[start:start + _CHUNK, None]
+        np.minimum(signature, ((chunk * _A + _B) % _PRIME).min(axis=0), out=signature)
+    return (signature & np.uint64(0xFFFFFFFF)).astype(np.uint32)
+
+
+def band_buckets(signature: np.ndarray) -> list[int]:
+    """LSH bucket of each band of a signature, as signed 64-bit integers."""
+    return [
+        int.from_bytes(hashlib.blake2b(band.tobytes(), digest_size=8).digest(), "little", signed=True)
+        for band in signature.reshape(BANDS, ROWS)
+    ]
+
+
+def signature_similarity(a: bytes, b: bytes) -> float:
+    """Estimated Jaccard similarity of two stored signatures."""
+    return float(np.mean(np.frombuffer(a, dtype=np.uint32) == np.frombuffer(b, dtype=np.uint32)))
+
+
+def write_signatures(conn: Connection, signatures: dict[int, Optional[np.ndarray]]) -> None:
+    """Replace the stored signatures and band buckets of items; None stores none."""
+    item_ids = list(signatures)
+    for start in range(0, len(item_ids), _WRITE_BATCH):
+        chunk = item_ids[start:start + _WRITE_BATCH]
+        for table in ("item_signature_bands", "item_signatures"):
+            conn.execute(
+                text(f"DELETE FROM {table} WHERE item_id IN :ids").bindparams(bindparam("ids", expanding=True)),
+                {"ids": chunk},
+            )
+        rows = [(item_id, signatures[item_id]) for item_id in chunk if signatures[item_id] is not None]
+        if not rows:
+            continue
+        conn.execute(
+            text("INSERT INTO item_signatures(item_id, signature) VALUES (:item_id, :signature)"),
+            [{"item_id": item_id, "signature": signature.tobytes()} for item_id, signature in rows],
+        )
+        conn.execute(
+            text("INSERT INTO item_signature_bands(band, bucket, item_id) VALUES (:band, :bucket, :item_id)"),
+            [
+                {"band": band, "bucket": bucket, "item_id": item_id}
+                for item_id, signature in rows
+                for band, bucket in enumerate(band_buckets(signature))
+            ],
+        )
+
+
+def index_signatures(conn: Connection, item_ids: Iterable[int]) -> None:
+    """Compute and store the signatures of items from their extracted_text."""
+    item_ids = list(item_ids)
+    select_text = text("SELECT id, extracted_text FROM items WHERE id IN :ids").bindparams(
+        bindparam("ids", expanding=True),
+    )
+    for start in range(0, len(item_ids), _WRITE_BATCH):
+        chunk = item_ids[start:start + _WRITE_BATCH]
+        texts = dict(conn.execute(select_text, {"ids": chunk}).tuples().all())
+        write_signatures(conn, {item_id: minhash_signature(texts.get(item_id)) for item_id in chunk})
+
+
+_TRIGGERS = ("items_minhash_ad", "items_minhash_au")
+
+
+def _trigger_statements() -> list[str]:
+    """
+    Triggers dropping the signatures of deleted or edited items.
+
+    New signatures are computed in Python by the writers (see
+    write_signatures()), so the triggers need no SQL function and writes
+    from outside the app still work; their items merely go without one.
+    """
+    delete = (
+        "DELETE FROM item_signature_bands WHERE item_id = old.id; "
+        "DELETE FROM item_signatures WHERE item_id = old.id;"
+    )
+    return [
+        f"CREATE TRIGGER IF NOT EXISTS items_minhash_ad AFTER DELETE ON items BEGIN {delete} END",
+        f"CREATE TRIGGER IF NOT EXISTS items_minhash_au AFTER UPDATE OF extracted_text ON items BEGIN {delete} END",
+    ]
+
+
+def rebuild_signatures(conn: Connection) -> int:
+    """
+    Recompute the signatures and band buckets of all items.
+
+    Returns:
+        Number of items with a signature
+    """
+    conn.execute(text("DELETE FROM item_signature_bands"))
+    conn.execute(text("DELETE FROM item_signatures"))
+    index_signatures(conn, conn.execute(text("SELECT id FROM items WHERE extracted_text IS NOT NULL")).scalars().all())
+    return conn.execute(text("SELECT COUNT(*) FROM item_signatures")).scalar() or 0
+
+
+def ensure_signature_index(conn: Connection) -> None:
+    """
+    Create the signature triggers, backfilling vaults created before them.
+
+    The signature tables themselves are ORM tables created by create_all.
+    """
+    existing = set(conn.execute(text(
+        "SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'items_minhash_%'"
+    )).scalars())
+
+    # The insert trigger of older vaults computed signatures with SQL functions
+    if "items_minhash_ai" in existing:
+        for name in existing:
+            conn.execute(text(f"DROP TRIGGER {name}"))
+    for statement in _trigger_statements():
+        conn.execute(text(statement))
+
+    if not existing >= set(_TRIGGERS):
+        rebuild_signatures(conn)
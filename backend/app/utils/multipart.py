@@ -0,0 +1,110 @@
+"""Streaming multipart/form-data parsing for large uploads."""
+
+from typing import AsyncIterator, Union
+
+from starlette.requests import Request
+
+try:
+    from python_multipart.multipart import MultipartParser, parse_options_header
+except ImportError:  # python-multipart < 0.0.13
+    from multipart.multipart import MultipartParser, parse_options_header
+
+# Text fields are buffered, so they get a small limit
+MAX_FIELD_SIZE = 64 * 1024
+
+# Events: ("field", name, value), ("file", name, filename), ("data", name, chunk)
+FormEvent = Union[tuple[str, str, str], tuple[str, str, bytes]]
+
+
+class MultipartError(ValueError):
+    """Raised for request bodies that are not valid multipart/form-data."""
+
+
+def _decode(value: bytes) -> str:
+    return value.decode("utf-8", errors="replace")
+
+
+async def iter_form(request: Request) -> AsyncIterator[FormEvent]:
+    """
+    Parse a multipart/form-data body as it arrives.
+
+    Unlike request.form(), file contents are not spooled anywhere: each
+    chunk of a file part is yielded as soon as it is received, so the
+    caller decides where it goes and memory stays bounded by the size of
+    the chunks the server reads from the socket.
+
+    Yields:
+        ("field", name, value) for each text field, ("file", name, filename)
+        when a file part starts, then ("data", name, chunk) for its content
+
+    Raises:
+        MultipartError: If the body is not multipart or a field is too large
+    """
+    content_type, options = parse_options_header(request.headers.get("content-type", ""))
+    boundary = options.get(b"boundary")
+    if content_type != b"multipart/form-data" or not boundary:
+        raise MultipartError("Expected a multipart/form-data body")
+
+    events: list[FormEvent] = []
+    part = {}
+    header = {"field": b"", "value": b""}
+
+    def on_part_begin():
+        part.clear()
+        part["headers"] = {}
+
+    def on_header_field(data, start, end):
+        header["field"] += data[start:end]
+
+    def on_header_value(data, start, end):
+        header["value"] += data[start:end]
+
+    def on_header_end():
+        part["headers"][header["field"].lower()] = header["value"]
+        header["field"] = header["value"] = b""
+
+    def on_headers_finished():
+        _, disposition = parse_options_header(part["headers"].get(b"content-disposition", b""))
+        part["name"] = _decode(disposition.get(b"name", b""))
+        if b"filename" in disposition:
+            part["file"] = True
+            events.append(("file", part["name"], _decode(disposition[b"filename"])))
+        else:
+            part["data"] = bytearray()
+
+    def on_part_data(data, start, end):
+        if part.get("file"):
+            events.append(("data", part["name"], bytes(data[start:end])))
+        else:
+            if len(part["data"]) + end - start > MAX_FIELD_SIZE:
+                raise MultipartError(f"Form field {part['name']!r} exceeds {MAX_FIELD_SIZE} bytes")
+            part["data"] += data[start:end]
+
+    def on_part_end():
+        if not part.get("file"):
+            events.append(("field", part["name"], _decode(bytes(part["data"]))))
+
+    parser = MultipartParser(boundary, {
+        "on_part_begin": on_part_begin,
+        "on_part_data": on_part_data,
+        "on_part_end": on_part_end,
+        "on_header_field": on_header_field,
+        "on_header_value": on_header_value,
+        "on_header_end": on_header_end,
+        "on_headers_finished": on_headers_finished,
+    })
+
+    try:
+        async for chunk in request.stream():
+            parser.write(chunk)
+            for event in events:
+                yield event
+            events.clear()
+        parser.finalize()
+    except MultipartError:
+        raise
+    except Exception as e:
+        raise MultipartError(f"Malformed multipart body: {e}") from e
+
+    for event in events:
+        yield event
@@ -0,0 +1,104 @@
+"""Opaque continuation tokens for keyset (cursor) and offset pagination."""
+
+import base64
+import json
+from datetime import datetime
+from typing import Union
+
+from sqlalchemy import and_, tuple_
+from sqlalchemy.sql.elements import ColumnElement
+
+SortValue = Union[datetime, float, None]
+
+
+def _encode(payload: dict) -> str:
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode(token: str) -> dict:
+    raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+    return json.loads(raw)
+
+
+def encode_cursor(sort_value: SortValue, item_id: int) -> str:
+    """
+    Encode the sort key of the last row on a page into a continuation token.
+
+    Args:
+        sort_value: Value of the primary sort column (timestamp or number)
+        item_id: Item ID, used as tie-breaker
+    """
+    if isinstance(sort_value, datetime):
+        return _encode({"t": "dt", "v": sort_value.isoformat(), "id": item_id})
+    return _encode({"t": "num", "v": sort_value, "id": item_id})
+
+
+def decode_cursor(token: str) -> tuple[SortValue, int]:
+    """
+    Decode a continuation token produced by encode_cursor.
+
+    Raises:
+        ValueError: If the token is malformed
+    """
+    try:
+        payload = _decode(token)
+        item_id = int(payload["id"])
+        value = payload["v"]
+        if payload["t"] == "dt":
+            value = datetime.fromisoformat(value)
+        elif value is not None:
+            value = float(value)
+    except (ValueError, KeyError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {token}") from e
+
+    return value, item_id
+
+
+def encode_offset_cursor(offset: int) -> str:
+    """
+    Continuation token for rows ordered by a value that is not stable,
+    such as a bm25() rank, which changes with every change to the index.
+    """
+    return _encode({"t": "off", "v": offset})
+
+
+def decode_offset_cursor(token: str) -> int:
+    """
+    Decode a continuation token produced by encode_offset_cursor.
+
+    Raises:
+        ValueError: If the token is malformed
+    """
+    try:
+        payload = _decode(token)
+        if payload["t"] != "off":
+            raise ValueError("not an offset cursor")
+        offset = int(payload["v"])
+        if offset < 0:
+            raise ValueError("negative offset")
+    except (ValueError, KeyError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {token}") from e
+    return offset
+
+
+def keyset_condition(
+    sort_column: ColumnElement,
+    id_column: ColumnElement,
+    sort_value: SortValue,
+    item_id: int,
+    descending: bool = True,
+) -> ColumnElement:
+    """
+    WHERE clause selecting rows that come after (sort_value, item_id).
+
+    Rows are assumed to be ordered by (sort_column, id_column), both
+    descending or both ascending. The row-value comparison lets SQLite seek
+    on a (sort_column, id) index instead of scanning past earlier pages, so
+    sort_column should be non-NULL for the rows being paged.
+    """
+    if sort_value is None:
+        return and_(sort_column.is_(None), id_column < item_id if descending else id_column > item_id)
+    if descending:
+        return tuple_(sort_column, id_column) < tuple_(sort_value, item_id)
+    return tuple_(sort_column, id_column) > tuple_(sort_value, item_id)
@@ -0,0 +1,222 @@
+"""Parser for the search bar's query language."""
+
+import re
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import PurePosixPath
+from typing import Optional
+
+from .fts import match_phrase
+
+# Field prefixes and the filter each one maps to
+FIELDS = {
+    "tag": "tag",
+    "type": "type",
+    "cat": "category",
+    "category": "category",
+    "after": "after",
+    "before": "before",
+    "ext": "ext",
+}
+
+_TOKEN_RE = re.compile(
+    r"""
+    (?P<negated>-)?
+    (?:(?P<field>[A-Za-z]+):)?
+    (?:"(?P<quoted>[^"]*)"?|(?P<bare>[^\s"]+))
+    """,
+    re.VERBOSE,
+)
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+_DATE_FORMATS = ("%Y-%m-%d", "%Y-%m", "%Y")
+
+
+class QuerySyntaxError(ValueError):
+    """Raised for queries that cannot be compiled."""
+
+
+@dataclass
+class Term:
+    """Free-text term: a word, a quoted phrase, or a word* prefix."""
+    text: str
+    phrase: bool = False
+    prefix: bool = False
+
+
+@dataclass
+class FieldFilter:
+    """field:value filter; OR and comma-separated values are alternatives."""
+    field: str
+    values: list[str]
+    negated: bool = False
+
+
+@dataclass
+class SearchQuery:
+    """Parsed query: all groups must match, each group is an OR of terms."""
+    groups: list[list[Term]] = field(default_factory=list)
+    excluded: list[Term] = field(default_factory=list)
+    filters: list[FieldFilter] = field(default_factory=list)
+
+
+def parse_query(q: str) -> SearchQuery:
+    """
+    Parse search bar input into free-text terms and field filters.
+
+    Supported syntax:
+        word "exact phrase" prefix*     terms that must all match
+        a OR b                          either term (also joins filters on one field)
+        -word, NOT word                 exclude items matching a term or filter
+        tag:name  type:file  cat:"Category name" (or cat:3)  ext:pdf
+        after:2025-01  before:2025-03-15   created on/after or before the
+                                           start of a year, month or day
+    Unknown fields (e.g. "http:") are treated as text.
+
+    Raises:
+        QuerySyntaxError: For invalid dates, or OR between clauses it cannot join
+    """
+    query = SearchQuery()
+    pending_or = False
+    pending_not = False
+    last = None  # ("term", group) or ("filter", FieldFilter) of the previous clause
+
+    for match in _TOKEN_RE.finditer(q):
+        name = (match.group("field") or "").lower()
+        quoted = match.group("quoted")
+        value = quoted if quoted is not None else match.group("bare")
+        negated = bool(match.group("negated")) or pending_not
+
+        if not name and quoted is None and not match.group("negated"):
+            if value == "OR":
+                pending_or = last is not None
+                continue
+            if value == "NOT":
+                pending_not = True
+                continue
+        pending_not = False
+
+        if name and name not in FIELDS:
+            value = f"{match.group('field')}:{value}"
+            name = ""
+
+        if name:
+            values = [quoted] if quoted is not None else [v for v in value.split(",") if v]
+            if not values:
+                continue
+            if FIELDS[name] in ("after", "before"):
+                for v in values:
+                    parse_date(v)
+            if pending_or:
+                if not last or last[0] != "filter" or last[1].field != FIELDS[name] \
+                        or last[1].negated != negated:
+                    raise QuerySyntaxError("OR can only join terms, or filters on the same field")
+                last[1].values.extend(values)
+            else:
+                query.filters.append(FieldFilter(FIELDS[name], values, negated))
+                last = ("filter", query.filters[-1])
+        else:
+            prefix = quoted is None and value.endswith("*")
+            term = Term(value.rstrip("*") if prefix else value, phrase=quoted is not None, prefix=prefix)
+            if not term.text:
+                continue
+            if pending_or and (negated or last[0] != "term"):
+                raise QuerySyntaxError("OR can only join terms, or filters on the same field")
+            if negated:
+                query.excluded.append(term)
+                last = None
+            elif pending_or:
+                last[1].append(term)
+            else:
+                query.groups.append([term])
+                last = ("term", query.groups[-1])
+        pending_or = False
+
+    return query
+
+
+def parse_date(value: str) -> datetime:
+    """Start of the year, month or day written as YYYY, YYYY-MM or YYYY-MM-DD."""
+    for date_format in _DATE_FORMATS:
+        try:
+            return datetime.strptime(value, date_format)
+        except ValueError:
+            continue
+    raise QuerySyntaxError(f"Invalid date: {value!r} (expected YYYY, YYYY-MM or YYYY-MM-DD)")
+
+
+def _term_phrase(term: Term, tokenizer: str, prefix: bool) -> Optional[str]:
+    """MATCH expression of a term, or None if the index cannot find it."""
+    if tokenizer == "trigram":
+        # Trigram phrases match substrings: a quoted phrase is kept as typed,
+        # while the words of a bare term (e.g. "linear-algebra") must each match
+        if term.phrase:
+            return f'"{term.text}"' if len(term.text) >= 3 else None
+        phrases = [match_phrase([word], tokenizer) for word in _WORD_RE.findall(term.text)]
+        if not phrases or None in phrases:
+            return None
+        return phrases[0] if len(phrases) == 1 else f"({' AND '.join(phrases)})"
+    return match_phrase(_WORD_RE.findall(term.text), tokenizer, prefix=prefix or term.prefix)
+
+
+def like_patterns(term: Term) -> list[str]:
+    """Substrings an item must all contain to match a term without the index."""
+    if term.phrase:
+        return [term.text]
+    return _WORD_RE.findall(term.text) or [term.text]
+
+
+def build_match_expression(
+    query: SearchQuery, tokenizer: str = "unicode61",
+) -> tuple[Optional[str], Optional[str], SearchQuery]:
+    """
+    Compile free-text terms into FTS5 MATCH expressions.
+
+    All terms are quoted (so FTS5 syntax in user input is literal) and
+    combined with explicit AND/OR. As with plain queries, the last bare word
+    is also matched as a prefix. Excluded terms are returned as a separate
+    expression, since FTS5 NOT needs a positive left-hand side and the query
+    may have none.
+
+    Terms the index cannot find (words of under three characters with the
+    trigram tokenizer, or terms without word characters) are never dropped:
+    the OR group holding one, or the excluded term itself, is returned
+    instead, to be matched term by term with like_patterns().
+
+    Returns:
+        Tuple of (expression items must match or None, expression of
+        excluded terms or None, query with the groups and excluded terms
+        left to the LIKE scan)
+    """
+    groups = []
+    unindexed = SearchQuery()
+    for i, group in enumerate(query.groups):
+        is_last = i == len(query.groups) - 1
+        phrases = [
+            _term_phrase(term, tokenizer, prefix=is_last and not term.phrase and j == len(group) - 1)
+            for j, term in enumerate(group)
+        ]
+        if None in phrases:
+            unindexed.groups.append(group)
+        else:
+            groups.append(phrases[0] if len(phrases) == 1 else f"({' OR '.join(phrases)})")
+
+    excluded = []
+    for term in query.excluded:
+        phrase = _term_phrase(term, tokenizer, prefix=False)
+        if phrase is None:
+            unindexed.excluded.append(term)
+        else:
+            excluded.append(phrase)
+
+    return (
+        " AND ".join(groups) if groups else None,
+        " OR ".join(excluded) if excluded else None,
+        unindexed,
+    )
+
+
+def file_extension(path: Optional[str]) -> Optional[str]:
+    """Lower-case extension of a path without the dot, or None."""
+    if not path:
+        return None
+    return PurePosixPath(path).suffix[1:].lower() or None
@@ -0,0 +1,241 @@
+"""Directory walking with .gitignore-style exclude rules."""
+
+import os
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+# Read in every directory walked; rules apply to that directory and below
+IGNORE_FILES = (".gitignore", ".kvaultignore")
+
+# A directory holding this file is a Python virtualenv, whatever its name
+VIRTUALENV_MARKER = "pyvenv.cfg"
+
+# Default exclude rules of directory imports (import.exclude in config.yaml)
+DEFAULT_EXCLUDE = (
+    ".git/", ".hg/", ".svn/", "node_modules/", "__pycache__/", ".venv/", "venv/",
+    ".tox/", ".mypy_cache/", ".pytest_cache/", ".cache/", ".Trash/", "__MACOSX/",
+)
+
+
+@dataclass
+class _Rule:
+    regex: re.Pattern
+    negate: bool
+    dir_only: bool
+
+
+def _translate(pattern: str) -> str:
+    """Regex for a gitignore glob, matched against a /-separated relative path."""
+    out = []
+    i, n = 0, len(pattern)
+    while i < n:
+        c = pattern[i]
+        if c == "*":
+            if pattern.startswith("**", i) and (i == 0 or pattern[i - 1] == "/"):
+                if pattern[i + 2:i + 3] == "/":
+                    out.append("(?:.*/)?")  # **/ : any number of directories
+                    i += 3
+                    continue
+                if i + 2 == n:
+                    out.append(".*")  # trailing /** : everything inside
+                    i += 2
+                    continue
+            out.append("[^/]*")
+            while i < n and pattern[i] == "*":
+                i += 1
+            continue
+        if c == "?":
+            out.append("[^/]")
+        elif c == "[":
+            end = pattern.find("]", i + 2)
+            if end == -1:
+                out.append(re.escape(c))
+            else:
+                body = pattern[i + 1:end].replace("\\", "\\\\")
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                out.append(f"[{body}]")
+                i = end + 1
+                continue
+        elif c == "\\" and i + 1 < n:
+            out.append(re.escape(pattern[i + 1]))
+            i += 2
+            continue
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return "".join(out)
+
+
+def parse_rule(line: str) -> Optional[_Rule]:
+    """Compile one line of a .gitignore file; None for blanks and comments."""
+    line = re.sub(r"(?<!\\)\s+$", "", line.rstrip("\n"))
+    if not line or line.startswith("#"):
+        return None
+    negate = line.startswith("!")
+    if negate:
+        line = line[1:]
+    elif line.startswith(("\\!", "\\#")):
+        line = line[1:]
+    dir_only = line.endswith("/")
+    line = line.rstrip("/")
+    if not line:
+        return None
+    # A slash other than a trailing one anchors the pattern to the ignore
+    # file's directory; otherwise it matches a name at any depth
+    anchored = "/" in line
+    regex = _translate(line.lstrip("/"))
+    if not anchored:
+        regex = "(?:.*/)?" + regex
+    return _Rule(re.compile(regex + r"\Z"), negate, dir_only)
+
+
+class FileWalker:
+    """
+    Streams the files under a root, skipping what exclude rules match.
+
+    Rules use .gitignore syntax: the exclude patterns given apply from the
+    root, and .gitignore/.kvaultignore files apply from the directory they
+    are in; later rules win, and ! re-includes. Ignored directories,
+    virtualenvs and the skip directories are not entered at all.
+
+    Each directory is read with one os.scandir(), whose entries tell files
+    from directories without a stat() per entry, and files are yielded as
+    they are found.
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        exclude: Iterable[str] = (),
+        skip: Iterable[Path] = (),
+    ):
+        self.root = root
+        self._root = str(root)
+        self._prefix = self._root.rstrip(os.sep) + os.sep
+        self._skip = {str(path) for path in skip}
+        self._base_rules = [rule for rule in map(parse_rule, exclude) if rule is not None]
+        # directory -> rules from its ignore files, for ancestors of walked paths
+        self._dir_rules: dict[str, list[_Rule]] = {}
+
+    def walk(self, start: Optional[Path] = None) -> Iterator[os.DirEntry]:
+        """Files under start (the root by default), depth first in name order."""
+        start = str(start or self.root)
+        stack = [(start, self._rulesets(start))]
+        while stack:
+            directory, rulesets = stack.pop()
+            try:
+                with os.scandir(directory) as it:
+                    entries = sorted(it, key=lambda entry: entry.name)
+            except OSError:
+                continue
+            names = {entry.name for entry in entries}
+            if VIRTUALENV_MARKER in names and directory != self._root:
+                continue
+            own = self._read_rules(directory, names)
+            if own:
+                rulesets = rulesets + [(self._relative(directory), own)]
+
+            subdirectories = []
+            for entry in entries:
+                try:
+                    is_dir = entry.is_dir(follow_symlinks=False)
+                    if not is_dir and not entry.is_file():
+                        continue
+                except OSError:
+                    continue
+                if self._matches(self._relative(entry.path), is_dir, rulesets):
+                    continue
+                if is_dir:
+                    if entry.path not in self._skip:
+                        subdirectories.append((entry.path, rulesets))
+                else:
+                    yield entry
+            stack.extend(reversed(subdirectories))
+
+    def is_ignored(self, path: Path) -> bool:
+        """Whether the walk would skip path, or a directory it is in."""
+        current = self._root
+        if str(path) == current:
+            return False
+        rulesets = self._rulesets(current) + [("", self._read_rules(current))]
+        parts = self._relative(str(path)).split("/")
+        for depth, part in enumerate(parts):
+            current = os.path.join(current, part)
+            is_dir = depth < len(parts) - 1 or os.path.isdir(current)
+            if current in self._skip or self._matches(self._relative(current), is_dir, rulesets):
+                return True
+            if is_dir:
+                if os.path.exists(os.path.join(current, VIRTUALENV_MARKER)):
+                    return True
+                own = self._read_rules(current)
+                if own:
+                    rulesets = rulesets + [(self._relative(current), own)]
+        return False
+
+    def excludes(self, relative: str) -> bool:
+        """
+        Whether the exclude rules match a /-separated path below the root,
+        or a directory it is in. Ignore files are not read.
+        """
+        parts = relative.split("/")
+        rulesets = [("", self._base_rules)]
+        return any(
+            self._matches("/".join(parts[:depth + 1]), depth < len(parts) - 1, rulesets)
+            for depth in range(len(parts))
+        )
+
+    def _relative(self, path: str) -> str:
+        """Path relative to the root, /-separated ("" for the root)."""
+        if path == self._root:
+            return ""
+        relative = path[len(self._prefix):]
+        return relative if os.sep == "/" else relative.replace(os.sep, "/")
+
+    def _rulesets(self, directory: str) -> list[tuple[str, list[_Rule]]]:
+        """(base, rules) applying inside directory, from the root down, excluding its own."""
+        rulesets = [("", self._base_rules)]
+        relative = self._relative(directory)
+        current = self._root
+        for part in relative.split("/") if relative else []:
+            own = self._read_rules(current)
+            if own:
+                rulesets.append((self._relative(current), own))
+            current = os.path.join(current, part)
+        return rulesets
+
+    def _read_rules(self, directory: str, names: Optional[set[str]] = None) -> list[_Rule]:
+        if directory in self._dir_rules:
+            return self._dir_rules[directory]
+        rules = []
+        for name in IGNORE_FILES:
+            if names is not None and name not in names:
+                continue
+            try:
+                with open(os.path.join(directory, name), encoding="utf-8", errors="replace") as f:
+                    rules.extend(rule for rule in map(parse_rule, f) if rule is not None)
+            except OSError:
+                continue
+        if names is None:
+            # Only cache the lookups made outside the walk, which revisit ancestors
+            self._dir_rules[directory] = rules
+        return rules
+
+    @staticmethod
+    def _matches(relative: str, is_dir: bool, rulesets: list[tuple[str, list[_Rule]]]) -> bool:
+        ignored = False
+        for base, rules in rulesets:
+            if base:
+                if not relative.startswith(base + "/"):
+                    continue
+                subpath = relative[len(base) + 1:]
+            else:
+                subpath = relative
+            for rule in rules:
+                if rule.dir_only and not is_dir:
+                    continue
+                if ignored == rule.negate and rule.regex.match(subpath):
+                    ignored = not rule.negate
+        return ignored
@@ -1,5 +1,6 @@
 """Import commands."""
 
+import hashlib
 import os
 from pathlib import Path
 
@@ -9,13 +10,37 @@ from rich.progress import Progress, SpinnerColumn, TextColumn
 
 console = Console()
 
+HASH_BATCH = 500  # hashes per existence check
+CHUNKED_UPLOAD_SIZE = 64 * 1024 * 1024  # larger files use resumable uploads
+CHUNK_RETRIES = 3
+
 
 def import_content(
     path: str = typer.Argument(..., help="File, directory, or URL to import"),
     category: str = typer.Option(None, "--category", "-c", help="Category name"),
     no_classify: bool = typer.Option(False, "--no-classify", help="Disable auto-classification"),
+    upload: bool = typer.Option(
+        False, "--upload", help="Upload the files instead of letting the server read the path (for a remote server)",
+    ),
+    server_path: bool = typer.Option(
+        False, "--server-path", hidden=True, help="The default now; accepted for existing scripts",
+    ),
+    sync: bool = typer.Option(
+        False, "--sync", help="Also update or delete items whose files were moved or deleted",
+    ),
+    urls: bool = typer.Option(
+        False, "--urls", help="Import the web pages listed in the file (one per line, or a browser bookmarks export)",
+    ),
 ):
-    """Import files, directories, or URLs into the vault."""
+    """
+    Import files, directories, or URLs into the vault.
+
+    The server reads the path itself, in a background job, and only the
+    files that changed since its last scan of the path. With --upload,
+    for a server on another machine, files are hashed locally and only
+    content the vault does not already have is uploaded; every file is
+    hashed on each run, and archives are uploaded again each time.
+    """
     import httpx
 
     # Check if it's a URL
@@ -29,7 +54,16 @@ def import_content(
             console.print(f"[red]Path not found: {local_path}[/red]")
             raise typer.Exit(1)
 
-        _import_path(local_path, category, not no_classify)
+        if upload and sync:
+            console.print("[red]--sync needs the server to read the path; it cannot be used with --upload[/red]")
+            raise typer.Exit(1)
+
+        if urls:
+            _import_urls(local_path, category, not no_classify)
+        elif upload:
+            _upload_path(local_path, category, not no_classify)
+        else:
+            _import_path(local_path, category, not no_classify, sync)
 
 
 def _import_url(url: str, category: str = None, auto_classify: bool = True):
@@ -70,6 +104,8 @@ def _import_url(url: str, category: str = None, auto_classify: bool = True):
             console.print(f"[green]Successfully imported: {item['title']}[/green]")
             console.print(f"  ID: {item['id']}")
             console.print(f"  Category: {item.get('category_name') or 'Uncategorized'}")
+            if item.get("possible_duplicate_of"):
+                console.print(f"[yellow]  Possible duplicate of #{item['possible_duplicate_of']}[/yellow]")
         else:
             error = response.json().get("detail", "Unknown error")
             console.print(f"[red]Failed to import: {error}[/red]")
@@ -79,8 +115,65 @@ def _import_url(url: str, category: str = None, auto_classify: bool = True):
         console.print("Start the server with: [bold]kvault serve[/bold]")
 
 
-def _import_path(path: Path, category: str = None, auto_classify: bool = True):
-    """Import a file or directory."""
+def _import_urls(path: Path, category: str = None, auto_classify: bool = True):
+    """Import the URLs listed in a file, or in a bookmarks export, as a background job."""
+    import httpx
+
+    console.print(f"[cyan]Importing URLs from {path}[/cyan]")
+
+    try:
+        # Get category ID if name provided
+        category_id = None
+        if category:
+            category_id = _get_category_id(category)
+            if not category_id:
+                console.print(f"[yellow]Category '{category}' not found, skipping category assignment[/yellow]")
+
+        response = httpx.post(
+            "http://127.0.0.1:8000/api/jobs/",
+            json={
+                "job_type": "urls",
+                "url_list": path.read_text(encoding="utf-8", errors="replace"),
+                "category_id": category_id,
+                "auto_classify": auto_classify,
+            },
+            timeout=60.0,
+        )
+        if response.status_code != 200:
+            error = response.json().get("detail", "Unknown error")
+            console.print(f"[red]Failed to import: {error}[/red]")
+            return
+
+        job = response.json()
+        console.print(f"  Job #{job['id']} started for {len(job['params']['urls'])} URLs")
+        try:
+            job = _follow_job(job)
+        except (httpx.TimeoutException, httpx.NetworkError, KeyboardInterrupt):
+            console.print(f"[yellow]Stopped following job #{job['id']}; it continues on the server.[/yellow]")
+            console.print(f"Check on it with: [bold]GET /api/jobs/{job['id']}[/bold]")
+            return
+
+        if job["status"] == "completed":
+            console.print(f"[green]Import completed![/green]")
+        else:
+            console.print(f"[yellow]Import {job['status']}{': ' + job['error'] if job.get('error') else ''}[/yellow]")
+        console.print(f"  Imported: {job['imported']} pages")
+        console.print(f"  Skipped: {job['skipped']} pages already in the vault")
+
+        if job["errors"]:
+            console.print(f"[yellow]Errors ({job['failed']}):[/yellow]")
+            for error in job["errors"][:5]:  # Show first 5 errors
+                console.print(f"  - {error['error']}")
+            if job["failed"] > 5:
+                console.print(f"  ... and {job['failed'] - 5} more")
+
+    except httpx.ConnectError:
+        console.print("[yellow]Vault server is not running.[/yellow]")
+        console.print("Start the server with: [bold]kvault serve[/bold]")
+
+
+def _import_path(path: Path, category: str = None, auto_classify: bool = True, sync: bool = False):
+    """Import a file or directory read by the server, as a background job."""
     import httpx
 
     if path.is_file():
@@ -96,46 +189,270 @@ def _import_path(path: Path, category: str = None, auto_classify: bool = True):
             if not category_id:
                 console.print(f"[yellow]Category '{category}' not found, skipping category assignment[/yellow]")
 
-        with Progress(
+        response = httpx.post(
+            "http://127.0.0.1:8000/api/jobs/",
+            json={
+                "job_type": "path",
+                "path": str(path),
+                "category_id": category_id,
+                "auto_classify": auto_classify,
+                "sync": sync,
+            },
+            timeout=60.0,
+        )
+        if response.status_code != 200:
+            error = response.json().get("detail", "Unknown error")
+            console.print(f"[red]Failed to import: {error}[/red]")
+            return
+
+        job = response.json()
+        console.print(f"  Job #{job['id']} started")
+        try:
+            job = _follow_job(job)
+        except (httpx.TimeoutException, httpx.NetworkError, KeyboardInterrupt):
+            console.print(f"[yellow]Stopped following job #{job['id']}; it continues on the server.[/yellow]")
+            console.print(f"Check on it with: [bold]GET /api/jobs/{job['id']}[/bold]")
+            return
+
+        if job["status"] == "completed":
+            console.print(f"[green]Import completed![/green]")
+        else:
+            console.print(f"[yellow]Import {job['status']}{': ' + job['error'] if job.get('error') else ''}[/yellow]")
+        console.print(f"  Imported: {job['imported']} items")
+        console.print(f"  Skipped: {job['skipped']} items")
+        console.print(f"  Unchanged since the last scan: {job['unchanged']} files")
+        if sync:
+            console.print(f"  Moved: {job['moved']} items")
+            console.print(f"  Deleted: {job['deleted']} items")
+
+        if job["errors"]:
+            console.print(f"[yellow]Errors ({job['failed']}):[/yellow]")
+            for error in job["errors"][:5]:  # Show first 5 errors
+                console.print(f"  - {error['error']}")
+            if job["failed"] > 5:
+                console.print(f"  ... and {job['failed'] - 5} more")
+
+    except httpx.ConnectError:
+        console.print("[yellow]Vault server is not running.[/yellow]")
+        console.print("Start the server with: [bold]kvault serve[/bold]")
+
+
+def _follow_job(job: dict) -> dict:
+    """Show a job's progress from its event stream until it finishes."""
+    import json
+
+    import httpx
+
+    with Progress(
+        SpinnerColumn(),
+        TextColumn("[progress.description]{task.description}"),
+        console=console,
+    ) as progress:
+        task = progress.add_task("Processing files...", total=None)
+        with httpx.stream(
+            "GET",
+            f"http://127.0.0.1:8000/api/jobs/{job['id']}/events",
+            timeout=httpx.Timeout(60.0, read=None),
+        ) as response:
+            for line in response.iter_lines():
+                if not line.startswith("data: "):
+                    continue
+                job = json.loads(line[len("data: "):])
+                done = job["imported"] + job["skipped"] + job["failed"] + job["unchanged"]
+                current = Path(job["current"]).name if job.get("current") else ""
+                progress.update(
+                    task,
+                    description=f"Processed {done}/{job['discovered']} files {current}",
+                )
+        progress.update(task, completed=True)
+    return job
+
+
+def _upload_path(path: Path, category: str = None, auto_classify: bool = True):
+    """Import a file or directory by uploading the contents the vault lacks."""
+    import httpx
+
+    if path.is_file():
+        console.print(f"[cyan]Importing file: {path}[/cyan]")
+    else:
+        console.print(f"[cyan]Importing directory: {path}[/cyan]")
+
+    try:
+        # Get category ID if name provided
+        category_id = None
+        if category:
+            category_id = _get_category_id(category)
+            if not category_id:
+                console.print(f"[yellow]Category '{category}' not found, skipping category assignment[/yellow]")
+
+        files = _files_to_upload(path)
+        imported_items = []
+        archive_members = 0  # Items imported from uploaded archives
+        skipped = 0
+        uploaded_bytes = 0
+        errors = []
+
+        with httpx.Client() as client, Progress(
             SpinnerColumn(),
             TextColumn("[progress.description]{task.description}"),
             console=console,
         ) as progress:
-            task = progress.add_task("Processing files...", total=None)
+            task = progress.add_task("Hashing files...", total=None)
+            hashes = {}
+            for file_path in files:
+                progress.update(task, description=f"Hashing {file_path.name}...")
+                try:
+                    hashes[file_path] = _hash_file(file_path)
+                except OSError as e:
+                    errors.append(f"Error reading {file_path.name}: {e}")
 
-            response = httpx.post(
-                "http://127.0.0.1:8000/api/import/path",
-                json={
-                    "path": str(path),
-                    "category_id": category_id,
-                    "auto_classify": auto_classify,
-                },
-                timeout=300.0,  # 5 minutes for large imports
-            )
+            progress.update(task, description="Checking which files the vault already has...")
+            missing = _missing_hashes(client, sorted(set(hashes.values())))
+
+            for file_path, file_hash in hashes.items():
+                if file_hash not in missing:
+                    skipped += 1
+                    continue
+                # Same content twice in this import: upload it once
+                missing.discard(file_hash)
+
+                progress.update(task, description=f"Uploading {file_path.name}...")
+                try:
+                    response = _upload_file(client, file_path, category_id, auto_classify)
+                except (httpx.TimeoutException, httpx.NetworkError, OSError) as e:
+                    errors.append(f"Error importing {file_path.name}: {e}")
+                    continue
+                if response.status_code == 200:
+                    data = response.json()
+                    if "items_imported" in data:
+                        # An archive, imported member by member
+                        archive_members += data["items_imported"]
+                        skipped += data["items_skipped"]
+                        errors.extend(data["errors"])
+                    else:
+                        imported_items.append(data)
+                    uploaded_bytes += file_path.stat().st_size
+                else:
+                    errors.append(f"Error importing {file_path.name}: {response.json().get('detail', 'Unknown error')}")
 
             progress.update(task, completed=True)
 
-        if response.status_code == 200:
-            result = response.json()
-            console.print(f"[green]Import completed![/green]")
-            console.print(f"  Imported: {result['items_imported']} items")
-            console.print(f"  Skipped: {result['items_skipped']} items")
-
-            if result['errors']:
-                console.print(f"[yellow]Errors:[/yellow]")
-                for error in result['errors'][:5]:  # Show first 5 errors
-                    console.print(f"  - {error}")
-                if len(result['errors']) > 5:
-                    console.print(f"  ... and {len(result['errors']) - 5} more")
-        else:
-            error = response.json().get("detail", "Unknown error")
-            console.print(f"[red]Failed to import: {error}[/red]")
+        console.print(f"[green]Import completed![/green]")
+        console.print(
+            f"  Imported: {len(imported_items) + archive_members} items "
+            f"({uploaded_bytes / (1024 * 1024):.1f} MB uploaded)"
+        )
+        console.print(f"  Skipped: {skipped} items already in the vault")
+
+        duplicates = [item for item in imported_items if item.get('possible_duplicate_of')]
+        if duplicates:
+            console.print(f"[yellow]Possible duplicates:[/yellow]")
+            for item in duplicates[:5]:
+                console.print(f"  - {item['title']} (#{item['id']}) ~ #{item['possible_duplicate_of']}")
+            if len(duplicates) > 5:
+                console.print(f"  ... and {len(duplicates) - 5} more")
+
+        if errors:
+            console.print(f"[yellow]Errors:[/yellow]")
+            for error in errors[:5]:  # Show first 5 errors
+                console.print(f"  - {error}")
+            if len(errors) > 5:
+                console.print(f"  ... and {len(errors) - 5} more")
 
     except httpx.ConnectError:
         console.print("[yellow]Vault server is not running.[/yellow]")
         console.print("Start the server with: [bold]kvault serve[/bold]")
 
 
+def _hash_file(path: Path) -> str:
+    """SHA-256 of a file, read in blocks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while block := f.read(1024 * 1024):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _files_to_upload(path: Path) -> list[Path]:
+    """
+    The file itself, or the supported files and archives under a directory.
+
+    The server's import.exclude is not known here: the default exclude
+    rules apply, with the .gitignore/.kvaultignore files under the path.
+    """
+    from backend.app.utils.file_types import is_importable
+    from backend.app.utils.walker import DEFAULT_EXCLUDE, FileWalker
+
+    if path.is_file():
+        return [path]
+    return [Path(entry.path) for entry in FileWalker(path, exclude=DEFAULT_EXCLUDE).walk() if is_importable(entry.name)]
+
+
+def _missing_hashes(client, hashes: list[str]) -> set[str]:
+    """Hashes of contents the vault does not have yet."""
+    missing = set()
+    for start in range(0, len(hashes), HASH_BATCH):
+        response = client.post(
+            "http://127.0.0.1:8000/api/blobs/exists",
+            json={"hashes": hashes[start:start + HASH_BATCH]},
+            timeout=60.0,
+        )
+        response.raise_for_status()
+        missing.update(response.json()["missing"])
+    return missing
+
+
+def _upload_file(client, path: Path, category_id: int | None, auto_classify: bool):
+    """Upload one file, in resumable chunks if it is large, with its full path as original_path."""
+    import httpx
+
+    if path.stat().st_size <= CHUNKED_UPLOAD_SIZE:
+        with open(path, "rb") as f:
+            return client.post(
+                "http://127.0.0.1:8000/api/import/file",
+                files={"file": (path.name, f)},
+                data={
+                    "category_id": "" if category_id is None else str(category_id),
+                    "auto_classify": str(auto_classify).lower(),
+                    "original_path": str(path),
+                },
+                timeout=None,
+            )
+
+    response = client.post(
+        "http://127.0.0.1:8000/api/import/uploads",
+        json={
+            "filename": path.name,
+            "size": path.stat().st_size,
+            "category_id": category_id,
+            "auto_classify": auto_classify,
+            "original_path": str(path),
+        },
+        timeout=60.0,
+    )
+    if response.status_code != 200:
+        return response
+    upload = response.json()
+    url = f"http://127.0.0.1:8000/api/import/uploads/{upload['upload_id']}"
+
+    with open(path, "rb") as f:
+        for index in upload["missing"]:
+            f.seek(index * upload["chunk_size"])
+            chunk = f.read(upload["chunk_size"])
+            for attempt in range(CHUNK_RETRIES):
+                try:
+                    response = client.put(f"{url}/chunks/{index}", content=chunk, timeout=300.0)
+                    break
+                except (httpx.TimeoutException, httpx.NetworkError):
+                    if attempt == CHUNK_RETRIES - 1:
+                        raise
+            if response.status_code != 200:
+                client.delete(url, timeout=60.0)
+                return response
+
+    return client.post(f"{url}/complete", timeout=None)
+
+
 def _get_category_id(category_name: str) -> int | None:
     """Get category ID by name."""
     import httpx
@@ -188,3 +188,37 @@ def restore(
     except Exception as e:
         console.print(f"[red]Restore failed: {e}[/red]")
         raise typer.Exit(1)
+
+
+@app.command()
+def reindex(
+    semantic: bool = typer.Option(False, "--semantic", "-s", help="Also rebuild the semantic vector index"),
+):
+    """Rebuild the full-text (and optionally semantic) search index."""
+    import httpx
+
+    try:
+        response = httpx.post("http://127.0.0.1:8000/api/search/reindex", timeout=300.0)
+
+        if response.status_code == 200:
+            result = response.json()
+            console.print(f"[green]Search index rebuilt ({result['indexed']} items)[/green]")
+        else:
+            error = response.json().get("detail", "Unknown error")
+            console.print(f"[red]Reindex failed: {error}[/red]")
+            return
+
+        if semantic:
+            with console.status("Embedding items..."):
+                response = httpx.post("http://127.0.0.1:8000/api/search/semantic/rebuild", timeout=None)
+
+            if response.status_code == 200:
+                result = response.json()
+                console.print(f"[green]Semantic index rebuilt ({result['indexed']} items)[/green]")
+            else:
+                error = response.json().get("detail", "Unknown error")
+                console.print(f"[red]Semantic reindex failed: {error}[/red]")
+
+    except httpx.ConnectError:
+        console.print("[yellow]Vault server is not running.[/yellow]")
+        console.print("Start the server with: [bold]kvault serve[/bold]")